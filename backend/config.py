@@ -64,6 +64,8 @@ class Settings(BaseSettings):
     embeddings_file: str = "embeddings.npy"
     metadata_file: str = "metadata.json"
     bm25_file: str = "bm25_index.pkl"
+    tag_embeddings_file: str = "tag_embeddings.npy"
+    post_embeddings_file: str = "post_embeddings.npy"
 
     # Content configuration
     content_dir: str = Field(default="content/posts", env="CONTENT_DIR")
@@ -74,6 +76,8 @@ class Settings(BaseSettings):
     embedding_provider: str = Field(default="local", env="EMBEDDING_PROVIDER")
     embedding_model: str = Field(default="all-MiniLM-L6-v2", env="EMBEDDING_MODEL")
     embedding_dimension: int = Field(default=384, env="EMBEDDING_DIMENSION")
+    # Used when EMBEDDING_PROVIDER=server (see rag/embedding_server.py)
+    embedding_server_socket: str = Field(default="/tmp/docerate-embeddings.sock", env="EMBEDDING_SERVER_SOCKET")
 
     # LLM configuration
     llm_provider: str = Field(default="ollama", env="LLM_PROVIDER")
@@ -104,8 +108,25 @@ class Settings(BaseSettings):
     search_top_k: int = Field(default=10, env="SEARCH_TOP_K")
     search_alpha: float = Field(default=0.7, env="SEARCH_ALPHA")  # Weight for dense retrieval
     search_rerank: bool = Field(default=True, env="SEARCH_RERANK")
+    search_max_workers: int = Field(default=4, env="SEARCH_MAX_WORKERS")  # Threads for concurrent retrieval
+    search_embed_workers: int = Field(default=4, env="SEARCH_EMBED_WORKERS")  # Threads for query embedding calls
+    search_fusion: str = Field(default="rrf", env="SEARCH_FUSION")  # rrf, minmax, zscore or dbsf
+    search_router: bool = Field(default=True, env="SEARCH_ROUTER")  # Route keyword queries to BM25 only
+    search_rrf_k: float = Field(default=60, env="SEARCH_RRF_K")
+    search_reranker: str = Field(default="heuristic", env="SEARCH_RERANKER")  # heuristic or cross-encoder
+    reranker_model: str = Field(default="cross-encoder/ms-marco-MiniLM-L-6-v2", env="RERANKER_MODEL")
+    rerank_budget_ms: Optional[float] = Field(default=None, env="RERANK_BUDGET_MS")  # Skip cross-encoder above this
+    search_deadline_ms: Optional[float] = Field(default=None, env="SEARCH_DEADLINE_MS")  # Default retrieval budget
+    search_dense_depth: float = Field(default=2.0, env="SEARCH_DENSE_DEPTH")  # Dense candidates per result
+    search_sparse_depth: float = Field(default=2.0, env="SEARCH_SPARSE_DEPTH")  # BM25 candidates per result
+    search_dense_posts: int = Field(default=0, env="SEARCH_DENSE_POSTS")  # Posts searched two-level (0 = all chunks)
+    search_rerank_depth: float = Field(default=1.0, env="SEARCH_RERANK_DEPTH")  # Fused candidates reranked per result
 
     # Generation configuration
+    generation_candidates: int = Field(default=30, env="GENERATION_CANDIDATES")  # Chunks retrieved before MMR
+    generation_context_chunks: int = Field(default=10, env="GENERATION_CONTEXT_CHUNKS")  # Chunks sent to the LLM
+    generation_context_tokens: int = Field(default=3000, env="GENERATION_CONTEXT_TOKENS")  # Prompt context budget
+    generation_mmr_lambda: float = Field(default=0.7, env="GENERATION_MMR_LAMBDA")  # 1 = relevance only
     generation_max_tokens: int = Field(default=2048, env="GENERATION_MAX_TOKENS")
     generation_temperature: float = Field(default=0.7, env="GENERATION_TEMPERATURE")
     generation_system_prompt: str = Field(
@@ -118,6 +139,9 @@ class Settings(BaseSettings):
     # Caching
     cache_ttl: int = Field(default=3600, env="CACHE_TTL")  # seconds
     enable_cache: bool = Field(default=True, env="ENABLE_CACHE")
+    search_cache_size: int = Field(default=1024, env="SEARCH_CACHE_SIZE")  # Cached search result sets
+    semantic_cache_size: int = Field(default=256, env="SEMANTIC_CACHE_SIZE")  # Cached generated articles
+    semantic_cache_threshold: float = Field(default=0.95, env="SEMANTIC_CACHE_THRESHOLD")  # Min query cosine for a hit
 
     @property
     def openrouter_api_key(self) -> str:
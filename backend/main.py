@@ -7,10 +7,12 @@ import sys
 import time
 import json
 import pickle
+import asyncio
 import numpy as np
 from pathlib import Path
 from typing import Optional, List
 from datetime import datetime
+from dataclasses import asdict
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
@@ -25,7 +27,8 @@ from backend.models import (
     SearchRequest, SearchResponse, SearchResult, ChunkMetadata,
     GenerateRequest, GenerateResponse, Reference,
     TagsResponse, TagInfo, HealthResponse, IndexStatus,
-    PostSummary, PostDetail, PostListResponse, PostsByTagResponse
+    PostSummary, PostDetail, PostListResponse, PostsByTagResponse, StatsResponse,
+    SearchExplain, RelatedPost, RelatedPostsResponse
 )
 from backend.services.ollama import OllamaService
 from backend.services.bedrock import BedrockService
@@ -33,8 +36,15 @@ from backend.services.openrouter import OpenRouterService
 from backend.services.posts import PostService
 from backend.services.data_loader import get_data_loader
 from rag.search import HybridSearch
+from rag.pipeline import PipelineConfig, SearchTrace, Deadline
+from rag.context import ContextPacker
+from rag.router import QueryRouter
+from rag.cache import SearchCache, SemanticCache
+from rag.reranker import CrossEncoderReranker
 from rag.embeddings import EmbeddingStore, EmbeddingService, EmbeddingConfig
 from rag.bm25 import BM25
+from rag.chunk_store import ChunkStore
+from rag.tokens import TokenCounter, load_token_counter
 
 
 # Global variables for storing loaded data
@@ -47,7 +57,10 @@ app_state = {
     "llm_service": None,
     "tags_cache": None,
     "index_status": None,
-    "post_service": None
+    "post_service": None,
+    "search_cache": None,
+    "semantic_cache": None,
+    "context_packer": None
 }
 
 
@@ -61,6 +74,12 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("Shutting down RAG API...")
+    if app_state["hybrid_search"]:
+        app_state["hybrid_search"].close()
+    if app_state["embedding_service"]:
+        app_state["embedding_service"].close()
+    if isinstance(app_state["llm_service"], OllamaService):
+        await app_state["llm_service"].close()
 
 
 # Configure root_path for API Gateway stage prefix
@@ -119,8 +138,24 @@ async def load_search_index():
         store.embeddings = embeddings
         store.chunk_ids = metadata['chunk_ids']
         store.metadata = metadata['metadata']
+
+        tag_embeddings = await data_loader.load_tag_embeddings()
+        if tag_embeddings is not None and metadata.get('tag_names'):
+            store.tag_names = metadata['tag_names']
+            store.tag_embeddings = tag_embeddings
+        else:
+            # Index built before tag centroids were precomputed
+            store.compute_tag_centroids()
+
+        post_embeddings = await data_loader.load_post_embeddings()
+        if post_embeddings is not None and metadata.get('post_slugs'):
+            store.post_slugs = metadata['post_slugs']
+            store.post_embeddings = post_embeddings
+        else:
+            store.compute_post_centroids()
+
         app_state["embedding_store"] = store
-        print(f"Loaded embeddings")
+        print(f"Loaded embeddings ({len(store.tag_names)} tag centroids, {len(store.post_slugs)} post centroids)")
 
         # Load BM25 model
         app_state["bm25_model"] = await data_loader.load_bm25_index()
@@ -184,7 +219,8 @@ async def initialize_services():
     embedding_config = EmbeddingConfig(
         provider=settings.embedding_provider,
         model_name=settings.embedding_model,
-        dimension=settings.embedding_dimension
+        dimension=settings.embedding_dimension,
+        endpoint=settings.ollama_host if settings.embedding_provider == "ollama" else settings.embedding_server_socket
     )
     app_state["embedding_service"] = EmbeddingService(embedding_config)
 
@@ -211,13 +247,57 @@ async def initialize_services():
         index_summary=app_state.get("index_summary")
     )
 
+    # Search results are cached per index version so a reindex flushes them
+    if settings.enable_cache and app_state["search_cache"] is None:
+        app_state["search_cache"] = SearchCache(
+            max_size=settings.search_cache_size,
+            ttl=settings.cache_ttl
+        )
+
+    # Generated articles are cached by query meaning, not exact text
+    if settings.enable_cache and app_state["semantic_cache"] is None:
+        app_state["semantic_cache"] = SemanticCache(
+            threshold=settings.semantic_cache_threshold,
+            max_size=settings.semantic_cache_size,
+            ttl=settings.cache_ttl
+        )
+
+    # Budget generation context in the tokens the index's chunks were sized with
+    tokenizer = (app_state.get("index_summary") or {}).get("chunk_config", {}).get("tokenizer")
+    app_state["context_packer"] = ContextPacker(
+        max_tokens=settings.generation_context_tokens,
+        token_counter=load_token_counter(None if tokenizer == TokenCounter.name else tokenizer)
+    )
+
+    reranker = None
+    if settings.search_reranker == "cross-encoder":
+        try:
+            reranker = CrossEncoderReranker(settings.reranker_model)
+        except ImportError as e:
+            print(f"Cross-encoder reranker unavailable, using heuristic reranking: {e}")
+
     # Initialize hybrid search
     app_state["hybrid_search"] = HybridSearch(
         embedding_store=app_state["embedding_store"],
         embedding_service=app_state["embedding_service"],
         bm25_model=app_state["bm25_model"],
         chunks=app_state["chunks"],
-        alpha=settings.search_alpha
+        alpha=settings.search_alpha,
+        max_workers=settings.search_max_workers,
+        embed_workers=settings.search_embed_workers,
+        cache=app_state["search_cache"],
+        index_version=(app_state.get("index_summary") or {}).get("created_at"),
+        fusion=settings.search_fusion,
+        rrf_k=settings.search_rrf_k,
+        reranker=reranker,
+        rerank_budget_ms=settings.rerank_budget_ms,
+        router=QueryRouter(app_state["bm25_model"], alpha=settings.search_alpha) if settings.search_router else None,
+        pipeline=PipelineConfig(
+            dense_depth=settings.search_dense_depth,
+            sparse_depth=settings.search_sparse_depth,
+            dense_posts=settings.search_dense_posts,
+            rerank_depth=settings.search_rerank_depth
+        )
     )
 
     print("Services initialized")
@@ -241,6 +321,20 @@ async def health_check():
     )
 
 
+@app.get("/api/stats", response_model=StatsResponse)
+async def get_stats():
+    """Get cache hit rates, latency saved and query routing counters."""
+    search_cache = app_state["search_cache"]
+    semantic_cache = app_state["semantic_cache"]
+    router = app_state["hybrid_search"].router if app_state["hybrid_search"] else None
+
+    return StatsResponse(
+        search_cache=search_cache.stats() if search_cache else None,
+        semantic_cache=semantic_cache.stats() if semantic_cache else None,
+        query_router=router.stats() if router else None
+    )
+
+
 @app.get("/api/tags", response_model=TagsResponse)
 async def get_tags():
     """Get all available tags."""
@@ -263,12 +357,19 @@ async def search(request: SearchRequest):
         raise HTTPException(status_code=503, detail="Search service not available")
 
     try:
+        trace = SearchTrace() if request.explain else None
+        deadline = retrieval_deadline(request.deadline_ms)
+
         # Perform search
-        results = app_state["hybrid_search"].search(
+        results = await app_state["hybrid_search"].asearch(
             query=request.query,
             top_k=request.limit,
             filter_tags=request.tags if request.tags else None,
-            rerank=request.rerank
+            rerank=request.rerank,
+            fusion=request.fusion,
+            rerank_budget_ms=request.rerank_budget_ms,
+            trace=trace,
+            deadline=deadline
         )
 
         # Convert to response model
@@ -284,24 +385,104 @@ async def search(request: SearchRequest):
                     section_heading=result.section_heading,
                     tags=result.tags,
                     url_fragment=result.url,
-                    position=0  # TODO: Add position from metadata
+                    position=result.position
                 ),
                 source_type=result.source_type
             ))
 
         elapsed_ms = (time.time() - start_time) * 1000
 
+        explain = None
+        if trace is not None:
+            explain = SearchExplain(
+                **trace.to_dict(),
+                depths=asdict(trace.pipeline or app_state["hybrid_search"].pipeline)
+            )
+
         return SearchResponse(
             query=request.query,
             results=search_results,
             total_results=len(search_results),
-            search_time_ms=elapsed_ms
+            search_time_ms=elapsed_ms,
+            explain=explain,
+            degradations=deadline.degradations if deadline else []
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def generation_model_name() -> str:
+    """Name of the model articles are generated with."""
+    if settings.llm_provider == "openrouter":
+        return settings.openrouter_model
+    if settings.llm_provider == "ollama":
+        return settings.llm_model
+    return settings.bedrock_model_id
+
+
+def retrieval_deadline(budget_ms: Optional[float]) -> Optional[Deadline]:
+    """Deadline for a request's retrieval, falling back to the configured default."""
+    if budget_ms is None:
+        budget_ms = settings.search_deadline_ms
+    return Deadline(budget_ms) if budget_ms is not None else None
+
+
+async def context_embedding(
+    request: GenerateRequest,
+    deadline: Optional[Deadline] = None
+) -> Optional[np.ndarray]:
+    """Embedding describing what a generation request asks for."""
+    if not request.query:
+        # Tag-only request: use the precomputed tag centroid instead of embedding text
+        return app_state["embedding_store"].tag_set_embedding(request.tags)
+
+    embedding = app_state["hybrid_search"].aembed_query(request.query)
+    if deadline is None:
+        return await embedding
+
+    try:
+        return await asyncio.wait_for(
+            embedding, timeout=max(deadline.remaining_ms(), 0) * HybridSearch.EMBED_BUDGET_SHARE / 1000
+        )
+    except asyncio.TimeoutError:
+        # Provider too slow for the budget: retrieve with BM25 only
+        deadline.degrade("sparse-only")
+        return None
+
+
+async def retrieve_context(
+    request: GenerateRequest,
+    query_embedding: Optional[np.ndarray] = None,
+    deadline: Optional[Deadline] = None
+) -> list:
+    """Retrieve the chunks used as generation context for a request."""
+    if request.query:
+        search_query = request.query
+    else:
+        # Tag-only request: the keyword side still needs text, but the dense
+        # side can use the precomputed tag centroid instead of embedding it
+        search_query = f"content about {', '.join(request.tags)}"
+        if query_embedding is None:
+            query_embedding = app_state["embedding_store"].tag_set_embedding(request.tags)
+
+    candidates = await app_state["hybrid_search"].asearch(
+        query=search_query,
+        top_k=settings.generation_candidates,
+        filter_tags=request.tags if request.tags else None,
+        rerank=True,
+        query_embedding=query_embedding,
+        deadline=deadline
+    )
+
+    # Neighbouring chunks overlap; keep a diverse set so prompt tokens aren't spent on repeats
+    return app_state["hybrid_search"].diversify(
+        candidates,
+        k=settings.generation_context_chunks,
+        lambda_mult=settings.generation_mmr_lambda
+    )
+
+
 @app.post("/api/generate", response_model=GenerateResponse)
 async def generate(request: GenerateRequest):
     """Generate custom article based on query and context."""
@@ -315,23 +496,43 @@ async def generate(request: GenerateRequest):
         raise HTTPException(status_code=400, detail="Either a query or tags must be provided")
 
     try:
-        # Create search query based on what's provided
-        search_query = request.query if request.query else f"content about {', '.join(request.tags)}"
+        deadline = retrieval_deadline(request.retrieval_deadline_ms)
+
+        # Look for an article generated for a near-identical request
+        semantic_cache = app_state["semantic_cache"]
+        query_embedding = None
+        cache_key = None
+        if semantic_cache is not None:
+            query_embedding = await context_embedding(request, deadline)
+            if query_embedding is not None:
+                cache_key = (
+                    tuple(sorted(set(request.tags))),
+                    request.context,
+                    request.temperature or settings.generation_temperature,
+                    request.max_tokens or settings.generation_max_tokens,
+                    generation_model_name(),
+                    (app_state.get("index_summary") or {}).get("created_at")
+                )
+                cached_response = semantic_cache.lookup(query_embedding, cache_key)
+                if cached_response is not None:
+                    return cached_response.model_copy(update={
+                        "generation_time_ms": (time.time() - start_time) * 1000,
+                        "cached": True
+                    })
 
-        # Search for relevant chunks
-        search_results = app_state["hybrid_search"].search(
-            query=search_query,
-            top_k=10,
-            filter_tags=request.tags if request.tags else None,
-            rerank=True
-        )
+        # Search for relevant chunks, reusing the embedding computed above
+        search_results = await retrieve_context(request, query_embedding, deadline)
+
+        # Fit the chunks into the context budget, merging neighbours from the same section
+        packed = app_state["context_packer"].pack(search_results)
 
         # Build context from search results
         context_chunks = []
         references = []
 
-        for i, result in enumerate(search_results):
-            context_chunks.append(f"[Chunk {i+1}]\nTitle: {result.post_title}\nSection: {result.section_heading or 'Introduction'}\nContent: {result.content}\n")
+        for i, block in enumerate(packed.blocks):
+            result = block.first
+            context_chunks.append(f"[Chunk {i+1}]\nTitle: {result.post_title}\nSection: {result.section_heading or 'Introduction'}\nContent: {block.content}\n")
 
             references.append(Reference(
                 chunk_id=result.chunk_id,
@@ -392,13 +593,21 @@ Article:"""
 
         elapsed_ms = (time.time() - start_time) * 1000
 
-        return GenerateResponse(
+        response = GenerateResponse(
             article=article,
             references=references,
             generation_time_ms=elapsed_ms,
-            model_used=settings.openrouter_model if settings.llm_provider == "openrouter" else (settings.llm_model if settings.llm_provider == "ollama" else settings.bedrock_model_id),
-            chunks_retrieved=len(search_results)
+            model_used=generation_model_name(),
+            chunks_retrieved=len(search_results),
+            context_tokens=packed.tokens_used,
+            context_tokens_saved=packed.tokens_saved,
+            degradations=deadline.degradations if deadline else []
         )
+        # Degraded context gives a worse article; don't serve it to later requests
+        if cache_key is not None and not response.degradations:
+            semantic_cache.store(query_embedding, cache_key, response, elapsed_ms)
+
+        return response
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -416,23 +625,19 @@ async def generate_stream(request: GenerateRequest):
 
     async def stream_generator():
         try:
-            # Create search query based on what's provided
-            search_query = request.query if request.query else f"content about {', '.join(request.tags)}"
-
             # Search for relevant chunks (same as non-streaming)
-            search_results = app_state["hybrid_search"].search(
-                query=search_query,
-                top_k=10,
-                filter_tags=request.tags if request.tags else None,
-                rerank=True
+            search_results = await retrieve_context(
+                request, deadline=retrieval_deadline(request.retrieval_deadline_ms)
             )
+            packed = app_state["context_packer"].pack(search_results)
 
             # Build context and references
             context_chunks = []
             references = []
 
-            for i, result in enumerate(search_results):
-                context_chunks.append(f"[Chunk {i+1}]\n{result.content}\n")
+            for i, block in enumerate(packed.blocks):
+                result = block.first
+                context_chunks.append(f"[Chunk {i+1}]\n{block.content}\n")
                 references.append({
                     "chunk_id": result.chunk_id,
                     "post_title": result.post_title,
@@ -536,6 +741,33 @@ async def get_posts_by_tag(tag: str):
     )
 
 
+@app.get("/api/posts/{slug}/related", response_model=RelatedPostsResponse)
+async def get_related_posts(slug: str, limit: int = 5):
+    """Get the posts most similar in content to a post."""
+    store = app_state["embedding_store"]
+    if not store:
+        raise HTTPException(status_code=503, detail="Search index not loaded")
+
+    if slug not in store.post_slugs:
+        raise HTTPException(status_code=404, detail=f"Post '{slug}' not found")
+
+    chunks = app_state["chunks"]
+    if isinstance(chunks, ChunkStore):
+        titles = {post['slug']: post['title'] for post in chunks.posts}
+    else:
+        # Legacy chunks.json: every chunk carries its post's title
+        titles = {chunk['post_slug']: chunk.get('post_title', '') for chunk in chunks or []}
+
+    # float32 rounding can put the cosine of near-duplicate posts just above 1
+    return RelatedPostsResponse(
+        slug=slug,
+        related=[
+            RelatedPost(slug=other, title=titles.get(other, ''), score=min(max(score, 0.0), 1.0))
+            for other, score in store.related_posts(slug, top_k=limit)
+        ]
+    )
+
+
 @app.get("/api/posts/{slug}", response_model=PostDetail)
 async def get_post(slug: str):
     """Get a single post by slug."""
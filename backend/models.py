@@ -2,7 +2,7 @@
 Pydantic models for request/response validation.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field
 from datetime import datetime
 
@@ -15,6 +15,16 @@ class SearchRequest(BaseModel):
     tags: Optional[List[str]] = Field(default=[], description="Filter by tags")
     limit: int = Field(default=5, description="Number of results to return", ge=1, le=20)
     rerank: bool = Field(default=True, description="Apply reranking to results")
+    fusion: Optional[Literal["rrf", "minmax", "zscore", "dbsf"]] = Field(
+        default=None, description="Score fusion strategy (defaults to SEARCH_FUSION)"
+    )
+    rerank_budget_ms: Optional[float] = Field(
+        default=None, description="Skip cross-encoder reranking if it would take longer", ge=0
+    )
+    explain: bool = Field(default=False, description="Return per-stage candidate counts and timings")
+    deadline_ms: Optional[float] = Field(
+        default=None, description="Latency budget; the search degrades to meet it", gt=0
+    )
 
 
 class GenerateRequest(BaseModel):
@@ -25,6 +35,9 @@ class GenerateRequest(BaseModel):
     max_tokens: Optional[int] = Field(default=2048, description="Maximum tokens to generate")
     temperature: Optional[float] = Field(default=0.7, description="Generation temperature", ge=0, le=1)
     stream: bool = Field(default=False, description="Stream the response")
+    retrieval_deadline_ms: Optional[float] = Field(
+        default=None, description="Latency budget for retrieving context; retrieval degrades to meet it", gt=0
+    )
 
 
 class ReindexRequest(BaseModel):
@@ -53,12 +66,34 @@ class SearchResult(BaseModel):
     source_type: str = Field(..., description="Source of result: dense, sparse, or hybrid")
 
 
+class StageTiming(BaseModel):
+    """Candidate count and timing of one retrieval stage."""
+    name: str
+    candidates: int
+    start_ms: float
+    elapsed_ms: float
+    detail: Dict[str, Any] = Field(default_factory=dict)
+
+
+class SearchExplain(BaseModel):
+    """Breakdown of where a search spent its time."""
+    total_ms: float
+    stages: List[StageTiming]
+    depths: Dict[str, float] = Field(..., description="Pipeline candidate depths, as multiples of the limit")
+
+
 class SearchResponse(BaseModel):
     """Response for search endpoint."""
     query: str
     results: List[SearchResult]
     total_results: int
     search_time_ms: float
+    explain: Optional[SearchExplain] = None
+    degradations: List[str] = Field(
+        default_factory=list,
+        description="Shortcuts taken to meet the deadline: shrunk-depth, sparse-only, dense-timeout, "
+                    "sparse-timeout, skipped-rerank, heuristic-rerank"
+    )
 
 
 class Reference(BaseModel):
@@ -77,6 +112,12 @@ class GenerateResponse(BaseModel):
     generation_time_ms: float
     model_used: str
     chunks_retrieved: int
+    context_tokens: Optional[int] = Field(default=None, description="Estimated tokens of context sent to the model")
+    context_tokens_saved: Optional[int] = Field(
+        default=None, description="Tokens saved by merging overlapping chunks and the context budget"
+    )
+    cached: bool = Field(default=False, description="Served from the semantic cache")
+    degradations: List[str] = Field(default_factory=list, description="Shortcuts taken to meet the retrieval deadline")
 
 
 class StreamChunk(BaseModel):
@@ -110,6 +151,13 @@ class HealthResponse(BaseModel):
     services: Dict[str, bool]
 
 
+class StatsResponse(BaseModel):
+    """Cache statistics."""
+    search_cache: Optional[Dict[str, Any]] = None
+    semantic_cache: Optional[Dict[str, Any]] = None
+    query_router: Optional[Dict[str, Any]] = None
+
+
 class ErrorResponse(BaseModel):
     """Error response model."""
     error: str
@@ -167,6 +215,19 @@ class PostListResponse(BaseModel):
     has_more: bool = Field(default=False)
 
 
+class RelatedPost(BaseModel):
+    """A post related to another by content."""
+    slug: str
+    title: str
+    score: float = Field(..., ge=0, le=1, description="Cosine similarity of the posts' centroids")
+
+
+class RelatedPostsResponse(BaseModel):
+    """Response for related posts."""
+    slug: str
+    related: List[RelatedPost]
+
+
 class PostsByTagResponse(BaseModel):
     """Response for posts filtered by tag."""
     tag: str
@@ -1,5 +1,10 @@
 """
 Data loader service for loading RAG index data from local files or S3.
+
+Both loaders read the snapshot named by the pointer file (see
+rag/snapshot.py), resolved once per loader so every artifact comes from the
+same build, and check files against the snapshot's checksums before use.
+Data without a pointer is read from the flat layout, as before snapshots.
 """
 
 import os
@@ -7,10 +12,16 @@ import json
 import pickle
 import tempfile
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence
 import numpy as np
 from abc import ABC, abstractmethod
 
+from rag.chunk_store import load_chunk_records
+from rag.snapshot import (
+    POINTER_FILE, SNAPSHOTS_DIR, SNAPSHOT_MANIFEST, SnapshotError,
+    check_file, load_snapshot_manifest, resolve_index_dir, snapshot_prefix
+)
+
 from ..config import settings, is_production
 
 
@@ -18,8 +29,8 @@ class DataLoader(ABC):
     """Abstract base class for data loaders."""
 
     @abstractmethod
-    async def load_chunks(self) -> list:
-        """Load chunks data."""
+    async def load_chunks(self) -> Sequence:
+        """Load chunks data, as a sequence of chunk mappings."""
         pass
 
     @abstractmethod
@@ -37,6 +48,16 @@ class DataLoader(ABC):
         """Load BM25 index."""
         pass
 
+    @abstractmethod
+    async def load_tag_embeddings(self) -> Optional[np.ndarray]:
+        """Load precomputed tag centroid embeddings, if the index has them."""
+        pass
+
+    @abstractmethod
+    async def load_post_embeddings(self) -> Optional[np.ndarray]:
+        """Load precomputed post centroid embeddings, if the index has them."""
+        pass
+
     @abstractmethod
     async def load_index_summary(self) -> Dict[str, Any]:
         """Load index summary."""
@@ -53,19 +74,29 @@ class LocalDataLoader(DataLoader):
 
     def __init__(self, data_dir: Optional[str] = None):
         self.data_dir = Path(data_dir or settings.data_dir)
-
-    async def load_chunks(self) -> list:
+        self._index_dir: Optional[Path] = None
+
+    @property
+    def index_dir(self) -> Path:
+        """Directory of the current snapshot, verified on first use (data_dir for the flat layout)."""
+        if self._index_dir is None:
+            self._index_dir = resolve_index_dir(self.data_dir)
+            if self._index_dir != self.data_dir:
+                print(f"Using index snapshot {self._index_dir.name}")
+        return self._index_dir
+
+    async def load_chunks(self) -> Sequence:
         """Load chunks from local JSON file."""
-        chunks_path = self.data_dir / settings.chunks_file
+        chunks_path = self.index_dir / settings.chunks_file
         if not chunks_path.exists():
             raise FileNotFoundError(f"Chunks file not found: {chunks_path}")
 
         with open(chunks_path, "r") as f:
-            return json.load(f)
+            return load_chunk_records(json.load(f))
 
     async def load_embeddings(self) -> np.ndarray:
         """Load embeddings from local numpy file."""
-        embeddings_path = self.data_dir / settings.embeddings_file
+        embeddings_path = self.index_dir / settings.embeddings_file
         if not embeddings_path.exists():
             raise FileNotFoundError(f"Embeddings file not found: {embeddings_path}")
 
@@ -73,7 +104,7 @@ class LocalDataLoader(DataLoader):
 
     async def load_metadata(self) -> Dict[str, Any]:
         """Load metadata from local JSON file."""
-        metadata_path = self.data_dir / settings.metadata_file
+        metadata_path = self.index_dir / settings.metadata_file
         if not metadata_path.exists():
             raise FileNotFoundError(f"Metadata file not found: {metadata_path}")
 
@@ -82,7 +113,7 @@ class LocalDataLoader(DataLoader):
 
     async def load_bm25_index(self) -> Any:
         """Load BM25 index from local pickle file."""
-        bm25_path = self.data_dir / settings.bm25_file
+        bm25_path = self.index_dir / settings.bm25_file
         if not bm25_path.exists():
             raise FileNotFoundError(f"BM25 index not found: {bm25_path}")
 
@@ -90,9 +121,25 @@ class LocalDataLoader(DataLoader):
         from rag.bm25 import BM25
         return BM25.load(str(bm25_path))
 
+    async def load_tag_embeddings(self) -> Optional[np.ndarray]:
+        """Load tag centroid embeddings from local numpy file."""
+        tag_embeddings_path = self.index_dir / settings.tag_embeddings_file
+        if not tag_embeddings_path.exists():
+            return None
+
+        return np.load(tag_embeddings_path)
+
+    async def load_post_embeddings(self) -> Optional[np.ndarray]:
+        """Load post centroid embeddings from local numpy file."""
+        post_embeddings_path = self.index_dir / settings.post_embeddings_file
+        if not post_embeddings_path.exists():
+            return None
+
+        return np.load(post_embeddings_path)
+
     async def load_index_summary(self) -> Dict[str, Any]:
         """Load index summary from local JSON file."""
-        summary_path = self.data_dir / "index_summary.json"
+        summary_path = self.index_dir / "index_summary.json"
         if not summary_path.exists():
             # Return default if not found
             return {
@@ -105,11 +152,17 @@ class LocalDataLoader(DataLoader):
             return json.load(f)
 
     async def health_check(self) -> bool:
-        """Check if all required data files exist."""
+        """Check if the current snapshot verifies and all required data files exist."""
+        try:
+            index_dir = self.index_dir
+        except SnapshotError as e:
+            print(f"Index snapshot check failed: {e}")
+            return False
+
         required_files = [
-            self.data_dir / settings.chunks_file,
-            self.data_dir / settings.embeddings_file,
-            self.data_dir / settings.bm25_file
+            index_dir / settings.chunks_file,
+            index_dir / settings.embeddings_file,
+            index_dir / settings.bm25_file
         ]
         return all(f.exists() for f in required_files)
 
@@ -127,6 +180,7 @@ class S3DataLoader(DataLoader):
         self.temp_dir = Path(tempfile.gettempdir()) / "rag_data"
         self.temp_dir.mkdir(exist_ok=True)
         self._cache = {}
+        self._snapshot: Optional[Dict[str, Any]] = None
 
     async def _download_file(self, s3_key: str, local_path: Path) -> Path:
         """Download a file from S3 to local temp directory."""
@@ -142,43 +196,116 @@ class S3DataLoader(DataLoader):
         except Exception as e:
             raise FileNotFoundError(f"Failed to download {s3_key} from S3: {e}")
 
-    async def load_chunks(self) -> list:
+    async def _resolve_snapshot(self) -> Dict[str, Any]:
+        """
+        Key prefix, local directory and file checksums of the current snapshot.
+
+        Resolved from the pointer object once, so all artifacts are
+        downloaded from the same snapshot even if a new one is published
+        meanwhile. Without a pointer, files are read from the bucket root
+        and not checksummed.
+        """
+        if self._snapshot is None:
+            from botocore.exceptions import ClientError
+            try:
+                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=POINTER_FILE)
+                version = response["Body"].read().decode("utf-8").strip()
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                    raise
+                version = None
+
+            if not version:
+                self._snapshot = {"prefix": "", "local_dir": self.temp_dir, "files": None}
+            else:
+                # Downloads are cached per snapshot, so a new one never reuses stale files
+                local_dir = self.temp_dir / SNAPSHOTS_DIR / version
+                local_dir.mkdir(parents=True, exist_ok=True)
+                manifest_path = local_dir / SNAPSHOT_MANIFEST
+                await self._download_file(snapshot_prefix(version) + SNAPSHOT_MANIFEST, manifest_path)
+                try:
+                    manifest = load_snapshot_manifest(manifest_path)
+                except SnapshotError:
+                    manifest_path.unlink(missing_ok=True)
+                    await self._download_file(snapshot_prefix(version) + SNAPSHOT_MANIFEST, manifest_path)
+                    manifest = load_snapshot_manifest(manifest_path)
+                self._snapshot = {
+                    "prefix": snapshot_prefix(version),
+                    "local_dir": local_dir,
+                    "files": manifest["files"]
+                }
+                print(f"Using index snapshot {version}")
+        return self._snapshot
+
+    async def _fetch(self, name: str) -> Path:
+        """Download an artifact of the current snapshot and check it against its checksum."""
+        snapshot = await self._resolve_snapshot()
+        local_path = snapshot["local_dir"] / name
+        if snapshot["files"] is None:
+            return await self._download_file(name, local_path)
+        if name not in snapshot["files"]:
+            raise FileNotFoundError(f"{name} is not part of index snapshot {snapshot['prefix']}")
+
+        await self._download_file(snapshot["prefix"] + name, local_path)
+        try:
+            check_file(name, local_path, snapshot["files"][name])
+        except SnapshotError:
+            # A cached file may be left over from an interrupted download; fetch it once more
+            local_path.unlink(missing_ok=True)
+            await self._download_file(snapshot["prefix"] + name, local_path)
+            check_file(name, local_path, snapshot["files"][name])
+        return local_path
+
+    async def load_chunks(self) -> Sequence:
         """Load chunks from S3."""
-        local_path = self.temp_dir / settings.chunks_file
-        await self._download_file(settings.chunks_file, local_path)
+        local_path = await self._fetch(settings.chunks_file)
 
         with open(local_path, "r") as f:
-            return json.load(f)
+            return load_chunk_records(json.load(f))
 
     async def load_embeddings(self) -> np.ndarray:
         """Load embeddings from S3."""
-        local_path = self.temp_dir / settings.embeddings_file
-        await self._download_file(settings.embeddings_file, local_path)
+        local_path = await self._fetch(settings.embeddings_file)
 
         return np.load(local_path)
 
     async def load_metadata(self) -> Dict[str, Any]:
         """Load metadata from S3."""
-        local_path = self.temp_dir / settings.metadata_file
-        await self._download_file(settings.metadata_file, local_path)
+        local_path = await self._fetch(settings.metadata_file)
 
         with open(local_path, "r") as f:
             return json.load(f)
 
     async def load_bm25_index(self) -> Any:
         """Load BM25 index from S3."""
-        local_path = self.temp_dir / settings.bm25_file
-        await self._download_file(settings.bm25_file, local_path)
+        local_path = await self._fetch(settings.bm25_file)
 
         # Import BM25 here to avoid circular imports
         from rag.bm25 import BM25
         return BM25.load(str(local_path))
 
+    async def load_tag_embeddings(self) -> Optional[np.ndarray]:
+        """Load tag centroid embeddings from S3."""
+        try:
+            local_path = await self._fetch(settings.tag_embeddings_file)
+        except FileNotFoundError:
+            return None
+
+        return np.load(local_path)
+
+    async def load_post_embeddings(self) -> Optional[np.ndarray]:
+        """Load post centroid embeddings from S3."""
+        try:
+            local_path = await self._fetch(settings.post_embeddings_file)
+        except FileNotFoundError:
+            return None
+
+        return np.load(local_path)
+
     async def load_index_summary(self) -> Dict[str, Any]:
         """Load index summary from S3."""
-        local_path = self.temp_dir / "index_summary.json"
         try:
-            await self._download_file("index_summary.json", local_path)
+            local_path = await self._fetch("index_summary.json")
             with open(local_path, "r") as f:
                 return json.load(f)
         except FileNotFoundError:
@@ -198,7 +325,8 @@ class S3DataLoader(DataLoader):
                 MaxKeys=1
             )
 
-            # Check if required files exist
+            # Check if required files exist in the current snapshot
+            snapshot = await self._resolve_snapshot()
             required_files = [
                 settings.chunks_file,
                 settings.embeddings_file,
@@ -206,8 +334,10 @@ class S3DataLoader(DataLoader):
             ]
 
             for file_key in required_files:
+                if snapshot["files"] is not None and file_key not in snapshot["files"]:
+                    return False
                 try:
-                    self.s3_client.head_object(Bucket=self.bucket_name, Key=file_key)
+                    self.s3_client.head_object(Bucket=self.bucket_name, Key=snapshot["prefix"] + file_key)
                 except:
                     return False
 
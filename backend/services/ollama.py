@@ -14,6 +14,26 @@ class OllamaService:
     def __init__(self):
         self.base_url = settings.ollama_host
         self.model = settings.llm_model
+        self.embedding_model = (
+            settings.embedding_model if settings.embedding_provider == "ollama" else "nomic-embed-text"
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared client, creating it on first use so connections are reused."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=30.0,
+                limits=httpx.Limits(max_connections=16, max_keepalive_connections=8)
+            )
+        return self._client
+
+    async def close(self):
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def generate(
         self,
@@ -94,19 +114,28 @@ class OllamaService:
         Returns:
             Embedding vector
         """
+        embeddings = await self.embed_batch([text])
+        return embeddings[0] if embeddings else []
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """
+        Generate embeddings for several texts in one request.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding vector per text
+        """
         request_body = {
-            "model": "nomic-embed-text",  # Or another embedding model
-            "prompt": text
+            "model": self.embedding_model,
+            "input": texts
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{self.base_url}/api/embeddings",
-                json=request_body
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data.get("embedding", [])
+        response = await self._get_client().post("/api/embed", json=request_body)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("embeddings", [])
 
     async def health_check(self) -> bool:
         """Check if Ollama service is available."""
@@ -10,6 +10,9 @@ from datetime import datetime
 import frontmatter
 from functools import lru_cache
 
+from rag.snapshot import SnapshotError, resolve_index_dir
+
+
 class PostService:
     """Service for managing blog post content."""
 
@@ -66,8 +69,11 @@ class PostService:
         if self._index_summary:
             data = self._index_summary
         else:
-            summary_path = self.data_dir / "index_summary.json"
-            if summary_path.exists():
+            try:
+                summary_path = resolve_index_dir(self.data_dir, verify=False) / "index_summary.json"
+            except SnapshotError:
+                summary_path = None
+            if summary_path is not None and summary_path.exists():
                 with open(summary_path, 'r') as f:
                     data = json.load(f)
 
@@ -5,7 +5,7 @@ Used for sparse retrieval in hybrid search.
 
 import math
 import pickle
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 from collections import Counter
 import numpy as np
 
@@ -37,38 +37,65 @@ class BM25:
         Args:
             documents: List of text documents
         """
-        self.doc_count = len(documents)
-        doc_freq_counter = Counter()
+        self._index([self.term_counts(doc) for doc in documents])
+
+    def fit_term_counts(self, doc_freqs: List[Counter]):
+        """
+        Fit BM25 on term frequencies already counted with ``term_counts``.
+
+        Lets a corpus be tokenized as it streams in, without keeping its text.
+
+        Args:
+            doc_freqs: Term frequencies of each document
+        """
+        self._index(doc_freqs)
 
-        # Tokenize and calculate statistics
-        for doc in documents:
-            tokens = self._tokenize(doc)
-            self.doc_lengths.append(len(tokens))
-            self.vocab.update(tokens)
+    def refit(self, documents: List[Union[int, str]]) -> 'BM25':
+        """
+        Fit a new model on an updated corpus, reusing this model's term counts.
 
-            # Count unique tokens per document
-            unique_tokens = set(tokens)
-            for token in unique_tokens:
-                doc_freq_counter[token] += 1
+        Only new documents are tokenized; the result is identical to calling
+        ``fit`` on the full corpus.
 
-            # Store term frequencies for this document
-            token_freq = Counter(tokens)
-            self.doc_freqs.append(token_freq)
+        Args:
+            documents: For each document of the new corpus, either its index
+                in this model (unchanged) or its text (new)
+
+        Returns:
+            New BM25 model with the same parameters
+        """
+        model = BM25(k1=self.k1, b=self.b)
+        model._index([
+            self.doc_freqs[doc] if isinstance(doc, int) else self.term_counts(doc)
+            for doc in documents
+        ])
+        return model
+
+    def _index(self, doc_freqs: List[Counter]):
+        """Compute corpus statistics from per-document term frequencies."""
+        self.doc_freqs = doc_freqs
+        self.doc_count = len(doc_freqs)
+        self.doc_lengths = [sum(token_freq.values()) for token_freq in doc_freqs]
+
+        # Count documents containing each token
+        doc_freq_counter = Counter()
+        for token_freq in doc_freqs:
+            doc_freq_counter.update(token_freq.keys())
+        self.vocab = set(doc_freq_counter)
 
         # Calculate average document length
         self.avgdl = sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0
 
         # Calculate IDF for each term
-        for token, freq in doc_freq_counter.items():
-            self.idf[token] = self._calculate_idf(freq, self.doc_count)
-
-    def _calculate_idf(self, doc_freq: int, total_docs: int) -> float:
-        """Calculate inverse document frequency."""
-        return math.log((total_docs - doc_freq + 0.5) / (doc_freq + 0.5) + 1)
+        self.idf = {
+            token: self._calculate_idf(freq, self.doc_count)
+            for token, freq in doc_freq_counter.items()
+        }
 
-    def _tokenize(self, text: str) -> List[str]:
+    def tokenize(self, text: str) -> List[str]:
         """
-        Simple tokenization (can be enhanced with better NLP tools).
+        Terms of a text as the index sees them: lowercased words longer than
+        two characters, without stopwords.
         """
         # Convert to lowercase and split
         text = text.lower()
@@ -92,6 +119,14 @@ class BM25:
         tokens = [t for t in tokens if t not in stopwords and len(t) > 2]
         return tokens
 
+    def term_counts(self, text: str) -> Counter:
+        """Term frequencies of a document."""
+        return Counter(self.tokenize(text))
+
+    def _calculate_idf(self, doc_freq: int, total_docs: int) -> float:
+        """Calculate inverse document frequency."""
+        return math.log((total_docs - doc_freq + 0.5) / (doc_freq + 0.5) + 1)
+
     def score(self, query: str, doc_index: int) -> float:
         """
         Calculate BM25 score for a query against a document.
@@ -103,7 +138,7 @@ class BM25:
         Returns:
             BM25 score
         """
-        query_tokens = self._tokenize(query)
+        query_tokens = self.tokenize(query)
         doc_len = self.doc_lengths[doc_index]
         doc_freq = self.doc_freqs[doc_index]
 
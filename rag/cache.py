@@ -0,0 +1,190 @@
+"""
+In-memory caches for the retrieval and generation paths.
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class SearchCache:
+    """
+    Bounded LRU cache of search results with a TTL.
+
+    Entries belong to an index version (for example the index summary's
+    ``created_at``); switching to a different version drops every entry, so
+    results never outlive the index they were computed from.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600, version: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached searches
+            ttl: Seconds an entry stays valid
+            version: Version of the index the cached results come from
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = version
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        query: str,
+        top_k: int,
+        filter_tags: Optional[List[str]],
+        rerank: bool,
+        query_embedding: Optional[np.ndarray] = None,
+        **options: Any
+    ) -> Tuple:
+        """Build a cache key from search arguments, normalizing case, whitespace and tag order."""
+        normalized_query = ' '.join(query.lower().split())
+        tags = tuple(sorted(set(filter_tags))) if filter_tags else ()
+        embedding_digest = (
+            hashlib.blake2b(np.ascontiguousarray(query_embedding).tobytes(), digest_size=16).hexdigest()
+            if query_embedding is not None else None
+        )
+        return (normalized_query, top_k, tags, rerank, embedding_digest, tuple(sorted(options.items())))
+
+    def set_version(self, version: Optional[str]):
+        """Tag the cache with an index version, flushing it if the version changed."""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    def get(self, key: Tuple) -> Optional[List]:
+        """Return copies of cached results, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # Callers (e.g. reranking) mutate results, so never hand out the cached objects
+            return [replace(result) for result in entry[1]]
+
+    def put(self, key: Tuple, results: List):
+        """Store copies of results under key, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), [replace(result) for result in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit-rate counters."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'version': self.version
+        }
+
+
+class SemanticCache:
+    """
+    Cache of generated answers looked up by query meaning.
+
+    Entries are keyed by a unit-length query embedding plus an exact context
+    key (tags, generation parameters, ...). A lookup hits when an entry with
+    the same context key has cosine similarity at or above the threshold.
+    Evicts least recently used entries beyond ``max_size`` and entries older
+    than ``ttl`` seconds.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_size: int = 256, ttl: float = 3600):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_size: Maximum number of cached answers
+            ttl: Seconds an answer stays valid
+        """
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # id -> (created, context_key, embedding, value, cost_ms)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    def lookup(self, embedding: np.ndarray, context_key: Tuple) -> Optional[Any]:
+        """Return the cached value most similar to embedding, or None on a miss."""
+        query = embedding / np.linalg.norm(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            expired = [entry_id for entry_id, entry in self._entries.items() if now - entry[0] > self.ttl]
+            for entry_id in expired:
+                del self._entries[entry_id]
+
+            candidates = [
+                (entry_id, entry) for entry_id, entry in self._entries.items()
+                if entry[1] == context_key
+            ]
+            if candidates:
+                similarities = np.stack([entry[2] for _, entry in candidates]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id, entry = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    self.saved_ms += entry[4]
+                    return entry[3]
+
+            self.misses += 1
+            return None
+
+    def store(self, embedding: np.ndarray, context_key: Tuple, value: Any, cost_ms: float):
+        """
+        Cache a value.
+
+        Args:
+            embedding: Query embedding the value answers
+            context_key: Exact-match part of the key
+            value: Value to return on later hits
+            cost_ms: Time it took to produce value, credited as saved on each hit
+        """
+        unit = (embedding / np.linalg.norm(embedding)).astype(np.float32)
+
+        with self._lock:
+            self._entries[self._next_id] = (time.monotonic(), context_key, unit, value, cost_ms)
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size, hit-rate and latency-saved counters."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'saved_ms': self.saved_ms
+        }
@@ -0,0 +1,169 @@
+"""
+Compact chunk storage: per-post text plus chunk offsets.
+
+Neighbouring chunks overlap, so storing each chunk's text repeats much of
+every post. ``ChunkStore`` keeps each post's text once (its "arena") and a
+row of offsets and section fields per chunk; a chunk's content is sliced
+from the arena only when it is read.
+
+On disk (chunks.json) the store is one compact JSON object::
+
+    {"format": "chunk-offsets-v1",
+     "posts":  [{"slug", "title", "tags", "date", "text"}, ...],
+     "fields": ["chunk_id", "post", "start", "end", ...],
+     "chunks": [[<value per field>], ...]}
+
+Indexes written before this format are a JSON list of chunk dicts;
+``load_chunk_records`` accepts both.
+"""
+
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Union
+
+FORMAT = 'chunk-offsets-v1'
+
+# Row layout of a stored chunk
+FIELDS = ['chunk_id', 'post', 'start', 'end', 'section_heading', 'url_fragment', 'position', 'token_count']
+_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+# Chunk dict keys read from the chunk's post rather than its row
+POST_FIELDS = {'post_slug': 'slug', 'post_title': 'title', 'tags': 'tags', 'date': 'date'}
+
+
+class ChunkView(Mapping):
+    """Read-only chunk dict backed by a ChunkStore row; content is sliced on access."""
+
+    __slots__ = ('_post', '_row')
+
+    KEYS = ('chunk_id', 'content', 'post_slug', 'post_title', 'section_heading', 'tags',
+            'url_fragment', 'position', 'token_count', 'start_char', 'end_char', 'date')
+
+    def __init__(self, post: Dict[str, Any], row: List[Any]):
+        self._post = post
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'content':
+            return self._post['text'][self._row[_INDEX['start']]:self._row[_INDEX['end']]]
+        if key in POST_FIELDS:
+            return self._post[POST_FIELDS[key]]
+        if key == 'start_char':
+            return self._row[_INDEX['start']]
+        if key == 'end_char':
+            return self._row[_INDEX['end']]
+        if key in _INDEX and key not in ('post', 'start', 'end'):
+            return self._row[_INDEX[key]]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+
+class ChunkStore(Sequence):
+    """Chunks as offsets into per-post text, indexable like a list of chunk dicts."""
+
+    def __init__(self, posts: List[Dict[str, Any]], rows: List[List[Any]]):
+        """
+        Initialize the store.
+
+        Args:
+            posts: Post records with slug, title, tags, date and text
+            rows: One row per chunk, laid out as ``FIELDS``
+        """
+        self.posts = posts
+        self.rows = rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.rows)))]
+        row = self.rows[index]
+        return ChunkView(self.posts[row[_INDEX['post']]], row)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def from_chunks(cls, chunks: List[Dict[str, Any]], post_texts: Dict[str, str]) -> 'ChunkStore':
+        """
+        Build a store from chunk dicts and the text they were cut from.
+
+        Args:
+            chunks: Chunk dicts with start_char/end_char offsets into their post's text
+            post_texts: Text of each post the chunks were cut from, by slug
+
+        Returns:
+            ChunkStore with posts in first-seen order
+        """
+        posts: List[Dict[str, Any]] = []
+        post_index: Dict[str, int] = {}
+        rows = []
+
+        for chunk in chunks:
+            slug = chunk['post_slug']
+            if slug not in post_index:
+                post_index[slug] = len(posts)
+                posts.append(post_record(chunk, post_texts[slug]))
+            rows.append(chunk_row(chunk, post_index[slug], post_texts[slug]))
+
+        return cls(posts, rows)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'format': FORMAT, 'posts': self.posts, 'fields': FIELDS, 'chunks': self.rows}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ChunkStore':
+        if data.get('format') != FORMAT:
+            raise ValueError(f"Unsupported chunk format: {data.get('format')}")
+        if data['fields'] != FIELDS:
+            # Written with a different column order; rearrange to ours
+            order = [data['fields'].index(name) for name in FIELDS]
+            data['chunks'] = [[row[i] for i in order] for row in data['chunks']]
+        return cls(data['posts'], data['chunks'])
+
+
+def post_record(chunk: Dict[str, Any], text: str) -> Dict[str, Any]:
+    """Stored post record for the post a chunk was cut from."""
+    return {
+        'slug': chunk['post_slug'],
+        'title': chunk['post_title'],
+        'tags': chunk['tags'],
+        'date': chunk.get('date'),
+        'text': text
+    }
+
+
+def chunk_row(chunk: Dict[str, Any], post: int, text: str) -> List[Any]:
+    """
+    Stored row for a chunk dict.
+
+    Args:
+        chunk: Chunk dict with start_char/end_char offsets into text
+        post: Index of the chunk's post record
+        text: Text of the chunk's post
+
+    Raises:
+        ValueError: If the offsets don't select the chunk's content
+    """
+    start, end = chunk['start_char'], chunk['end_char']
+    if text[start:end] != chunk['content']:
+        raise ValueError(f"Chunk {chunk['chunk_id']} does not match its offsets in {chunk['post_slug']}")
+
+    return [
+        chunk['chunk_id'], post, start, end, chunk['section_heading'],
+        chunk['url_fragment'], chunk['position'], chunk['token_count']
+    ]
+
+
+def load_chunk_records(data: Union[List[Dict[str, Any]], Dict[str, Any]]) -> Sequence:
+    """
+    Chunks from parsed chunks.json, in either the offset format or the legacy list of dicts.
+
+    Returns:
+        Sequence of chunk mappings in row order
+    """
+    if isinstance(data, list):
+        return data
+    return ChunkStore.from_dict(data)
@@ -4,10 +4,13 @@ Chunks by semantic sections (H2/H3) while preserving boundaries.
 """
 
 import re
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from dataclasses import dataclass, field
 import hashlib
 
+from .tokens import TokenCounter
+
 
 @dataclass
 class Chunk:
@@ -21,14 +24,97 @@ class Chunk:
     url_fragment: str
     position: int
     token_count: int
+    start_char: int = 0  # Offsets of the content within the source document
+    end_char: int = 0
+
+
+@dataclass
+class ChunkDiff:
+    """Chunks added, removed and unchanged between two chunkings of the corpus."""
+    added: List[Dict[str, Any]] = field(default_factory=list)  # From the new chunking
+    removed: List[Dict[str, Any]] = field(default_factory=list)  # From the old chunking
+    unchanged: List[Dict[str, Any]] = field(default_factory=list)  # From the new chunking (metadata may differ)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+    def summary(self) -> str:
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.unchanged)} unchanged"
+
+
+def chunk_content_id(post_slug: str, section_heading: Optional[str], content: str, occurrence: int = 0) -> str:
+    """
+    Content-addressed chunk ID.
+
+    Depends only on the post, the section path and the chunk text, so editing
+    one section leaves the IDs of every other chunk unchanged.
+
+    Args:
+        post_slug: URL slug for the post
+        section_heading: Section path ("H2 > H3"), or None for the introduction
+        content: Chunk text
+        occurrence: How many identical chunks precede this one in the section
+    """
+    key = f"{post_slug}\x00{section_heading or ''}\x00{content}"
+    if occurrence:
+        key = f"{key}\x00{occurrence}"
+    return hashlib.md5(key.encode()).hexdigest()[:16]
+
+
+def diff_chunks(old_chunks: Iterable[Dict[str, Any]], new_chunks: Iterable[Dict[str, Any]]) -> ChunkDiff:
+    """
+    Classify chunks by ID between a previous index and a new chunking.
+
+    Args:
+        old_chunks: Chunk dicts of the previous index (as in chunks.json)
+        new_chunks: Chunk dicts from the current chunking
+
+    Returns:
+        ChunkDiff, each list in the order of its source
+    """
+    old_by_id = {chunk['chunk_id']: chunk for chunk in old_chunks}
+    diff = ChunkDiff()
+
+    new_ids = set()
+    for chunk in new_chunks:
+        new_ids.add(chunk['chunk_id'])
+        (diff.unchanged if chunk['chunk_id'] in old_by_id else diff.added).append(chunk)
+
+    diff.removed = [chunk for chunk_id, chunk in old_by_id.items() if chunk_id not in new_ids]
+    return diff
 
 
 class MarkdownChunker:
     """Chunks markdown documents by semantic sections."""
 
-    def __init__(self, max_tokens: int = 512, overlap_tokens: int = 50):
+    H2_PATTERN = re.compile(r'## (.+)$')
+    H3_PATTERN = re.compile(r'### (.+)$')
+    FENCE = '```'
+    # Whitespace after sentence-ending punctuation
+    SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
+    # Chunks whose summed sentence counts come this close to max_tokens are recounted whole
+    BOUNDARY_SLACK_TOKENS = 16
+
+    def __init__(
+        self,
+        max_tokens: int = 512,
+        overlap_tokens: int = 50,
+        token_counter: Optional[TokenCounter] = None
+    ):
+        """
+        Initialize the chunker.
+
+        Args:
+            max_tokens: Largest chunk, in tokens of the embedding model
+            overlap_tokens: Tokens of trailing sentences repeated at the start of continuation chunks
+            token_counter: Tokenizer-backed counter for the embedding model
+                (default: estimate of 4 characters per token)
+        """
         self.max_tokens = max_tokens
         self.overlap_tokens = overlap_tokens
+        self.token_counter = token_counter or TokenCounter()
 
     def chunk_document(self, content: str, metadata: Dict[str, Any], post_slug: str) -> List[Chunk]:
         """
@@ -42,170 +128,219 @@ class MarkdownChunker:
         Returns:
             List of Chunk objects
         """
-        chunks = []
-
-        # Split by H2 sections first
-        h2_pattern = r'^## (.+)$'
-        h2_sections = re.split(h2_pattern, content, flags=re.MULTILINE)
-
-        # Process introduction (content before first H2)
-        if h2_sections[0].strip():
-            intro_chunks = self._create_chunks_from_section(
-                content=h2_sections[0],
-                metadata=metadata,
-                post_slug=post_slug,
-                section_heading=None,
-                position=0
-            )
-            chunks.extend(intro_chunks)
-
-        # Process each H2 section
-        position = len(chunks)
-        for i in range(1, len(h2_sections), 2):
-            h2_heading = h2_sections[i]
-            h2_content = h2_sections[i + 1] if i + 1 < len(h2_sections) else ""
-
-            # Check for H3 subsections within H2
-            h3_pattern = r'^### (.+)$'
-            h3_sections = re.split(h3_pattern, h2_content, flags=re.MULTILINE)
-
-            # Process H2 intro content (before first H3)
-            if h3_sections[0].strip():
-                section_chunks = self._create_chunks_from_section(
-                    content=h3_sections[0],
-                    metadata=metadata,
-                    post_slug=post_slug,
-                    section_heading=h2_heading,
-                    position=position
-                )
-                chunks.extend(section_chunks)
-                position += len(section_chunks)
-
-            # Process each H3 subsection
-            for j in range(1, len(h3_sections), 2):
-                h3_heading = h3_sections[j]
-                h3_content = h3_sections[j + 1] if j + 1 < len(h3_sections) else ""
-
-                if h3_content.strip():
-                    subsection_chunks = self._create_chunks_from_section(
-                        content=h3_content,
-                        metadata=metadata,
-                        post_slug=post_slug,
-                        section_heading=f"{h2_heading} > {h3_heading}",
-                        position=position
-                    )
-                    chunks.extend(subsection_chunks)
-                    position += len(subsection_chunks)
-
-        return chunks
-
-    def _create_chunks_from_section(
-        self,
-        content: str,
-        metadata: Dict[str, Any],
-        post_slug: str,
-        section_heading: Optional[str],
-        position: int
-    ) -> List[Chunk]:
-        """
-        Create chunks from a section, respecting token limits.
+        return list(self.iter_chunks(content, metadata, post_slug))
+
+    def iter_chunks(self, content: str, metadata: Dict[str, Any], post_slug: str) -> Iterator[Chunk]:
         """
-        chunks = []
-
-        # Clean content
-        content = content.strip()
-        if not content:
-            return chunks
-
-        # Estimate tokens (rough approximation: 1 token ≈ 4 characters)
-        estimated_tokens = len(content) // 4
-
-        if estimated_tokens <= self.max_tokens:
-            # Section fits in one chunk
-            chunk = self._create_chunk(
-                content=content,
-                metadata=metadata,
-                post_slug=post_slug,
-                section_heading=section_heading,
-                position=position
-            )
-            chunks.append(chunk)
-        else:
-            # Split section into multiple chunks by sentences
-            sentences = self._split_into_sentences(content)
-            current_chunk = []
-            current_tokens = 0
+        Chunk a markdown document by sections, yielding chunks as they are found.
 
-            for sentence in sentences:
-                sentence_tokens = len(sentence) // 4
+        Each chunk's content is ``content[chunk.start_char:chunk.end_char]``.
 
-                if current_tokens + sentence_tokens <= self.max_tokens:
-                    current_chunk.append(sentence)
-                    current_tokens += sentence_tokens
-                else:
-                    # Save current chunk
-                    if current_chunk:
-                        chunk_content = " ".join(current_chunk)
-                        chunk = self._create_chunk(
-                            content=chunk_content,
-                            metadata=metadata,
-                            post_slug=post_slug,
-                            section_heading=section_heading,
-                            position=position + len(chunks)
-                        )
-                        chunks.append(chunk)
-
-                    # Start new chunk with overlap
-                    if self.overlap_tokens > 0 and current_chunk:
-                        # Include last few sentences as overlap
-                        overlap_sentences = []
-                        overlap_tokens = 0
-                        for sent in reversed(current_chunk):
-                            sent_tokens = len(sent) // 4
-                            if overlap_tokens + sent_tokens <= self.overlap_tokens:
-                                overlap_sentences.insert(0, sent)
-                                overlap_tokens += sent_tokens
-                            else:
-                                break
-                        current_chunk = overlap_sentences + [sentence]
-                        current_tokens = overlap_tokens + sentence_tokens
-                    else:
-                        current_chunk = [sentence]
-                        current_tokens = sentence_tokens
-
-            # Save final chunk
-            if current_chunk:
-                chunk_content = " ".join(current_chunk)
-                chunk = self._create_chunk(
+        Args:
+            content: Raw markdown content
+            metadata: Post metadata (title, tags, date, etc.)
+            post_slug: URL slug for the post
+
+        Yields:
+            Chunk objects in document order
+        """
+        position = 0
+        # Repeats of identical text within a section need distinct IDs
+        occurrences: Counter = Counter()
+        for heading, start, end, fences in self._scan_sections(content):
+            for chunk_start, chunk_end, token_count in self._split_section(content, start, end, fences):
+                chunk_content = content[chunk_start:chunk_end]
+                occurrence = occurrences[(heading, chunk_content)]
+                occurrences[(heading, chunk_content)] += 1
+                yield self._create_chunk(
                     content=chunk_content,
                     metadata=metadata,
                     post_slug=post_slug,
-                    section_heading=section_heading,
-                    position=position + len(chunks)
+                    section_heading=heading,
+                    position=position,
+                    start_char=chunk_start,
+                    end_char=chunk_end,
+                    token_count=token_count,
+                    occurrence=occurrence
                 )
-                chunks.append(chunk)
-
-        return chunks
+                position += 1
 
-    def _split_into_sentences(self, text: str) -> List[str]:
-        """Split text into sentences, preserving code blocks."""
-        # Simple sentence splitter (can be improved with nltk or spacy)
-        # Preserve code blocks
-        code_block_pattern = r'```[\s\S]*?```'
-        code_blocks = re.findall(code_block_pattern, text)
+    def _scan_sections(self, content: str) -> Iterator[Tuple[Optional[str], int, int, List[Tuple[int, int]]]]:
+        """
+        Split a document into sections in one pass over its lines.
 
-        # Replace code blocks with placeholders
-        for i, block in enumerate(code_blocks):
-            text = text.replace(block, f"__CODE_BLOCK_{i}__")
+        H2 headings start a section and H3 headings start a subsection within
+        the current H2 (an H3 before the first H2 stays part of the
+        introduction). Heading-like lines inside fenced code blocks are code.
 
-        # Split by sentence endings
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        Yields:
+            (section_heading, start, end, fences) with the section body as
+            character offsets and the fenced code blocks within it
+        """
+        h2_heading = None
+        heading = None
+        section_start = 0
+        fences: List[Tuple[int, int]] = []
+        fence_start = None
+
+        offset = 0
+        for line in content.splitlines(keepends=True):
+            line_start = offset
+            offset += len(line)
+
+            if line.lstrip().startswith(self.FENCE):
+                if fence_start is None:
+                    fence_start = line_start + line.index(self.FENCE)
+                else:
+                    fences.append((fence_start, line_start + line.index(self.FENCE) + len(self.FENCE)))
+                    fence_start = None
+                continue
+            if fence_start is not None or not line.startswith('##'):
+                continue
+
+            text = line.rstrip('\r\n')
+            match = self.H2_PATTERN.match(text)
+            if match:
+                yield heading, section_start, line_start, fences
+                h2_heading = heading = match.group(1)
+            elif h2_heading is not None:
+                match = self.H3_PATTERN.match(text)
+                if not match:
+                    continue
+                yield heading, section_start, line_start, fences
+                heading = f"{h2_heading} > {match.group(1)}"
+            else:
+                continue
+
+            section_start = offset
+            fences = []
+
+        if fence_start is not None:
+            # Unterminated fence runs to the end of the document
+            fences.append((fence_start, len(content)))
+        yield heading, section_start, len(content), fences
+
+    def _split_section(
+        self,
+        content: str,
+        start: int,
+        end: int,
+        fences: List[Tuple[int, int]]
+    ) -> Iterator[Tuple[int, int, int]]:
+        """
+        Split a section into chunk spans, respecting token limits.
 
-        # Restore code blocks
-        for i, block in enumerate(code_blocks):
-            sentences = [s.replace(f"__CODE_BLOCK_{i}__", block) for s in sentences]
+        Oversized sections are split at sentence boundaries (never inside a
+        fenced code block), and each continuation chunk repeats the last
+        sentences of its predecessor up to ``overlap_tokens``. Sentences are
+        counted once, in a batch; a chunk is recounted as a whole only when
+        the sum of its sentences lands near the limit.
 
-        return sentences
+        Yields:
+            (start, end, token_count) for each chunk
+        """
+        # Trim surrounding whitespace without copying the section
+        while start < end and content[start].isspace():
+            start += 1
+        while end > start and content[end - 1].isspace():
+            end -= 1
+        if start == end:
+            return
+
+        counter = self.token_counter
+        section_tokens = counter.count(content[start:end])
+        if section_tokens <= self.max_tokens:
+            yield start, end, section_tokens
+            return
+
+        sentences = list(self._sentence_spans(content, start, end, fences))
+        counts = counter.count_batch([content[s:e] for s, e in sentences])
+
+        current: List[Tuple[int, int, int]] = []
+        current_tokens = 0
+        for sentence in self._fit_sentences(content, sentences, counts):
+            sentence_tokens = sentence[2]
+
+            fits = current_tokens + sentence_tokens <= self.max_tokens
+            if fits and current and not counter.additive and \
+                    current_tokens + sentence_tokens > self.max_tokens - self.BOUNDARY_SLACK_TOKENS:
+                fits = counter.count(content[current[0][0]:sentence[1]]) <= self.max_tokens
+
+            if fits:
+                current.append(sentence)
+                current_tokens += sentence_tokens
+                continue
+
+            if current:
+                yield current[0][0], current[-1][1], current_tokens
+
+            # Start the next chunk with the last few sentences as overlap, leaving room for this one
+            overlap_budget = min(self.overlap_tokens, self.max_tokens - sentence_tokens)
+            overlap = 0
+            overlap_tokens = 0
+            if overlap_budget > 0:
+                for _, _, sent_tokens in reversed(current):
+                    if overlap_tokens + sent_tokens > overlap_budget:
+                        break
+                    overlap += 1
+                    overlap_tokens += sent_tokens
+            current = (current[len(current) - overlap:] if overlap else []) + [sentence]
+            current_tokens = overlap_tokens + sentence_tokens
+
+        if current:
+            yield current[0][0], current[-1][1], current_tokens
+
+    def _fit_sentences(
+        self,
+        content: str,
+        sentences: List[Tuple[int, int]],
+        counts: List[int]
+    ) -> Iterator[Tuple[int, int, int]]:
+        """Attach token counts to sentences, cutting any sentence longer than max_tokens into pieces."""
+        counter = self.token_counter
+        for (start, end), tokens in zip(sentences, counts):
+            while tokens > self.max_tokens:
+                text = content[start:end]
+                cut = counter.prefix_length(text, self.max_tokens)
+                # Prefer to cut at a line break, then at a space
+                for separator in ('\n', ' '):
+                    boundary = text.rfind(separator, 0, cut)
+                    if boundary > cut // 2:
+                        cut = boundary
+                        break
+
+                piece_end = start + cut
+                while piece_end > start and content[piece_end - 1].isspace():
+                    piece_end -= 1
+                yield start, piece_end, counter.count(content[start:piece_end])
+
+                start += cut
+                while start < end and content[start].isspace():
+                    start += 1
+                tokens = counter.count(content[start:end])
+            yield start, end, tokens
+
+    def _sentence_spans(
+        self,
+        content: str,
+        start: int,
+        end: int,
+        fences: List[Tuple[int, int]]
+    ) -> Iterator[Tuple[int, int]]:
+        """Sentence spans within [start, end), treating each code block as unsplittable."""
+        fence_iter = iter(fences)
+        fence = next(fence_iter, None)
+
+        sentence_start = start
+        for match in self.SENTENCE_BREAK.finditer(content, start, end):
+            while fence is not None and fence[1] <= match.start():
+                fence = next(fence_iter, None)
+            if fence is not None and fence[0] <= match.start():
+                continue
+            yield sentence_start, match.start()
+            sentence_start = match.end()
+
+        yield sentence_start, end
 
     def _create_chunk(
         self,
@@ -213,11 +348,14 @@ class MarkdownChunker:
         metadata: Dict[str, Any],
         post_slug: str,
         section_heading: Optional[str],
-        position: int
+        position: int,
+        start_char: int = 0,
+        end_char: int = 0,
+        token_count: Optional[int] = None,
+        occurrence: int = 0
     ) -> Chunk:
         """Create a Chunk object with metadata."""
-        # Generate chunk ID
-        chunk_id = hashlib.md5(f"{post_slug}_{position}_{content[:50]}".encode()).hexdigest()[:16]
+        chunk_id = chunk_content_id(post_slug, section_heading, content, occurrence)
 
         # Create URL fragment
         if section_heading:
@@ -237,5 +375,7 @@ class MarkdownChunker:
             tags=metadata.get('tags', []),
             url_fragment=url_fragment,
             position=position,
-            token_count=len(content) // 4  # Rough estimate
+            token_count=token_count if token_count is not None else self.token_counter.count(content),
+            start_char=start_char,
+            end_char=end_char
         )
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Packing retrieved chunks into a token-budgeted generation context.
+
+Retrieved chunks are grouped into blocks of consecutive chunks from the same
+post section and merged, dropping the overlap ``MarkdownChunker`` repeats at
+the start of each continuation chunk. Blocks are then added in relevance
+order until the token budget is spent.
+
+Tokens are counted with a ``TokenCounter``; pass the one the index's chunks
+were sized with so the budget is in the same unit as ``token_count``.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .search import SearchResult
+from .tokens import TokenCounter
+
+
+@dataclass
+class ContextBlock:
+    """Consecutive chunks from one section, merged into a single passage."""
+    results: List[SearchResult]  # Merged chunks, in document order
+    content: str
+    token_count: int
+    rank: int  # Best (lowest) rank of any merged chunk in the retrieval order
+
+    @property
+    def first(self) -> SearchResult:
+        return self.results[0]
+
+
+@dataclass
+class PackedContext:
+    """Blocks selected for a generation prompt, with accounting."""
+    blocks: List[ContextBlock] = field(default_factory=list)
+    tokens_used: int = 0
+    tokens_saved: int = 0  # Versus sending every retrieved chunk in full
+    overlap_tokens_removed: int = 0
+    chunks_dropped: int = 0  # Chunks left out to stay within the budget
+
+    @property
+    def num_chunks(self) -> int:
+        return sum(len(block.results) for block in self.blocks)
+
+
+class ContextPacker:
+    """Fits retrieved chunks into a token budget."""
+
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        block_overhead_tokens: int = 20,
+        token_counter: Optional[TokenCounter] = None,
+        min_overlap_chars: int = 32
+    ):
+        """
+        Initialize the packer.
+
+        Args:
+            max_tokens: Token budget for all blocks, including overhead
+            block_overhead_tokens: Tokens charged per block for its header in the prompt
+            token_counter: Counter for the budget (defaults to the
+                4-characters-per-token estimate)
+            min_overlap_chars: Shortest repeated text treated as chunk overlap
+        """
+        self.max_tokens = max_tokens
+        self.block_overhead_tokens = block_overhead_tokens
+        self.token_counter = token_counter or TokenCounter()
+        self.min_overlap_chars = min_overlap_chars
+
+    def pack(self, results: List[SearchResult]) -> PackedContext:
+        """
+        Merge and select results for the prompt.
+
+        Args:
+            results: Retrieved chunks, most relevant first
+
+        Returns:
+            PackedContext with blocks in relevance order
+        """
+        packed = PackedContext()
+        unique = list({result.chunk_id: result for result in reversed(results)}.values())[::-1]
+        chunk_tokens = dict(zip(
+            (result.chunk_id for result in unique),
+            self.token_counter.count_batch([result.content for result in unique])
+        ))
+        full_tokens = sum(chunk_tokens.values()) + self.block_overhead_tokens * len(unique)
+
+        blocks = self._merge_adjacent(unique)
+        packed.overlap_tokens_removed = sum(
+            sum(chunk_tokens[result.chunk_id] for result in block.results) - block.token_count
+            for block in blocks
+        )
+
+        for block in sorted(blocks, key=lambda b: b.rank):
+            cost = block.token_count + self.block_overhead_tokens
+            if packed.tokens_used + cost > self.max_tokens:
+                # A smaller, less relevant block may still fit
+                packed.chunks_dropped += len(block.results)
+                continue
+            packed.blocks.append(block)
+            packed.tokens_used += cost
+
+        packed.tokens_saved = full_tokens - packed.tokens_used
+        return packed
+
+    def _merge_adjacent(self, results: List[SearchResult]) -> List[ContextBlock]:
+        """Group consecutive chunks of the same section into blocks."""
+        rank = {result.chunk_id: i for i, result in enumerate(results)}
+        sections: Dict[Tuple[str, Optional[str]], List[SearchResult]] = {}
+        for result in results:
+            sections.setdefault((result.post_slug, result.section_heading), []).append(result)
+
+        blocks = []
+        for members in sections.values():
+            members.sort(key=lambda r: r.position)
+
+            run = [members[0]]
+            for result in members[1:]:
+                if result.position == run[-1].position + 1:
+                    run.append(result)
+                else:
+                    blocks.append(self._build_block(run, rank))
+                    run = [result]
+            blocks.append(self._build_block(run, rank))
+
+        return blocks
+
+    def _build_block(self, run: List[SearchResult], rank: Dict[str, int]) -> ContextBlock:
+        """Concatenate a run of chunks, skipping each one's overlap with its predecessor."""
+        content = run[0].content
+        for result in run[1:]:
+            overlap = self._overlap_length(content, result.content)
+            content = content + result.content[overlap:] if overlap else f"{content}\n\n{result.content}"
+
+        return ContextBlock(
+            results=run,
+            content=content,
+            token_count=self.token_counter.count(content),
+            rank=min(rank[result.chunk_id] for result in run)
+        )
+
+    def _overlap_length(self, previous: str, current: str) -> int:
+        """Length of the longest suffix of previous that current starts with."""
+        probe = current[:self.min_overlap_chars]
+        if len(probe) < self.min_overlap_chars:
+            return 0
+
+        # Earliest match in previous is the longest overlap
+        start = previous.find(probe)
+        while start != -1:
+            if current.startswith(previous[start:]):
+                return len(previous) - start
+            start = previous.find(probe, start + 1)
+        return 0
@@ -0,0 +1,60 @@
+"""
+Maximal Marginal Relevance (MMR) selection over retrieved chunks.
+
+Neighbouring chunks of one post overlap heavily (the chunker adds overlap
+between them), so the top results for a query often repeat the same text.
+MMR picks results one at a time, trading relevance against similarity to
+what has already been picked:
+
+    argmax_d  lambda * relevance(d) - (1 - lambda) * max_{s in selected} sim(d, s)
+
+With unit-length candidate vectors the pairwise similarities are a single
+matrix product, and each step only updates a running max, so selecting k of
+n candidates costs O(n^2 d + k n).
+"""
+
+import numpy as np
+
+
+def mmr_select(
+    candidate_embeddings: np.ndarray,
+    relevance: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.7
+) -> np.ndarray:
+    """
+    Select a relevant but diverse subset of candidates.
+
+    Args:
+        candidate_embeddings: Unit-length vectors, one row per candidate
+        relevance: Relevance per candidate, scaled to 0-1
+        k: Number of candidates to select
+        lambda_mult: 1 ranks by relevance only, 0 by diversity only
+
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    num_candidates = len(relevance)
+    k = min(k, num_candidates)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    similarity = candidate_embeddings @ candidate_embeddings.T
+
+    selected = np.empty(k, dtype=np.int64)
+    available = np.ones(num_candidates, dtype=bool)
+    # Similarity of each candidate to its closest selected candidate
+    redundancy = np.full(num_candidates, -np.inf)
+
+    selected[0] = int(np.argmax(relevance))
+    for step in range(k):
+        if step > 0:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+            scores[~available] = -np.inf
+            selected[step] = int(np.argmax(scores))
+
+        pick = selected[step]
+        available[pick] = False
+        np.maximum(redundancy, similarity[pick], out=redundancy)
+
+    return selected
@@ -0,0 +1,221 @@
+"""
+Embedding sidecar server shared by all API workers on a host.
+
+Loads one embedding model and serves it over a Unix socket. Concurrent
+requests arriving within a short window are encoded as a single batch and the
+vectors fanned back to each caller, so N workers share one model in memory
+and concurrent queries amortize a single forward pass.
+
+Protocol: newline-delimited JSON. A request is either ``{"op": "info"}`` or
+``{"texts": [...]}``; embeddings come back as base64-encoded float32 with
+their shape.
+
+Usage:
+    python -m rag.embedding_server --socket /tmp/docerate-embeddings.sock \\
+        --provider local --model all-MiniLM-L6-v2
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from rag.embeddings import EmbeddingConfig, EmbeddingService
+
+DEFAULT_SOCKET_PATH = '/tmp/docerate-embeddings.sock'
+
+# Requests may carry whole indexing batches, well beyond asyncio's 64KB default
+STREAM_LIMIT = 64 * 1024 * 1024
+
+
+def encode_array(array: np.ndarray) -> Dict:
+    """Serialize a float32 array for the wire."""
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    return {
+        'shape': list(array.shape),
+        'data': base64.b64encode(array.tobytes()).decode('ascii')
+    }
+
+
+def decode_array(payload: Dict) -> np.ndarray:
+    """Deserialize an array produced by ``encode_array``."""
+    data = base64.b64decode(payload['data'])
+    return np.frombuffer(data, dtype=np.float32).reshape(payload['shape'])
+
+
+class EmbeddingServer:
+    """Micro-batching front end for a single EmbeddingService."""
+
+    def __init__(
+        self,
+        service: EmbeddingService,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 64
+    ):
+        """
+        Initialize the server.
+
+        Args:
+            service: Embedding service that owns the model
+            socket_path: Filesystem path of the Unix socket to listen on
+            batch_window_ms: How long to wait for more requests after the first
+            max_batch_size: Maximum number of texts encoded in one batch
+        """
+        self.service = service
+        self.socket_path = socket_path
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.queue: asyncio.Queue = None
+        self.stats = {'requests': 0, 'texts': 0, 'batches': 0}
+
+    async def serve_forever(self):
+        """Start listening and batching until cancelled."""
+        self.queue = asyncio.Queue()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        server = await asyncio.start_unix_server(
+            self._handle_connection, path=self.socket_path, limit=STREAM_LIMIT
+        )
+        batcher = asyncio.create_task(self._batch_loop())
+
+        print(f"Embedding server listening on {self.socket_path}")
+        print(f"  Model: {self.service.config.model_name} ({self.service.config.dimension}d)")
+        print(f"  Batch window: {self.batch_window * 1000:.1f}ms, max batch: {self.max_batch_size}")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one client connection until it closes."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                    if request.get('op') == 'info':
+                        response = {
+                            'model': self.service.config.model_name,
+                            'dimension': self.service.config.dimension,
+                            'stats': self.stats
+                        }
+                    else:
+                        embeddings = await self.embed(request['texts'])
+                        response = encode_array(embeddings)
+                except Exception as error:
+                    response = {'error': str(error)}
+
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Queue texts for the next batch and wait for their vectors."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def _batch_loop(self):
+        """Collect queued requests over the batch window and encode them together."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            pending: List[Tuple[List[str], asyncio.Future]] = [await self.queue.get()]
+            num_texts = len(pending[0][0])
+            deadline = time.monotonic() + self.batch_window
+
+            while num_texts < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                num_texts += len(item[0])
+
+            texts = [text for request_texts, _ in pending for text in request_texts]
+
+            try:
+                # The model call is blocking; keep the loop free to accept requests
+                embeddings = await loop.run_in_executor(None, self.service.embed_texts, texts)
+            except Exception as error:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            self.stats['requests'] += len(pending)
+            self.stats['texts'] += len(texts)
+            self.stats['batches'] += 1
+
+            offset = 0
+            for request_texts, future in pending:
+                if not future.done():
+                    future.set_result(embeddings[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+
+def main():
+    """Main entry point for the embedding server."""
+    parser = argparse.ArgumentParser(description='Serve embeddings to local API workers')
+    parser.add_argument('--socket', default=os.getenv('EMBEDDING_SERVER_SOCKET', DEFAULT_SOCKET_PATH),
+                        help='Unix socket path')
+    parser.add_argument('--provider', default=os.getenv('EMBEDDING_SERVER_PROVIDER', 'local'),
+                        help='Provider that loads the model (local, onnx, onnx-int8, bedrock)')
+    parser.add_argument('--model', default=os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2'),
+                        help='Embedding model name')
+    parser.add_argument('--window-ms', type=float, default=5.0, help='Batching window in milliseconds')
+    parser.add_argument('--max-batch', type=int, default=64, help='Maximum texts per batch')
+
+    args = parser.parse_args()
+
+    if args.provider == 'server':
+        parser.error("The server cannot use the 'server' provider itself")
+
+    service = EmbeddingService(EmbeddingConfig(
+        provider=args.provider,
+        model_name=args.model,
+        dimension=384,  # Updated from the model on load
+        batch_size=args.max_batch
+    ))
+
+    server = EmbeddingServer(
+        service,
+        socket_path=args.socket,
+        batch_window_ms=args.window_ms,
+        max_batch_size=args.max_batch
+    )
+
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Embedding server stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,20 @@
 """
-Embedding generation module with support for both local and AWS Bedrock models.
+Embedding generation module with support for local (PyTorch or ONNX Runtime),
+Ollama and AWS Bedrock models, or a shared embedding server (see
+rag.embedding_server).
 """
 
 import os
 import json
+import socket
+import threading
 import numpy as np
-from typing import List, Dict, Optional, Union
-from dataclasses import dataclass
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Union
+from dataclasses import dataclass, replace
 import hashlib
 
 try:
@@ -15,13 +23,38 @@ except ImportError:  # pragma: no cover - allows local runs without boto3
     ClientError = None
 
 
+# Providers that run a sentence-transformer model on the local CPU and produce
+# vectors compatible with each other for the same model name.
+LOCAL_PROVIDERS = ('local', 'onnx', 'onnx-int8')
+
+
 @dataclass
 class EmbeddingConfig:
     """Configuration for embedding models."""
-    provider: str  # 'local' or 'bedrock'
+    provider: str  # 'local', 'onnx', 'onnx-int8', 'ollama', 'bedrock' or 'server'
     model_name: str
     dimension: int
     batch_size: int = 32
+    endpoint: Optional[str] = None  # Ollama base URL, or socket path for the 'server' provider
+    num_workers: int = 1  # Encoding processes for local providers during bulk embedding
+    num_threads: Optional[int] = None  # Intra-op threads per model (None = library default)
+    onnx_file: str = 'onnx/model.onnx'  # Path of the ONNX export inside the model repo
+    max_seq_length: int = 256  # Matches the sentence-transformers default for MiniLM
+
+
+# Model owned by each encoding worker process, loaded once by the pool initializer
+_worker_service = None
+
+
+def _init_encoding_worker(config: EmbeddingConfig):
+    """Load the embedding model inside a pool worker."""
+    global _worker_service
+    _worker_service = EmbeddingService(config)
+
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    """Encode a batch of texts with the worker's model."""
+    return _worker_service.embed_texts(texts)
 
 
 class EmbeddingService:
@@ -30,14 +63,21 @@ class EmbeddingService:
     def __init__(self, config: EmbeddingConfig):
         self.config = config
         self.model = None
+        self._pool = None
         self._initialize_model()
 
     def _initialize_model(self):
         """Initialize the embedding model based on provider."""
         if self.config.provider == 'local':
             self._init_local_model()
+        elif self.config.provider in ('onnx', 'onnx-int8'):
+            self._init_onnx_model(quantize=self.config.provider == 'onnx-int8')
+        elif self.config.provider == 'ollama':
+            self._init_ollama_client()
         elif self.config.provider == 'bedrock':
             self._init_bedrock_client()
+        elif self.config.provider == 'server':
+            self._init_server_client()
         else:
             raise ValueError(f"Unknown provider: {self.config.provider}")
 
@@ -45,12 +85,103 @@ class EmbeddingService:
         """Initialize local sentence-transformer model."""
         try:
             from sentence_transformers import SentenceTransformer
+            if self.config.num_threads:
+                import torch
+                torch.set_num_threads(self.config.num_threads)
             self.model = SentenceTransformer(self.config.model_name)
             # Update dimension based on actual model
             self.config.dimension = self.model.get_sentence_embedding_dimension()
         except ImportError:
             raise ImportError("Please install sentence-transformers: pip install sentence-transformers")
 
+    def _init_onnx_model(self, quantize: bool = False):
+        """
+        Initialize an ONNX Runtime session for a sentence-transformer model.
+
+        Avoids importing PyTorch entirely. With ``quantize`` the exported graph is
+        dynamically quantized to int8 once and the result cached next to it.
+        """
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise ImportError("Please install onnxruntime and tokenizers: pip install onnxruntime tokenizers")
+
+        model_dir = self._resolve_model_dir()
+        model_path = model_dir / self.config.onnx_file
+        if not model_path.exists():
+            raise FileNotFoundError(f"ONNX export not found: {model_path}")
+
+        if quantize:
+            model_path = self._quantize_onnx_model(model_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.config.num_threads:
+            options.intra_op_num_threads = self.config.num_threads
+        self.model = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+        self._onnx_inputs = {i.name for i in self.model.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.config.max_seq_length)
+        pad_id = self.tokenizer.token_to_id('[PAD]') or 0
+        self.tokenizer.enable_padding(pad_id=pad_id, pad_token='[PAD]')
+
+        # Mirror the pooling/normalization modules of the sentence-transformer
+        # pipeline so vectors match the PyTorch 'local' provider.
+        self._cls_pooling = False
+        pooling_config = model_dir / '1_Pooling' / 'config.json'
+        if pooling_config.exists():
+            with open(pooling_config, 'r') as f:
+                self._cls_pooling = json.load(f).get('pooling_mode_cls_token', False)
+
+        self._normalize = False
+        modules_config = model_dir / 'modules.json'
+        if modules_config.exists():
+            with open(modules_config, 'r') as f:
+                self._normalize = any(m.get('type', '').endswith('Normalize') for m in json.load(f))
+
+        with open(model_dir / 'config.json', 'r') as f:
+            self.config.dimension = json.load(f)['hidden_size']
+
+    def _resolve_model_dir(self) -> Path:
+        """Return a local directory for the model, downloading it from the Hub if needed."""
+        if os.path.isdir(self.config.model_name):
+            return Path(self.config.model_name)
+
+        try:
+            from huggingface_hub import snapshot_download
+        except ImportError:
+            raise ImportError("Please install huggingface_hub: pip install huggingface_hub")
+
+        # Same short-name convention as SentenceTransformer
+        repo_id = self.config.model_name
+        if '/' not in repo_id:
+            repo_id = f"sentence-transformers/{repo_id}"
+
+        return Path(snapshot_download(
+            repo_id,
+            allow_patterns=[
+                self.config.onnx_file,
+                'tokenizer.json',
+                'config.json',
+                'modules.json',
+                '1_Pooling/config.json'
+            ]
+        ))
+
+    def _quantize_onnx_model(self, model_path: Path) -> Path:
+        """Dynamically quantize an ONNX model to int8, reusing a cached copy if present."""
+        quantized_path = model_path.with_name(f"{model_path.stem}_dynamic_int8.onnx")
+        if not quantized_path.exists():
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+        return quantized_path
+
     def _init_bedrock_client(self):
         """Initialize AWS Bedrock client."""
         try:
@@ -62,6 +193,71 @@ class EmbeddingService:
         except ImportError:
             raise ImportError("Please install boto3: pip install boto3")
 
+    def _init_ollama_client(self):
+        """Initialize a pooled HTTP client for an Ollama server."""
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("Please install httpx: pip install httpx")
+
+        self.config.endpoint = self.config.endpoint or os.getenv('OLLAMA_HOST', 'http://localhost:11434')
+        # A single client keeps connections alive across calls and threads
+        self.http_client = httpx.Client(
+            base_url=self.config.endpoint,
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=8)
+        )
+
+        # Ollama doesn't report embedding size up front; probe the model once
+        self.config.dimension = self._embed_ollama(['dimension probe']).shape[1]
+
+    def _init_server_client(self):
+        """Connect to a shared embedding server instead of loading a model."""
+        from rag.embedding_server import DEFAULT_SOCKET_PATH
+
+        self.config.endpoint = self.config.endpoint or os.getenv('EMBEDDING_SERVER_SOCKET', DEFAULT_SOCKET_PATH)
+        # One connection per thread so concurrent callers reach the server
+        # together and can be batched there
+        self._server_local = threading.local()
+
+        info = self._server_request({'op': 'info'})
+        if info['model'] != self.config.model_name:
+            print(f"Warning: embedding server model {info['model']} differs from configured {self.config.model_name}")
+        self.config.dimension = info['dimension']
+
+    def _server_request(self, request: Dict) -> Dict:
+        """Send one request to the embedding server and return its response."""
+        conn = getattr(self._server_local, 'conn', None)
+        if conn is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(30.0)
+            try:
+                sock.connect(self.config.endpoint)
+            except OSError as error:
+                sock.close()
+                raise ConnectionError(
+                    f"Embedding server not reachable at {self.config.endpoint}: {error}"
+                ) from error
+            conn = (sock, sock.makefile('rb'))
+            self._server_local.conn = conn
+
+        sock, reader = conn
+        try:
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            line = reader.readline()
+            if not line:
+                raise ConnectionError("Embedding server closed the connection")
+        except (OSError, ConnectionError):
+            # Drop the broken connection so the next call reconnects
+            sock.close()
+            self._server_local.conn = None
+            raise
+
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(f"Embedding server error: {response['error']}")
+        return response
+
     def embed_texts(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for a list of texts.
@@ -75,21 +271,120 @@ class EmbeddingService:
         if not texts:
             return np.array([])
 
+        if (self.config.provider in LOCAL_PROVIDERS and self.config.num_workers > 1
+                and len(texts) > self.config.batch_size):
+            return self._embed_parallel(texts)
+
         if self.config.provider == 'local':
             return self._embed_local(texts)
+        elif self.config.provider in ('onnx', 'onnx-int8'):
+            return self._embed_onnx(texts)
+        elif self.config.provider == 'ollama':
+            return self._embed_ollama(texts)
         elif self.config.provider == 'bedrock':
             return self._embed_bedrock(texts)
+        elif self.config.provider == 'server':
+            return self._embed_server(texts)
+
+    def _embed_parallel(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts across a pool of processes, each holding its own model.
+
+        Batches are dispatched with ``executor.map`` so results come back in
+        input order. The pool is created on first use and kept until ``close``.
+        """
+        if self._pool is None:
+            # Split the cores between workers so they don't oversubscribe each other
+            threads = max(1, (os.cpu_count() or 1) // self.config.num_workers)
+            worker_config = replace(self.config, num_workers=1, num_threads=threads)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.config.num_workers,
+                # Fork is unsafe once torch/onnxruntime thread pools exist
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_encoding_worker,
+                initargs=(worker_config,)
+            )
+
+        batches = [
+            texts[i:i + self.config.batch_size]
+            for i in range(0, len(texts), self.config.batch_size)
+        ]
+        return np.vstack(list(self._pool.map(_encode_in_worker, batches)))
+
+    def close(self):
+        """Shut down the encoding pool and HTTP connections, if any were opened."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if getattr(self, 'http_client', None) is not None:
+            self.http_client.close()
+            self.http_client = None
 
     def _embed_local(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings using local model."""
         embeddings = self.model.encode(
             texts,
             batch_size=self.config.batch_size,
-            show_progress_bar=True,
+            show_progress_bar=len(texts) > self.config.batch_size,
             convert_to_numpy=True
         )
         return embeddings
 
+    def _embed_onnx(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings using the ONNX Runtime session."""
+        all_embeddings = []
+
+        for i in range(0, len(texts), self.config.batch_size):
+            encodings = self.tokenizer.encode_batch(texts[i:i + self.config.batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+            inputs = {'input_ids': input_ids, 'attention_mask': attention_mask}
+            if 'token_type_ids' in self._onnx_inputs:
+                inputs['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+            token_embeddings = self.model.run(None, inputs)[0]
+
+            if self._cls_pooling:
+                pooled = token_embeddings[:, 0]
+            else:
+                # Mean pooling over non-padding tokens
+                mask = attention_mask[:, :, None].astype(np.float32)
+                pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+            if self._normalize:
+                pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+            all_embeddings.append(pooled.astype(np.float32))
+
+        return np.vstack(all_embeddings)
+
+    def _embed_ollama(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings using Ollama's batch embedding endpoint."""
+        all_embeddings = []
+
+        for i in range(0, len(texts), self.config.batch_size):
+            batch = texts[i:i + self.config.batch_size]
+            try:
+                response = self.http_client.post(
+                    '/api/embed',
+                    json={'model': self.config.model_name, 'input': batch}
+                )
+                response.raise_for_status()
+            except Exception as error:  # pragma: no cover - network call
+                raise RuntimeError(
+                    f"Ollama embedding failed for '{self.config.model_name}': {error}"
+                ) from error
+
+            all_embeddings.extend(response.json()['embeddings'])
+
+        return np.array(all_embeddings, dtype=np.float32)
+
+    def _embed_server(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings through the shared embedding server."""
+        from rag.embedding_server import decode_array
+        return decode_array(self._server_request({'texts': texts}))
+
     def _embed_bedrock(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings using AWS Bedrock."""
         all_embeddings = []
@@ -161,11 +456,19 @@ class EmbeddingService:
 class EmbeddingStore:
     """Store and retrieve embeddings efficiently."""
 
+    # Number of tag combinations whose query vectors are kept in memory
+    TAG_SET_CACHE_SIZE = 256
+
     def __init__(self, dimension: int):
         self.dimension = dimension
         self.embeddings = None
         self.metadata = []
         self.chunk_ids = []
+        self.tag_names: List[str] = []
+        self.tag_embeddings: Optional[np.ndarray] = None
+        self._tag_set_cache: OrderedDict = OrderedDict()
+        self.post_slugs: List[str] = []
+        self.post_embeddings: Optional[np.ndarray] = None
 
     def add_embeddings(self, embeddings: np.ndarray, chunk_ids: List[str], metadata: List[Dict]):
         """Add embeddings with associated metadata."""
@@ -177,73 +480,283 @@ class EmbeddingStore:
         self.chunk_ids.extend(chunk_ids)
         self.metadata.extend(metadata)
 
-    def search(self, query_embedding: np.ndarray, top_k: int = 10,
-               filter_tags: Optional[List[str]] = None) -> List[Dict]:
+    def compute_tag_centroids(self):
         """
-        Search for similar embeddings.
+        Compute one unit-length centroid vector per tag.
+
+        Each centroid is the mean of the normalized embeddings of all chunks
+        carrying the tag, so it stands in for a query about that tag.
+        """
+        self._tag_set_cache.clear()
+        if self.embeddings is None or len(self.embeddings) == 0:
+            self.tag_names = []
+            self.tag_embeddings = None
+            return
+
+        rows_by_tag: Dict[str, List[int]] = {}
+        for i, meta in enumerate(self.metadata):
+            for tag in meta.get('tags', []):
+                rows_by_tag.setdefault(tag, []).append(i)
+
+        self.tag_names = sorted(rows_by_tag)
+        self.tag_embeddings = self._centroids([rows_by_tag[tag] for tag in self.tag_names])
+
+    def compute_post_centroids(self):
+        """
+        Compute one unit-length centroid vector per post.
+
+        A post centroid summarizes all of the post's chunks, so posts can be
+        ranked against a query (or each other) before any chunk is scored.
+        """
+        if self.embeddings is None or len(self.embeddings) == 0:
+            self.post_slugs = []
+            self.post_embeddings = None
+            return
+
+        rows_by_post: Dict[str, List[int]] = {}
+        for i, meta in enumerate(self.metadata):
+            rows_by_post.setdefault(meta.get('post_slug', ''), []).append(i)
+
+        self.post_slugs = list(rows_by_post)
+        self.post_embeddings = self._centroids(list(rows_by_post.values()))
+
+    def _centroids(self, row_groups: List[List[int]]) -> np.ndarray:
+        """Unit-length mean of the normalized embeddings in each group of rows."""
+        normalized = self._normalized_embeddings()
+        centroids = np.array(
+            [normalized[rows].mean(axis=0) for rows in row_groups],
+            dtype=np.float32
+        ).reshape(len(row_groups), -1)
+        return centroids / np.linalg.norm(centroids, axis=1, keepdims=True)
+
+    def _post_index(self) -> Tuple[List[np.ndarray], List[frozenset]]:
+        """Chunk rows and tags of each post in ``post_slugs``, rebuilt when the posts change."""
+        if getattr(self, '_post_index_source', None) is not self.post_embeddings:
+            rows_by_post: Dict[str, List[int]] = {}
+            tags_by_post: Dict[str, set] = {}
+            for i, meta in enumerate(self.metadata):
+                slug = meta.get('post_slug', '')
+                rows_by_post.setdefault(slug, []).append(i)
+                tags_by_post.setdefault(slug, set()).update(meta.get('tags', []))
+
+            self._post_rows = [np.array(rows_by_post.get(slug, []), dtype=np.int64) for slug in self.post_slugs]
+            self._post_tags = [frozenset(tags_by_post.get(slug, ())) for slug in self.post_slugs]
+            self._post_index_source = self.post_embeddings
+        return self._post_rows, self._post_tags
+
+    def tag_set_embedding(self, tags: List[str]) -> Optional[np.ndarray]:
+        """
+        Get a query vector for a combination of tags.
+
+        Combinations are built from the per-tag centroids on first use and
+        cached. Returns None when none of the tags are known.
+        """
+        if self.tag_embeddings is None:
+            return None
+
+        key = tuple(sorted(set(tags)))
+        if key in self._tag_set_cache:
+            self._tag_set_cache.move_to_end(key)
+            return self._tag_set_cache[key]
+
+        tag_rows = {tag: i for i, tag in enumerate(self.tag_names)}
+        rows = [tag_rows[tag] for tag in key if tag in tag_rows]
+        if not rows:
+            return None
+
+        embedding = self.tag_embeddings[rows].mean(axis=0)
+        embedding = embedding / np.linalg.norm(embedding)
+
+        self._tag_set_cache[key] = embedding
+        if len(self._tag_set_cache) > self.TAG_SET_CACHE_SIZE:
+            self._tag_set_cache.popitem(last=False)
+        return embedding
+
+    def _normalized_embeddings(self) -> np.ndarray:
+        """Unit-length copy of the embeddings, recomputed only when they are replaced."""
+        if getattr(self, '_normalized_source', None) is not self.embeddings:
+            self._normalized = self.embeddings / np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+            self._normalized_source = self.embeddings
+        return self._normalized
+
+    def normalized_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Unit-length embeddings of the given rows."""
+        return self._normalized_embeddings()[rows]
+
+    def search_indices(self, query_embedding: np.ndarray, top_k: int = 10,
+                       filter_tags: Optional[List[str]] = None,
+                       rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search for similar embeddings, returning row positions.
 
         Args:
             query_embedding: Query embedding vector
             top_k: Number of results to return
             filter_tags: Optional tag filter
+            rows: Only score these rows (all rows if None)
 
         Returns:
-            List of results with scores and metadata
+            (row indices, cosine similarities), best first
         """
         if self.embeddings is None or len(self.embeddings) == 0:
-            return []
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
 
         # Apply tag filter if specified
         if filter_tags:
-            indices = []
-            for i, meta in enumerate(self.metadata):
-                if any(tag in meta.get('tags', []) for tag in filter_tags):
-                    indices.append(i)
-
-            if not indices:
-                return []
-
-            filtered_embeddings = self.embeddings[indices]
-            filtered_metadata = [self.metadata[i] for i in indices]
-            filtered_chunk_ids = [self.chunk_ids[i] for i in indices]
+            indices = np.array([
+                i for i in (rows if rows is not None else range(len(self.metadata)))
+                if any(tag in self.metadata[i].get('tags', []) for tag in filter_tags)
+            ], dtype=np.int64)
+
+            if len(indices) == 0:
+                return indices, np.empty(0, dtype=np.float32)
+
+            candidates = self._normalized_embeddings()[indices]
+        elif rows is not None:
+            indices = np.asarray(rows, dtype=np.int64)
+            candidates = self._normalized_embeddings()[indices]
         else:
-            filtered_embeddings = self.embeddings
-            filtered_metadata = self.metadata
-            filtered_chunk_ids = self.chunk_ids
+            indices = None
+            candidates = self._normalized_embeddings()
 
         # Calculate cosine similarity
         query_norm = query_embedding / np.linalg.norm(query_embedding)
-        embeddings_norm = filtered_embeddings / np.linalg.norm(filtered_embeddings, axis=1, keepdims=True)
-        similarities = np.dot(embeddings_norm, query_norm)
+        similarities = candidates @ query_norm
 
-        # Get top-k indices
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        # Partial sort: only the top-k need ordering
+        if top_k < len(similarities):
+            top = np.argpartition(-similarities, top_k)[:top_k]
+        else:
+            top = np.arange(len(similarities))
+        top = top[np.argsort(-similarities[top], kind='stable')]
 
-        # Prepare results
-        results = []
-        for idx in top_indices:
-            results.append({
-                'chunk_id': filtered_chunk_ids[idx],
-                'score': float(similarities[idx]),
-                'metadata': filtered_metadata[idx]
-            })
+        rows = indices[top] if indices is not None else top
+        return rows, similarities[top]
 
-        return results
+    def search_posts(self, query_embedding: np.ndarray, top_k: int = 5,
+                     filter_tags: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank posts by similarity of their centroid to the query.
 
-    def save(self, embeddings_file: str, metadata_file: str):
-        """Save embeddings and metadata to disk."""
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of posts to return
+            filter_tags: Only consider posts carrying one of these tags
+
+        Returns:
+            (indices into post_slugs, cosine similarities), best first
+        """
+        if self.post_embeddings is None or len(self.post_embeddings) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        similarities = self.post_embeddings @ (query_embedding / np.linalg.norm(query_embedding))
+        if filter_tags:
+            _, post_tags = self._post_index()
+            wanted = set(filter_tags)
+            allowed = np.array([not tags.isdisjoint(wanted) for tags in post_tags], dtype=bool)
+            similarities = np.where(allowed, similarities, -np.inf)
+            top_k = min(top_k, int(allowed.sum()))
+
+        top_k = min(top_k, len(similarities))
+        top = np.argpartition(-similarities, top_k - 1)[:top_k] if top_k > 0 else np.empty(0, dtype=np.int64)
+        top = top[np.argsort(-similarities[top], kind='stable')]
+        return top, similarities[top]
+
+    def search_hierarchical(self, query_embedding: np.ndarray, top_k: int = 10,
+                            num_posts: int = 5,
+                            filter_tags: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Two-level search: pick the closest posts, then score only their chunks.
+
+        Falls back to a flat search when post centroids are unavailable.
+
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of chunk rows to return
+            num_posts: Number of posts whose chunks are scored
+            filter_tags: Optional tag filter
+
+        Returns:
+            (row indices, cosine similarities), best first
+        """
+        if self.post_embeddings is None:
+            return self.search_indices(query_embedding, top_k, filter_tags)
+
+        posts, _ = self.search_posts(query_embedding, num_posts, filter_tags)
+        if len(posts) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        post_rows, _ = self._post_index()
+        rows = np.concatenate([post_rows[post] for post in posts])
+        return self.search_indices(query_embedding, top_k, filter_tags, rows=rows)
+
+    def related_posts(self, post_slug: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Find the posts whose centroids are closest to a post's centroid.
+
+        Returns:
+            (post slug, cosine similarity) pairs, best first; empty for an unknown post
+        """
+        if self.post_embeddings is None or post_slug not in self.post_slugs:
+            return []
+
+        post = self.post_slugs.index(post_slug)
+        posts, scores = self.search_posts(self.post_embeddings[post], top_k + 1)
+        return [
+            (self.post_slugs[other], float(score))
+            for other, score in zip(posts, scores) if other != post
+        ][:top_k]
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 10,
+               filter_tags: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Search for similar embeddings.
+
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of results to return
+            filter_tags: Optional tag filter
+
+        Returns:
+            List of results with scores and metadata
+        """
+        rows, scores = self.search_indices(query_embedding, top_k, filter_tags)
+
+        return [
+            {
+                'chunk_id': self.chunk_ids[row],
+                'score': float(score),
+                'metadata': self.metadata[row]
+            }
+            for row, score in zip(rows, scores)
+        ]
+
+    def save(self, embeddings_file: str, metadata_file: str,
+             tag_embeddings_file: Optional[str] = None,
+             post_embeddings_file: Optional[str] = None):
+        """Save embeddings, metadata and (optionally) tag and post centroids to disk."""
         if self.embeddings is not None:
             np.save(embeddings_file, self.embeddings)
 
+        if tag_embeddings_file and self.tag_embeddings is not None:
+            np.save(tag_embeddings_file, self.tag_embeddings)
+
+        if post_embeddings_file and self.post_embeddings is not None:
+            np.save(post_embeddings_file, self.post_embeddings)
+
         with open(metadata_file, 'w') as f:
             json.dump({
                 'chunk_ids': self.chunk_ids,
                 'metadata': self.metadata,
-                'dimension': self.dimension
-            }, f, indent=2)
+                'dimension': self.dimension,
+                'tag_names': self.tag_names,
+                'post_slugs': self.post_slugs
+            }, f, separators=(',', ':'))
 
     @classmethod
-    def load(cls, embeddings_file: str, metadata_file: str) -> 'EmbeddingStore':
+    def load(cls, embeddings_file: str, metadata_file: str,
+             tag_embeddings_file: Optional[str] = None,
+             post_embeddings_file: Optional[str] = None) -> 'EmbeddingStore':
         """Load embeddings and metadata from disk."""
         embeddings = np.load(embeddings_file)
 
@@ -255,4 +768,17 @@ class EmbeddingStore:
         store.chunk_ids = data['chunk_ids']
         store.metadata = data['metadata']
 
+        if tag_embeddings_file and os.path.exists(tag_embeddings_file) and data.get('tag_names'):
+            store.tag_names = data['tag_names']
+            store.tag_embeddings = np.load(tag_embeddings_file)
+        else:
+            # Artifacts from before tag centroids were indexed
+            store.compute_tag_centroids()
+
+        if post_embeddings_file and os.path.exists(post_embeddings_file) and data.get('post_slugs'):
+            store.post_slugs = data['post_slugs']
+            store.post_embeddings = np.load(post_embeddings_file)
+        else:
+            store.compute_post_centroids()
+
         return store
@@ -0,0 +1,120 @@
+"""
+Score fusion strategies for hybrid retrieval.
+
+Each retriever contributes a ranked list as parallel NumPy arrays of chunk
+row ids and scores (best first). Fusion turns every list into per-row
+contributions, sums them with ``np.bincount`` and returns the best rows, so
+the cost is a handful of vector operations regardless of candidate depth.
+
+Strategies:
+    rrf     Weighted Reciprocal Rank Fusion: w / (k + rank)
+    minmax  Convex combination of min-max normalized scores
+    zscore  Convex combination of z-scored scores (mapped to 0-1 via a normal CDF approximation)
+    dbsf    Distribution-Based Score Fusion: scores scaled by mean ± 3 std, clipped to 0-1
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+RankedList = Tuple[np.ndarray, np.ndarray]  # (row ids, scores), best first
+
+
+@dataclass
+class FusionResult:
+    """Fused ranking over chunk rows."""
+    rows: np.ndarray  # Chunk row ids, best first
+    scores: np.ndarray  # Fused score per row
+    membership: np.ndarray  # Bool (num_lists, num_rows): which lists retrieved each row
+
+
+def _rrf(scores: np.ndarray, k: float) -> np.ndarray:
+    ranks = np.arange(1, len(scores) + 1, dtype=np.float64)
+    return 1.0 / (k + ranks)
+
+
+def _minmax(scores: np.ndarray, k: float) -> np.ndarray:
+    low, high = scores.min(), scores.max()
+    if high == low:
+        return np.ones_like(scores, dtype=np.float64)
+    return (scores - low) / (high - low)
+
+
+def _zscore(scores: np.ndarray, k: float) -> np.ndarray:
+    std = scores.std()
+    if std == 0:
+        return np.full_like(scores, 0.5, dtype=np.float64)
+    z = (scores - scores.mean()) / std
+    # Logistic approximation of the standard normal CDF keeps fused scores
+    # in 0-1 like the other strategies
+    return 1.0 / (1.0 + np.exp(-1.702 * z))
+
+
+def _dbsf(scores: np.ndarray, k: float) -> np.ndarray:
+    mean, std = scores.mean(), scores.std()
+    if std == 0:
+        return np.ones_like(scores, dtype=np.float64)
+    low = mean - 3 * std
+    return np.clip((scores - low) / (6 * std), 0.0, 1.0)
+
+
+# Maps each strategy to a function turning one list's scores into contributions
+FUSION_STRATEGIES: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    'rrf': _rrf,
+    'minmax': _minmax,
+    'zscore': _zscore,
+    'dbsf': _dbsf,
+}
+
+
+def fuse(
+    ranked_lists: Sequence[RankedList],
+    weights: Sequence[float],
+    top_k: int,
+    strategy: str = 'rrf',
+    rrf_k: float = 60
+) -> FusionResult:
+    """
+    Fuse ranked lists of chunk rows into one ranking.
+
+    Args:
+        ranked_lists: (row ids, scores) per retriever, each sorted best first
+        weights: Weight of each retriever's contribution
+        top_k: Number of fused rows to keep
+        strategy: One of FUSION_STRATEGIES
+        rrf_k: RRF rank constant (only used by 'rrf')
+
+    Returns:
+        FusionResult with the top_k rows
+    """
+    if strategy not in FUSION_STRATEGIES:
+        raise ValueError(f"Unknown fusion strategy: {strategy}")
+    contribution_fn = FUSION_STRATEGIES[strategy]
+
+    rows_parts: List[np.ndarray] = []
+    contribution_parts: List[np.ndarray] = []
+    list_ids: List[np.ndarray] = []
+    for list_id, ((rows, scores), weight) in enumerate(zip(ranked_lists, weights)):
+        if len(rows) == 0:
+            continue
+        rows_parts.append(np.asarray(rows, dtype=np.int64))
+        contribution_parts.append(weight * contribution_fn(np.asarray(scores, dtype=np.float64), rrf_k))
+        list_ids.append(np.full(len(rows), list_id))
+
+    if not rows_parts:
+        return FusionResult(
+            rows=np.empty(0, dtype=np.int64),
+            scores=np.empty(0),
+            membership=np.zeros((len(ranked_lists), 0), dtype=bool)
+        )
+
+    all_rows = np.concatenate(rows_parts)
+    unique_rows, inverse = np.unique(all_rows, return_inverse=True)
+    fused = np.bincount(inverse, weights=np.concatenate(contribution_parts), minlength=len(unique_rows))
+
+    membership = np.zeros((len(ranked_lists), len(unique_rows)), dtype=bool)
+    membership[np.concatenate(list_ids), inverse] = True
+
+    order = np.argsort(-fused, kind='stable')[:top_k]
+    return FusionResult(rows=unique_rows[order], scores=fused[order], membership=membership[:, order])
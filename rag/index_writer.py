@@ -0,0 +1,149 @@
+"""
+Streaming writer for index artifacts.
+
+Posts arrive one at a time with their chunks and embeddings. Post text goes
+straight into chunks.json and vectors into a scratch file, so neither is
+held for the whole corpus; what stays in memory is one compact row, BM25
+term counts and metadata entry per chunk, and one centroid sum per tag and
+post. ``finish`` writes the artifacts that need corpus-wide statistics.
+
+The output is the same as ``ChunkStore.to_dict``, ``EmbeddingStore.save``
+and ``BM25.save`` produce for the same chunks.
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+from rag.chunk_store import FORMAT, FIELDS, post_record, chunk_row
+from rag.embeddings import EmbeddingStore
+from rag.bm25 import BM25
+
+
+class IndexWriter:
+    """Writes chunks, embeddings and the BM25 index as posts stream in."""
+
+    def __init__(self, data_dir: Path, embedding_store: EmbeddingStore):
+        """
+        Initialize the writer and open the streamed files.
+
+        Args:
+            data_dir: Output directory of the index
+            embedding_store: Empty store that receives the chunk IDs,
+                metadata and centroids, and saves them
+        """
+        self.data_dir = Path(data_dir)
+        self.embedding_store = embedding_store
+        self.bm25 = BM25()
+
+        self.rows: List[List[Any]] = []
+        self.doc_freqs = []
+        # Slug, title, tags and chunk count of each post written
+        self.posts: List[Dict[str, Any]] = []
+        self._tag_sums: Dict[str, np.ndarray] = {}
+        self._post_sums: Dict[str, np.ndarray] = {}
+
+        # chunks.json is written under a temporary name and renamed by finish
+        self._chunks_path = self.data_dir / 'chunks.json.tmp'
+        self._chunks_file = open(self._chunks_path, 'w')
+        self._chunks_file.write(f'{{"format":{json.dumps(FORMAT)},"posts":[')
+        self._vectors_path = self.data_dir / 'embeddings.f32.tmp'
+        self._vectors_file = open(self._vectors_path, 'wb')
+
+    def add_post(self, text: str, chunks: List[Dict[str, Any]], embeddings: np.ndarray):
+        """
+        Write a post's chunks and their embeddings.
+
+        Args:
+            text: Post text the chunks were cut from
+            chunks: Chunk dicts of the post, in order
+            embeddings: One row per chunk
+        """
+        if not chunks:
+            # Posts without chunks are not stored, as in ChunkStore.from_chunks
+            return
+
+        first = chunks[0]
+        slug = first['post_slug']
+        if self.posts:
+            self._chunks_file.write(',')
+        json.dump(post_record(first, text), self._chunks_file, separators=(',', ':'), default=str)
+
+        post = len(self.posts)
+        for chunk in chunks:
+            self.rows.append(chunk_row(chunk, post, text))
+            self.doc_freqs.append(self.bm25.term_counts(chunk['content']))
+            self.embedding_store.chunk_ids.append(chunk['chunk_id'])
+            self.embedding_store.metadata.append({'post_slug': slug, 'tags': chunk['tags']})
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        embeddings.tofile(self._vectors_file)
+
+        # Centroids are unit-length means, so summing normalized rows is enough
+        normalized_sum = (embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)).sum(axis=0)
+        self._post_sums[slug] = normalized_sum
+        for tag in first['tags']:
+            self._tag_sums[tag] = self._tag_sums.get(tag, 0) + normalized_sum
+
+        self.posts.append({'slug': slug, 'title': first['post_title'], 'tags': first['tags'], 'num_chunks': len(chunks)})
+
+    def finish(self) -> BM25:
+        """
+        Write the remaining artifacts.
+
+        Returns:
+            The fitted BM25 model
+        """
+        self._chunks_file.write(f'],"fields":{json.dumps(FIELDS, separators=(",", ":"))},"chunks":')
+        json.dump(self.rows, self._chunks_file, separators=(',', ':'), default=str)
+        self._chunks_file.write('}')
+        self._chunks_file.close()
+        os.replace(self._chunks_path, self.data_dir / 'chunks.json')
+        print(f"Saved chunks to {self.data_dir / 'chunks.json'}")
+
+        self._vectors_file.close()
+        store = self.embedding_store
+        vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode='r', shape=(len(self.rows), store.dimension)
+        ) if self.rows else np.zeros((0, store.dimension), dtype=np.float32)
+        store.embeddings = vectors
+
+        store.tag_names = sorted(self._tag_sums)
+        store.tag_embeddings = self._centroids([self._tag_sums[tag] for tag in store.tag_names])
+        store.post_slugs = list(self._post_sums)
+        store.post_embeddings = self._centroids(list(self._post_sums.values()))
+        print(f"Computed centroids for {len(store.tag_names)} tags and {len(store.post_slugs)} posts")
+
+        # Copied from the memory map page by page, not loaded whole
+        embeddings_path = self.data_dir / 'embeddings.npy'
+        store.save(
+            str(embeddings_path), str(self.data_dir / 'metadata.json'),
+            str(self.data_dir / 'tag_embeddings.npy'), str(self.data_dir / 'post_embeddings.npy')
+        )
+        store.embeddings = np.load(embeddings_path, mmap_mode='r')
+        del vectors
+        self._vectors_path.unlink()
+        print(f"Saved embeddings to {embeddings_path}")
+
+        self.bm25.fit_term_counts(self.doc_freqs)
+        bm25_path = self.data_dir / 'bm25_index.pkl'
+        self.bm25.save(str(bm25_path))
+        print(f"Saved BM25 index to {bm25_path} ({self.bm25.doc_count} documents)")
+
+        return self.bm25
+
+    def abort(self):
+        """Close and remove the scratch files of an unfinished index."""
+        for handle, path in ((self._chunks_file, self._chunks_path), (self._vectors_file, self._vectors_path)):
+            handle.close()
+            if path.exists():
+                path.unlink()
+
+    @staticmethod
+    def _centroids(sums: List[np.ndarray]) -> Optional[np.ndarray]:
+        if not sums:
+            return None
+        centroids = np.array(sums, dtype=np.float32)
+        return centroids / np.linalg.norm(centroids, axis=1, keepdims=True)
@@ -6,18 +6,190 @@ import os
 import sys
 import json
 import yaml
+import queue
 import argparse
+import threading
+import multiprocessing
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import numpy as np
 from datetime import datetime
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
-from rag.chunker import MarkdownChunker
-from rag.embeddings import EmbeddingConfig, EmbeddingService, EmbeddingStore
+from rag.chunker import MarkdownChunker, diff_chunks
+from rag.chunk_store import ChunkStore, load_chunk_records
+from rag.manifest import IndexManifest, PostEntry, content_sha256
+from rag.tokens import load_token_counter
+from rag.embeddings import EmbeddingConfig, EmbeddingService, EmbeddingStore, LOCAL_PROVIDERS
 from rag.bm25 import BM25
+from rag.index_writer import IndexWriter
+from rag.snapshot import SnapshotError, SnapshotWriter, resolve_index_dir
+
+
+# Below this many posts, starting worker processes costs more than it saves
+MIN_PARALLEL_POSTS = 32
+
+# Posts submitted to the pool ahead of the one being consumed, per worker
+POSTS_IN_FLIGHT = 2
+
+# Bounds between pipeline stages: chunked posts waiting to be embedded, and
+# embedded batches waiting to be written. A full queue blocks the stage
+# feeding it, so memory stays flat however many posts there are.
+POST_QUEUE_SIZE = 16
+BATCH_QUEUE_SIZE = 2
+
+# Marks the end of a stage's output
+_END = object()
+
+# Artifacts of an index other than its manifest
+INDEX_FILES = [
+    'chunks.json', 'embeddings.npy', 'metadata.json', 'tag_embeddings.npy',
+    'post_embeddings.npy', 'bm25_index.pkl', 'index_summary.json'
+]
+
+# Chunker owned by each post worker process, set by the pool initializer
+_worker_chunker = None
+
+
+def _init_post_worker(chunker: MarkdownChunker):
+    """Install the chunker used by ``_chunk_post`` in this process."""
+    global _worker_chunker
+    _worker_chunker = chunker
+
+
+def _load_post(filepath: str) -> Dict[str, Any]:
+    """Read a post and parse its frontmatter."""
+    filepath = Path(filepath)
+    mtime = filepath.stat().st_mtime
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+    sha256 = content_sha256(content)
+
+    # Parse frontmatter
+    metadata = {}
+    if content.startswith('---'):
+        _, frontmatter, content = content.split('---', 2)
+        metadata = yaml.safe_load(frontmatter)
+        content = content.strip()
+
+    # Set defaults
+    metadata.setdefault('title', filepath.stem.replace('-', ' ').title())
+    metadata.setdefault('tags', [])
+    metadata.setdefault('category', 'general')
+
+    # Normalize date
+    if 'date' in metadata:
+        if isinstance(metadata['date'], str):
+            try:
+                metadata['date'] = datetime.strptime(metadata['date'], '%Y-%m-%d')
+            except:
+                metadata['date'] = datetime.now()
+        elif not isinstance(metadata['date'], datetime):
+            metadata['date'] = datetime.now()
+    else:
+        metadata['date'] = datetime.fromtimestamp(mtime)
+
+    return {
+        'filepath': str(filepath),
+        'slug': filepath.stem,
+        'content': content,
+        'metadata': metadata,
+        'mtime': mtime,
+        'sha256': sha256
+    }
+
+
+def _chunk_post(post: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Chunk a loaded post into chunk dicts with the worker's chunker."""
+    chunks = _worker_chunker.chunk_document(
+        content=post['content'],
+        metadata=post['metadata'],
+        post_slug=post['slug']
+    )
+
+    # Convert Chunk objects to dictionaries
+    return [
+        {
+            'chunk_id': chunk.chunk_id,
+            'content': chunk.content,
+            'post_slug': chunk.post_slug,
+            'post_title': chunk.post_title,
+            'section_heading': chunk.section_heading,
+            'tags': chunk.tags,
+            'url_fragment': chunk.url_fragment,
+            'position': chunk.position,
+            'token_count': chunk.token_count,
+            'start_char': chunk.start_char,
+            'end_char': chunk.end_char,
+            'date': post['metadata']['date'].isoformat()
+        }
+        for chunk in chunks
+    ]
+
+
+def _load_and_chunk_post(filepath: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Load a post and chunk it in one trip to a worker."""
+    post = _load_post(filepath)
+    return post, _chunk_post(post)
+
+
+class _StageError:
+    """Carries an exception raised in a stage to the stage reading its output."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class _PipelineStage(threading.Thread):
+    """
+    Runs an iterator in a thread, handing its items on through a bounded queue.
+
+    Iterating the stage yields the items in order and re-raises any
+    exception the iterator raised. Once ``stop`` is set, both sides give up
+    instead of blocking on the queue.
+    """
+
+    def __init__(self, name: str, items: Iterable[Any], maxsize: int, stop: threading.Event):
+        super().__init__(name=name, daemon=True)
+        self.items = items
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stop = stop
+
+    def run(self):
+        try:
+            for item in self.items:
+                if not self._put(item):
+                    return
+        except BaseException as e:
+            self._put(_StageError(e))
+            return
+        self._put(_END)
+
+    def _put(self, item: Any) -> bool:
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self) -> Iterator[Any]:
+        while not self.stop.is_set():
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _END:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
 
 
 class BlogIndexer:
@@ -32,9 +204,6 @@ class BlogIndexer:
         self.data_dir = Path(self.config['build']['output_dir'])
         self.data_dir.mkdir(exist_ok=True)
 
-        # Initialize components
-        self.chunker = MarkdownChunker(max_tokens=512, overlap_tokens=50)
-
         # Configure embedding service using environment variables with config fallback
         provider = os.getenv('EMBEDDING_PROVIDER')
         model_name = os.getenv('EMBEDDING_MODEL')
@@ -54,8 +223,9 @@ class BlogIndexer:
             expected_dimension = model_configs[model_name].get('dimension')
             expected_provider = model_configs[model_name].get('provider')
 
-            # Validate provider matches expected
-            if expected_provider and provider != expected_provider:
+            # Validate provider matches expected (ONNX backends serve the same local models)
+            compatible = expected_provider == 'local' and provider in LOCAL_PROVIDERS
+            if expected_provider and provider != expected_provider and not compatible:
                 print(f"Warning: Provider mismatch for {model_name}")
                 print(f"  Expected: {expected_provider}, Got: {provider}")
 
@@ -63,12 +233,15 @@ class BlogIndexer:
         embedding_config = EmbeddingConfig(
             provider=provider,
             model_name=model_name,
-            dimension=expected_dimension or 384  # Will be updated based on actual model
+            dimension=expected_dimension or 384,  # Will be updated based on actual model
+            num_workers=int(os.getenv('EMBEDDING_WORKERS', '1'))
         )
 
         print(f"Initializing embedding service...")
         print(f"  Provider: {embedding_config.provider}")
         print(f"  Model: {embedding_config.model_name}")
+        if embedding_config.num_workers > 1:
+            print(f"  Encoding workers: {embedding_config.num_workers}")
 
         self.embedding_service = EmbeddingService(embedding_config)
 
@@ -87,97 +260,149 @@ class BlogIndexer:
 
         self.embedding_store = EmbeddingStore(actual_dimension)
 
-    def load_posts(self) -> List[Dict[str, Any]]:
-        """Load all markdown posts from content directory."""
-        posts = []
+        # Size chunks in the model's own tokens so none are truncated when embedded
+        model_config = model_configs.get(model_name, {})
+        token_counter = load_token_counter(model_config.get('tokenizer'))
+        self.chunker = MarkdownChunker(
+            max_tokens=model_config.get('max_tokens', 512),
+            overlap_tokens=50,
+            token_counter=token_counter
+        )
+        print(f"  Chunk size: {self.chunker.max_tokens} tokens ({token_counter.name} counts)")
+
+        # Processes that load and chunk posts
+        self.index_workers = int(os.getenv('INDEX_WORKERS', '0')) or (os.cpu_count() or 1)
+        self._post_pool = None
+
+    def post_filepaths(self) -> List[str]:
+        """Paths of all markdown posts in the content directory, in filename order."""
         posts_dir = self.content_dir / 'posts'
 
         if not posts_dir.exists():
             print(f"Posts directory not found: {posts_dir}")
-            return posts
-
-        for filepath in posts_dir.glob('*.md'):
-            print(f"Loading: {filepath.name}")
-
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Parse frontmatter
-            metadata = {}
-            if content.startswith('---'):
-                _, frontmatter, content = content.split('---', 2)
-                metadata = yaml.safe_load(frontmatter)
-                content = content.strip()
-
-            # Set defaults
-            metadata.setdefault('title', filepath.stem.replace('-', ' ').title())
-            metadata.setdefault('tags', [])
-            metadata.setdefault('category', 'general')
-
-            # Normalize date
-            if 'date' in metadata:
-                if isinstance(metadata['date'], str):
-                    try:
-                        metadata['date'] = datetime.strptime(metadata['date'], '%Y-%m-%d')
-                    except:
-                        metadata['date'] = datetime.now()
-                elif not isinstance(metadata['date'], datetime):
-                    metadata['date'] = datetime.now()
-            else:
-                metadata['date'] = datetime.fromtimestamp(filepath.stat().st_mtime)
-
-            posts.append({
-                'filepath': str(filepath),
-                'slug': filepath.stem,
-                'content': content,
-                'metadata': metadata
-            })
+            return []
+
+        return sorted(str(filepath) for filepath in posts_dir.glob('*.md'))
+
+    def load_posts(self, filepaths: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Load markdown posts (default: all of them), in filename order."""
+        if filepaths is None:
+            filepaths = self.post_filepaths()
+
+        posts = self._map_posts(_load_post, filepaths)
+        for post in posts:
+            print(f"Loading: {Path(post['filepath']).name}")
 
         return posts
 
+    def load_previous_chunks(self) -> Optional[Sequence]:
+        """Chunks of the existing index in the output directory, if any."""
+        try:
+            chunks_path = resolve_index_dir(self.data_dir) / 'chunks.json'
+        except SnapshotError as e:
+            print(f"Ignoring previous index: {e}")
+            return None
+        if not chunks_path.exists():
+            return None
+        with open(chunks_path, 'r') as f:
+            return load_chunk_records(json.load(f))
+
     def process_posts(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Process posts into chunks."""
         all_chunks = []
 
-        for post in posts:
-            print(f"Processing: {post['metadata']['title']}")
-
-            # Chunk the document
-            chunks = self.chunker.chunk_document(
-                content=post['content'],
-                metadata=post['metadata'],
-                post_slug=post['slug']
-            )
+        try:
+            post_chunks = self._map_posts(_chunk_post, posts)
+        finally:
+            self.close_post_pool()
 
-            # Convert Chunk objects to dictionaries
-            for chunk in chunks:
-                chunk_dict = {
-                    'chunk_id': chunk.chunk_id,
-                    'content': chunk.content,
-                    'post_slug': chunk.post_slug,
-                    'post_title': chunk.post_title,
-                    'section_heading': chunk.section_heading,
-                    'tags': chunk.tags,
-                    'url_fragment': chunk.url_fragment,
-                    'position': chunk.position,
-                    'token_count': chunk.token_count,
-                    'date': post['metadata']['date'].isoformat()
-                }
-                all_chunks.append(chunk_dict)
+        for post, chunks in zip(posts, post_chunks):
+            print(f"Processing: {post['metadata']['title']}")
+            all_chunks.extend(chunks)
 
         print(f"Created {len(all_chunks)} chunks from {len(posts)} posts")
         return all_chunks
 
-    def generate_embeddings(self, chunks: List[Dict[str, Any]]):
-        """Generate embeddings for all chunks."""
+    def _map_posts(self, fn, items: List[Any]) -> List[Any]:
+        """
+        Apply a post-level function to every item, in a process pool for large corpora.
+
+        ``executor.map`` returns results in input order, so output is the
+        same as a serial run. The pool is created on first use and kept
+        until ``close_post_pool``.
+        """
+        if self.index_workers <= 1 or len(items) < MIN_PARALLEL_POSTS:
+            _init_post_worker(self.chunker)
+            return [fn(item) for item in items]
+
+        chunksize = max(1, len(items) // (self.index_workers * 4))
+        return list(self._post_pool_executor().map(fn, items, chunksize=chunksize))
+
+    def _imap_posts(self, fn, items: List[Any]) -> Iterator[Any]:
+        """
+        Like ``_map_posts``, but yield results in order as they are consumed.
+
+        ``executor.map`` submits every item up front and buffers all the
+        results; this keeps only ``POSTS_IN_FLIGHT`` items per worker
+        submitted ahead of the consumer.
+        """
+        if self.index_workers <= 1 or len(items) < MIN_PARALLEL_POSTS:
+            _init_post_worker(self.chunker)
+            for item in items:
+                yield fn(item)
+            return
+
+        pool = self._post_pool_executor()
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= self.index_workers * POSTS_IN_FLIGHT:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _post_pool_executor(self) -> ProcessPoolExecutor:
+        """The post processing pool, created on first use."""
+        if self._post_pool is None:
+            print(f"  Post workers: {self.index_workers}")
+            self._post_pool = ProcessPoolExecutor(
+                max_workers=self.index_workers,
+                # The embedding model is already loaded; fork is unsafe once its thread pools exist
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_post_worker,
+                initargs=(self.chunker,)
+            )
+        return self._post_pool
+
+    def close_post_pool(self):
+        """Shut down the post processing pool, if one was started."""
+        if self._post_pool is not None:
+            self._post_pool.shutdown()
+            self._post_pool = None
+
+    def generate_embeddings(self, chunks: List[Dict[str, Any]], previous: Optional[EmbeddingStore] = None):
+        """
+        Generate embeddings for all chunks.
+
+        Args:
+            chunks: Chunk dicts, in row order
+            previous: Store of the previous index; chunks it already has an
+                embedding for (same chunk ID) reuse it instead of being re-embedded
+        """
         print("Generating embeddings...")
 
-        # Extract text content
-        texts = [chunk['content'] for chunk in chunks]
         chunk_ids = [chunk['chunk_id'] for chunk in chunks]
+        previous_rows = {}
+        if previous is not None:
+            previous_rows = {chunk_id: row for row, chunk_id in enumerate(previous.chunk_ids)}
+        missing = [i for i, chunk_id in enumerate(chunk_ids) if chunk_id not in previous_rows]
+        if previous is not None:
+            print(f"Reusing {len(chunks) - len(missing)} embeddings, embedding {len(missing)} chunks")
+
+        # Extract text content
+        texts = [chunks[i]['content'] for i in missing]
 
-        # Generate embeddings in batches
-        batch_size = 32
+        batch_size = self.embedding_batch_size()
         all_embeddings = []
 
         for i in range(0, len(texts), batch_size):
@@ -193,123 +418,434 @@ class BlogIndexer:
         else:
             embeddings = np.array([])
 
+        if previous is not None and chunks:
+            # Fill the reused rows and the new rows separately; the previous
+            # store may have no rows at all
+            combined = np.empty((len(chunks), previous.dimension), dtype=np.float32)
+            reused = [i for i, chunk_id in enumerate(chunk_ids) if chunk_id in previous_rows]
+            if reused:
+                combined[reused] = previous.embeddings[[previous_rows[chunk_ids[i]] for i in reused]]
+            if missing:
+                combined[missing] = embeddings
+            embeddings = combined
+
         # Store embeddings with metadata
         metadata = []
         for chunk in chunks:
+            # Only what the store filters and groups by; everything else is in chunks.json
             metadata.append({
                 'post_slug': chunk['post_slug'],
-                'post_title': chunk['post_title'],
-                'section_heading': chunk['section_heading'],
-                'tags': chunk['tags'],
-                'url_fragment': chunk['url_fragment'],
-                'position': chunk['position']
+                'tags': chunk['tags']
             })
 
         self.embedding_store.add_embeddings(embeddings, chunk_ids, metadata)
-        print(f"Generated {len(embeddings)} embeddings")
-
-    def build_bm25_index(self, chunks: List[Dict[str, Any]]) -> BM25:
-        """Build BM25 index for keyword search."""
+        print(f"Generated {len(missing)} embeddings")
+
+        # Tag-only queries use these instead of embedding synthesized text
+        self.embedding_store.compute_tag_centroids()
+        print(f"Computed centroids for {len(self.embedding_store.tag_names)} tags")
+
+        # Post centroids drive two-level search and related posts
+        self.embedding_store.compute_post_centroids()
+        print(f"Computed centroids for {len(self.embedding_store.post_slugs)} posts")
+
+    def embedding_batch_size(self) -> int:
+        """
+        Chunks sent to the embedding service at a time.
+
+        Large enough to keep every encoding worker busy; the service splits
+        them into model-sized batches.
+        """
+        config = self.embedding_service.config
+        return config.batch_size * max(config.num_workers, 1) * 4
+
+    def embed_posts(
+        self,
+        posts: Iterable[Tuple[Dict[str, Any], List[Dict[str, Any]]]]
+    ) -> Iterator[Tuple[List[Tuple[Dict[str, Any], List[Dict[str, Any]]]], np.ndarray]]:
+        """
+        Embed chunked posts as they arrive, a batch of whole posts at a time.
+
+        Args:
+            posts: (post, chunks) pairs
+
+        Yields:
+            The (post, chunks) pairs of a batch and one embedding per chunk, in order
+        """
+        batch_size = self.embedding_batch_size()
+        group, texts = [], []
+        batches = 0
+
+        def embed():
+            if not texts:
+                return np.zeros((0, self.embedding_store.dimension), dtype=np.float32)
+            print(f"Embedding batch {batches + 1} ({len(texts)} chunks)")
+            return self.embedding_service.embed_texts(texts)
+
+        for post, chunks in posts:
+            print(f"Processing: {post['metadata']['title']}")
+            group.append((post, chunks))
+            texts.extend(chunk['content'] for chunk in chunks)
+            if len(texts) >= batch_size:
+                yield group, embed()
+                group, texts = [], []
+                batches += 1
+
+        if group:
+            yield group, embed()
+
+    def build_bm25_index(
+        self,
+        chunks: List[Dict[str, Any]],
+        previous: Optional[BM25] = None,
+        previous_chunk_ids: Optional[List[str]] = None
+    ) -> BM25:
+        """
+        Build BM25 index for keyword search.
+
+        Args:
+            chunks: Chunk dicts, in row order
+            previous: BM25 model of the previous index; term counts of chunks
+                it already has are reused instead of retokenizing them
+            previous_chunk_ids: Chunk ID of each document in ``previous``
+        """
         print("Building BM25 index...")
 
-        # Extract text content
-        documents = [chunk['content'] for chunk in chunks]
-
-        # Fit BM25
-        bm25 = BM25()
-        bm25.fit(documents)
+        if previous is not None:
+            previous_rows = {chunk_id: row for row, chunk_id in enumerate(previous_chunk_ids)}
+            bm25 = previous.refit([previous_rows.get(chunk['chunk_id'], chunk['content']) for chunk in chunks])
+        else:
+            # Fit BM25
+            bm25 = BM25()
+            bm25.fit([chunk['content'] for chunk in chunks])
 
-        print(f"BM25 index built with {len(documents)} documents")
+        print(f"BM25 index built with {len(chunks)} documents")
         return bm25
 
-    def save_artifacts(self, chunks: List[Dict[str, Any]], bm25: BM25):
-        """Save all artifacts to disk."""
+    def save_artifacts(
+        self,
+        output_dir: Path,
+        chunks: List[Dict[str, Any]],
+        bm25: BM25,
+        post_texts: Dict[str, str],
+        manifest: IndexManifest
+    ):
+        """Save all artifacts to the output (snapshot) directory."""
         print("Saving artifacts...")
 
-        # Save chunks
-        chunks_path = self.data_dir / 'chunks.json'
+        # Save chunks as offsets into each post's text, so overlaps aren't stored twice
+        chunks_path = output_dir / 'chunks.json'
+        store = ChunkStore.from_chunks(chunks, post_texts)
         with open(chunks_path, 'w') as f:
-            json.dump(chunks, f, indent=2, default=str)
+            json.dump(store.to_dict(), f, separators=(',', ':'), default=str)
         print(f"Saved chunks to {chunks_path}")
 
         # Save embeddings
-        embeddings_path = self.data_dir / 'embeddings.npy'
-        metadata_path = self.data_dir / 'metadata.json'
-        self.embedding_store.save(str(embeddings_path), str(metadata_path))
+        embeddings_path = output_dir / 'embeddings.npy'
+        metadata_path = output_dir / 'metadata.json'
+        tag_embeddings_path = output_dir / 'tag_embeddings.npy'
+        post_embeddings_path = output_dir / 'post_embeddings.npy'
+        self.embedding_store.save(
+            str(embeddings_path), str(metadata_path), str(tag_embeddings_path), str(post_embeddings_path)
+        )
         print(f"Saved embeddings to {embeddings_path}")
 
         # Save BM25 model
-        bm25_path = self.data_dir / 'bm25_index.pkl'
+        bm25_path = output_dir / 'bm25_index.pkl'
         bm25.save(str(bm25_path))
         print(f"Saved BM25 index to {bm25_path}")
 
-        # Generate index summary
+        posts: Dict[str, Dict[str, Any]] = {}
+        for chunk in chunks:
+            post = posts.setdefault(chunk['post_slug'], {
+                'slug': chunk['post_slug'], 'title': chunk['post_title'], 'tags': chunk['tags'], 'num_chunks': 0
+            })
+            post['num_chunks'] += 1
+        self.save_summary(output_dir, list(posts.values()))
+
+        # Written last: a manifest only describes a complete set of artifacts
+        manifest_path = output_dir / 'manifest.json'
+        manifest.save(str(manifest_path))
+        print(f"Saved manifest to {manifest_path}")
+
+    def save_summary(self, output_dir: Path, posts: List[Dict[str, Any]]):
+        """
+        Generate index_summary.json.
+
+        Args:
+            output_dir: Directory of the snapshot being written
+            posts: Slug, title, tags and num_chunks of each indexed post
+        """
         summary = {
             'created_at': datetime.now().isoformat(),
-            'num_posts': len(set(c['post_slug'] for c in chunks)),
-            'num_chunks': len(chunks),
+            'num_posts': len(posts),
+            'num_chunks': sum(post['num_chunks'] for post in posts),
             'embedding_model': self.embedding_service.config.model_name,
             'embedding_dimension': self.embedding_service.config.dimension,
-            'chunk_config': {
-                'max_tokens': self.chunker.max_tokens,
-                'overlap_tokens': self.chunker.overlap_tokens
-            },
-            'tags': list(set(tag for c in chunks for tag in c['tags'])),
+            'chunk_config': self.index_settings()['chunk_config'],
+            'tags': list(set(tag for post in posts for tag in post['tags'])),
             'posts': [
-                {
-                    'slug': slug,
-                    'title': next(c['post_title'] for c in chunks if c['post_slug'] == slug),
-                    'num_chunks': len([c for c in chunks if c['post_slug'] == slug])
-                }
-                for slug in sorted(set(c['post_slug'] for c in chunks))
+                {'slug': post['slug'], 'title': post['title'], 'num_chunks': post['num_chunks']}
+                for post in sorted(posts, key=lambda post: post['slug'])
             ]
         }
 
-        summary_path = self.data_dir / 'index_summary.json'
+        summary_path = output_dir / 'index_summary.json'
         with open(summary_path, 'w') as f:
             json.dump(summary, f, indent=2)
         print(f"Saved index summary to {summary_path}")
 
+    def index_settings(self) -> Dict[str, Any]:
+        """Settings that determine chunk boundaries and vectors; an index can only be patched under the same ones."""
+        return {
+            'embedding_model': self.embedding_service.config.model_name,
+            'embedding_dimension': self.embedding_service.config.dimension,
+            'chunk_config': {
+                'max_tokens': self.chunker.max_tokens,
+                'overlap_tokens': self.chunker.overlap_tokens,
+                'tokenizer': self.chunker.token_counter.name
+            }
+        }
+
+    def build_manifest(self, entries: Dict[str, PostEntry], chunks: List[Dict[str, Any]]) -> IndexManifest:
+        """Manifest for post entries (keyed by file name), with each post's chunk IDs filled in."""
+        chunk_ids: Dict[str, List[str]] = {}
+        for chunk in chunks:
+            chunk_ids.setdefault(chunk['post_slug'], []).append(chunk['chunk_id'])
+
+        for entry in entries.values():
+            entry.chunk_ids = chunk_ids.get(entry.slug, [])
+        return IndexManifest(entries, self.index_settings())
+
+    def load_previous_index(self) -> Optional[Dict[str, Any]]:
+        """
+        Artifacts of the existing index, if it can be patched incrementally.
+
+        Returns:
+            Dict with index_dir, manifest, chunks (ChunkStore), bm25 and
+            embedding_store, or None (with the reason printed) if a full
+            reindex is needed
+        """
+        try:
+            index_dir = resolve_index_dir(self.data_dir)
+        except SnapshotError as e:
+            print(f"Previous index snapshot is unusable: {e}")
+            return None
+
+        manifest = IndexManifest.load(str(index_dir / 'manifest.json'))
+        if manifest is None:
+            print("No manifest from a previous index")
+            return None
+        if manifest.settings != self.index_settings():
+            print("Embedding model or chunking settings changed since the last index")
+            return None
+
+        required = ['chunks.json', 'embeddings.npy', 'metadata.json', 'bm25_index.pkl']
+        missing = [name for name in required if not (index_dir / name).exists()]
+        if missing:
+            print(f"Previous index is missing {', '.join(missing)}")
+            return None
+
+        with open(index_dir / 'chunks.json', 'r') as f:
+            chunks = load_chunk_records(json.load(f))
+        if not isinstance(chunks, ChunkStore):
+            # Legacy chunks.json has no post text to carry over for unchanged posts
+            print("Previous chunks.json predates offset storage")
+            return None
+
+        embedding_store = EmbeddingStore.load(
+            str(index_dir / 'embeddings.npy'), str(index_dir / 'metadata.json')
+        )
+        bm25 = BM25.load(str(index_dir / 'bm25_index.pkl'))
+        if not (len(chunks) == bm25.doc_count == len(embedding_store.chunk_ids)):
+            print("Previous index artifacts are out of step with each other")
+            return None
+
+        return {
+            'index_dir': index_dir, 'manifest': manifest, 'chunks': chunks,
+            'bm25': bm25, 'embedding_store': embedding_store
+        }
+
     def run(self):
-        """Run the complete indexing pipeline."""
+        """
+        Run the complete indexing pipeline.
+
+        Loading and chunking, embedding and writing run as concurrent stages
+        joined by bounded queues: posts are chunked (in the post pool for
+        large corpora) while earlier batches are embedded, and each embedded
+        batch is written out as soon as it is ready. Only compact per-chunk
+        state is kept until the end, when the corpus-wide statistics (BM25
+        IDF, centroids) are saved.
+
+        Artifacts go to a new snapshot, published only once all are written.
+        """
         print("Starting indexing pipeline...")
         print("=" * 50)
 
-        # Load posts
-        posts = self.load_posts()
-        if not posts:
+        filepaths = self.post_filepaths()
+        if not filepaths:
             print("No posts found to index")
             return
 
-        print(f"Found {len(posts)} posts")
+        print(f"Found {len(filepaths)} posts")
+        previous_chunks = self.load_previous_chunks()
         print("=" * 50)
 
-        # Process into chunks
-        chunks = self.process_posts(posts)
+        stop = threading.Event()
+        chunked = _PipelineStage(
+            'chunk', self._imap_posts(_load_and_chunk_post, filepaths), POST_QUEUE_SIZE, stop
+        )
+        embedded = _PipelineStage('embed', self.embed_posts(chunked), BATCH_QUEUE_SIZE, stop)
+        snapshot = SnapshotWriter(self.data_dir)
+        writer = IndexWriter(snapshot.path, self.embedding_store)
+        entries: Dict[str, PostEntry] = {}
+        chunk_ids: Dict[str, List[str]] = {}
+
+        try:
+            chunked.start()
+            embedded.start()
+            for group, embeddings in embedded:
+                row = 0
+                for post, chunks in group:
+                    writer.add_post(post['content'], chunks, embeddings[row:row + len(chunks)])
+                    row += len(chunks)
+                    entries[Path(post['filepath']).name] = PostEntry(post['slug'], post['mtime'], post['sha256'])
+                    chunk_ids[post['slug']] = [chunk['chunk_id'] for chunk in chunks]
+            print(f"Created {len(writer.rows)} chunks from {len(entries)} posts")
+            print("=" * 50)
+
+            print("Saving artifacts...")
+            writer.finish()
+            self.save_summary(snapshot.path, writer.posts)
+
+            for entry in entries.values():
+                entry.chunk_ids = chunk_ids[entry.slug]
+            manifest_path = snapshot.path / 'manifest.json'
+            IndexManifest(entries, self.index_settings()).save(str(manifest_path))
+            print(f"Saved manifest to {manifest_path}")
+
+            snapshot.commit()
+        except BaseException:
+            writer.abort()
+            snapshot.abort()
+            raise
+        finally:
+            stop.set()
+            self.close_post_pool()
+            self.embedding_service.close()
+
+        if previous_chunks is not None:
+            new_chunks = [{'chunk_id': chunk_id} for chunk_id in self.embedding_store.chunk_ids]
+            print(f"Changes since last index: {diff_chunks(previous_chunks, new_chunks).summary()}")
         print("=" * 50)
 
-        # Generate embeddings
-        self.generate_embeddings(chunks)
+        print("Indexing complete!")
+
+    def run_incremental(self):
+        """
+        Update the existing index for posts added, changed or deleted since it was built.
+
+        Unchanged posts keep their chunks; chunks of changed posts that are
+        textually identical keep their embeddings and BM25 term counts. Falls
+        back to ``run`` when there is no compatible previous index.
+        """
+        print("Starting incremental indexing...")
         print("=" * 50)
 
-        # Build BM25 index
-        bm25 = self.build_bm25_index(chunks)
+        previous = self.load_previous_index()
+        if previous is None:
+            print("Running a full reindex")
+            return self.run()
+
+        filepaths = self.post_filepaths()
+        changes = previous['manifest'].diff(filepaths)
+        print(f"Changes since last index: {changes.summary()}")
+        if not changes.has_changes:
+            self.embedding_service.close()
+            if changes.current != previous['manifest'].posts:
+                # Record refreshed mtimes so touched files aren't hashed again next time;
+                # published snapshots are never modified, so this is a new one
+                snapshot = SnapshotWriter(self.data_dir)
+                try:
+                    snapshot.carry_over(previous['index_dir'], INDEX_FILES)
+                    previous['manifest'].posts = changes.current
+                    previous['manifest'].save(str(snapshot.path / 'manifest.json'))
+                    snapshot.commit()
+                except BaseException:
+                    snapshot.abort()
+                    raise
+            print("Index is up to date")
+            return
         print("=" * 50)
 
-        # Save artifacts
-        self.save_artifacts(chunks, bm25)
+        # Load and chunk only the posts that changed
+        reprocess = set(changes.added + changes.changed)
+        posts = self.load_posts([path for path in filepaths if Path(path).name in reprocess])
+        new_chunks = self.process_posts(posts) if posts else []
+
+        # Splice them in among the previous chunks of unchanged posts, in filename order
+        previous_store = previous['chunks']
+        previous_chunks = [dict(chunk) for chunk in previous_store]
+        chunks_by_slug: Dict[str, List[Dict[str, Any]]] = {}
+        for chunk in previous_chunks:
+            chunks_by_slug.setdefault(chunk['post_slug'], []).append(chunk)
+        post_texts = {post['slug']: post['text'] for post in previous_store.posts}
+
+        reprocessed_slugs = {post['slug'] for post in posts}
+        for slug in reprocessed_slugs:
+            chunks_by_slug[slug] = []
+        for chunk in new_chunks:
+            chunks_by_slug[chunk['post_slug']].append(chunk)
+        post_texts.update({post['slug']: post['content'] for post in posts})
+
+        chunks = []
+        for path in filepaths:
+            chunks.extend(chunks_by_slug.get(Path(path).stem, []))
+        print(f"Chunk changes: {diff_chunks(previous_chunks, chunks).summary()}")
         print("=" * 50)
 
-        print("Indexing complete!")
+        # Embed only chunks the previous index doesn't have
+        try:
+            self.generate_embeddings(chunks, previous['embedding_store'])
+        finally:
+            self.embedding_service.close()
+        print("=" * 50)
+
+        bm25 = self.build_bm25_index(
+            chunks, previous['bm25'], [chunk['chunk_id'] for chunk in previous_chunks]
+        )
+        print("=" * 50)
+
+        live_slugs = {Path(path).stem for path in filepaths}
+        snapshot = SnapshotWriter(self.data_dir)
+        try:
+            self.save_artifacts(
+                snapshot.path, chunks, bm25,
+                {slug: text for slug, text in post_texts.items() if slug in live_slugs},
+                self.build_manifest(changes.current, chunks)
+            )
+            snapshot.commit()
+        except BaseException:
+            snapshot.abort()
+            raise
+        print("=" * 50)
+
+        print("Incremental indexing complete!")
 
 
 def main():
     """Main entry point for indexing."""
     parser = argparse.ArgumentParser(description='Index blog posts for RAG')
     parser.add_argument('--config', default='config.yaml', help='Path to config file')
-    parser.add_argument('--provider', choices=['local', 'bedrock'],
+    parser.add_argument('--provider', choices=[*LOCAL_PROVIDERS, 'ollama', 'bedrock'],
                        default='local', help='Embedding provider')
     parser.add_argument('--model', help='Embedding model name')
+    parser.add_argument('--embedding-workers', type=int,
+                       help='Processes used to encode chunks with local providers')
+    parser.add_argument('--index-workers', type=int,
+                       help='Processes used to load and chunk posts (default: CPU count)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Only reprocess posts added, changed or deleted since the last index')
 
     args = parser.parse_args()
 
@@ -318,10 +854,17 @@ def main():
         os.environ['EMBEDDING_PROVIDER'] = args.provider
     if args.model:
         os.environ['EMBEDDING_MODEL'] = args.model
+    if args.embedding_workers:
+        os.environ['EMBEDDING_WORKERS'] = str(args.embedding_workers)
+    if args.index_workers:
+        os.environ['INDEX_WORKERS'] = str(args.index_workers)
 
     # Run indexer
     indexer = BlogIndexer(args.config)
-    indexer.run()
+    if args.incremental:
+        indexer.run_incremental()
+    else:
+        indexer.run()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,133 @@
+"""
+Index manifest: which post files an index was built from.
+
+The manifest records each post's path, mtime, content hash and chunk IDs,
+plus the settings that shape chunks and vectors. An incremental reindex
+compares the posts directory against it: files whose mtime is unchanged
+are skipped without being read, and files whose mtime changed are hashed
+so a touch or checkout without edits doesn't count as a change.
+"""
+
+import json
+import hashlib
+import os
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class PostEntry:
+    """A post file as it was when indexed."""
+    slug: str
+    mtime: float
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ManifestDiff:
+    """Post files added, changed, deleted and unchanged since the manifest was written."""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    # Current mtime and hash of every file that exists, by path
+    current: Dict[str, PostEntry] = field(default_factory=dict)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.deleted)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.deleted)} deleted, {len(self.unchanged)} unchanged posts"
+        )
+
+
+def content_sha256(content: str) -> str:
+    """Hash of a post file's text."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class IndexManifest:
+    """Post files and settings an index was built from."""
+
+    VERSION = 1
+
+    def __init__(self, posts: Optional[Dict[str, PostEntry]] = None, settings: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the manifest.
+
+        Args:
+            posts: Entry per post file, keyed by file name
+            settings: Embedding model and chunking settings the index was built with
+        """
+        self.posts = posts or {}
+        self.settings = settings or {}
+
+    def diff(self, filepaths: List[str]) -> ManifestDiff:
+        """
+        Compare post files on disk against the manifest.
+
+        Args:
+            filepaths: Paths of the post files that exist now
+
+        Returns:
+            ManifestDiff keyed by file name
+        """
+        diff = ManifestDiff()
+        seen = set()
+
+        for filepath in filepaths:
+            name = os.path.basename(filepath)
+            seen.add(name)
+            mtime = os.stat(filepath).st_mtime
+            entry = self.posts.get(name)
+
+            if entry is not None and entry.mtime == mtime:
+                diff.current[name] = entry
+                diff.unchanged.append(name)
+                continue
+
+            with open(filepath, 'r', encoding='utf-8') as f:
+                sha256 = content_sha256(f.read())
+            slug = os.path.splitext(name)[0]
+
+            if entry is None:
+                diff.added.append(name)
+                diff.current[name] = PostEntry(slug, mtime, sha256)
+            elif entry.sha256 == sha256:
+                # Touched but not edited
+                diff.unchanged.append(name)
+                diff.current[name] = PostEntry(slug, mtime, sha256, entry.chunk_ids)
+            else:
+                diff.changed.append(name)
+                diff.current[name] = PostEntry(slug, mtime, sha256)
+
+        diff.deleted = sorted(name for name in self.posts if name not in seen)
+        return diff
+
+    def save(self, filepath: str):
+        with open(filepath, 'w') as f:
+            json.dump({
+                'version': self.VERSION,
+                'settings': self.settings,
+                'posts': {name: asdict(entry) for name, entry in sorted(self.posts.items())}
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, filepath: str) -> Optional['IndexManifest']:
+        """Load a manifest, or None if there is none (or it is from another version)."""
+        if not os.path.exists(filepath):
+            return None
+
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != cls.VERSION:
+            return None
+
+        return cls(
+            posts={name: PostEntry(**entry) for name, entry in data['posts'].items()},
+            settings=data.get('settings', {})
+        )
@@ -0,0 +1,191 @@
+"""
+Retrieval pipeline configuration and per-stage tracing.
+
+A hybrid search runs as a fixed sequence of stages:
+
+    candidates  dense and sparse retrieval, each to its own depth
+    fusion      merge candidate lists into one ranking
+    rerank      rescore the fused shortlist (optional)
+    truncate    cut to the requested number of results
+
+``PipelineConfig`` sets how deep each stage goes relative to ``top_k``, and a
+``SearchTrace`` passed to a search records candidate counts and timings per
+stage, so depth can be tuned against latency with measurements.
+
+A ``Deadline`` gives a search a latency budget. Using the typical stage
+durations from a ``LatencyTracker``, the search degrades step by step to
+meet it (shallower candidates, no reranking, sparse-only) and records which
+degradations it applied.
+"""
+
+import math
+import time
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterator, List, Optional
+
+from .router import RouteDecision
+
+
+@dataclass
+class PipelineConfig:
+    """Candidate depth of each retrieval stage, as multiples of top_k."""
+    dense_depth: float = 2.0  # Dense candidates per requested result
+    dense_posts: int = 0  # Posts whose chunks dense retrieval scores (0 = score every chunk)
+    sparse_depth: float = 2.0  # Sparse candidates per requested result
+    sparse_filter_overscan: float = 2.0  # Extra BM25 hits scanned when a tag filter may drop some
+    rerank_depth: float = 1.0  # Fused candidates handed to the reranker per requested result
+
+    def depth(self, factor: float, top_k: int) -> int:
+        """Number of candidates for a stage with the given factor."""
+        return max(1, math.ceil(factor * top_k))
+
+
+@dataclass
+class StageTrace:
+    """Measurements for one pipeline stage."""
+    name: str
+    candidates: int = 0  # Candidates the stage produced
+    start_ms: float = 0.0  # Offset from the start of the search
+    elapsed_ms: float = 0.0
+    detail: Dict[str, Any] = field(default_factory=dict)
+
+
+class SearchTrace:
+    """Collects stage measurements for a single search."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: List[StageTrace] = []
+        # Depths the search ran with, after any deadline cuts; set when it is planned
+        self.pipeline: Optional[PipelineConfig] = None
+
+    def stage(self, name: str, **detail: Any):
+        """Time a stage; the caller sets ``candidates`` on the yielded record."""
+        return traced(self, name, **detail)
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Stages in start order, with totals."""
+        return {
+            'total_ms': self.total_ms,
+            'stages': [asdict(stage) for stage in sorted(self.stages, key=lambda s: s.start_ms)]
+        }
+
+
+class LatencyTracker:
+    """Exponentially weighted mean duration of each stage, across searches."""
+
+    def __init__(self, decay: float = 0.2):
+        """
+        Initialize the tracker.
+
+        Args:
+            decay: Weight of each new observation
+        """
+        self.decay = decay
+        self._means: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, elapsed_ms: float):
+        """Fold one measured duration into the stage's estimate."""
+        with self._lock:
+            mean = self._means.get(name)
+            self._means[name] = elapsed_ms if mean is None else (1 - self.decay) * mean + self.decay * elapsed_ms
+
+    def estimate(self, name: str) -> float:
+        """Typical duration of a stage in milliseconds (0 before it has run)."""
+        return self._means.get(name, 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._means)
+
+
+class Deadline:
+    """Latency budget for one search and the degradations applied to meet it."""
+
+    def __init__(self, budget_ms: float):
+        """
+        Start the clock.
+
+        Args:
+            budget_ms: Time the search may take, from now
+        """
+        self.budget_ms = budget_ms
+        self.expires = time.perf_counter() + budget_ms / 1000
+        self.degradations: List[str] = []
+
+    def remaining_ms(self) -> float:
+        return (self.expires - time.perf_counter()) * 1000
+
+    def degrade(self, name: str):
+        """Record a degradation (once)."""
+        if name not in self.degradations:
+            self.degradations.append(name)
+
+    def degraded(self, name: str) -> bool:
+        return name in self.degradations
+
+
+@dataclass
+class SearchPlan:
+    """How one search runs: per-call options resolved against defaults, routing and deadline."""
+    top_k: int
+    rerank: bool
+    fusion: str
+    rerank_budget_ms: Optional[float]
+    route: RouteDecision
+    pipeline: PipelineConfig
+    trace: Optional[SearchTrace] = None
+    deadline: Optional[Deadline] = None
+
+    @property
+    def dense_depth(self) -> int:
+        return self.pipeline.depth(self.pipeline.dense_depth, self.top_k)
+
+    @property
+    def sparse_depth(self) -> int:
+        return self.pipeline.depth(self.pipeline.sparse_depth, self.top_k)
+
+    @property
+    def fusion_depth(self) -> int:
+        # The reranker may promote candidates from below top_k, so fuse deeper when reranking
+        if not self.rerank:
+            return self.top_k
+        return max(self.pipeline.depth(self.pipeline.rerank_depth, self.top_k), self.top_k)
+
+    @property
+    def degraded(self) -> bool:
+        return self.deadline is not None and bool(self.deadline.degradations)
+
+
+@contextmanager
+def traced(
+    trace: Optional[SearchTrace],
+    name: str,
+    tracker: Optional[LatencyTracker] = None,
+    **detail: Any
+) -> Iterator[StageTrace]:
+    """
+    Time a stage into a trace and/or latency tracker.
+
+    Either may be None; with neither, the yielded record is simply discarded.
+    """
+    record = StageTrace(name=name, detail=dict(detail))
+    start = time.perf_counter()
+    if trace is not None:
+        record.start_ms = (start - trace.started) * 1000
+    try:
+        yield record
+    finally:
+        record.elapsed_ms = (time.perf_counter() - start) * 1000
+        if trace is not None:
+            # list.append is atomic, so stages running on worker threads can record concurrently
+            trace.stages.append(record)
+        if tracker is not None:
+            tracker.observe(name, record.elapsed_ms)
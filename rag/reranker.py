@@ -0,0 +1,161 @@
+"""
+Reranking for the fused search shortlist: a cross-encoder model, and the
+lexical features used by the cheap term-overlap heuristic.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional
+
+import numpy as np
+
+
+class LexicalFeatures:
+    """
+    Per-chunk token sets for the term-overlap reranking heuristic.
+
+    Built once when the index is loaded so reranking is pure set
+    intersection. Titles and headings repeat across a post's chunks, so their
+    sets are shared rather than rebuilt per chunk.
+    """
+
+    EMPTY: FrozenSet[str] = frozenset()
+
+    def __init__(self, chunks: List[Dict]):
+        """
+        Tokenize every chunk.
+
+        Args:
+            chunks: Chunk dictionaries, in row order
+        """
+        interned: Dict[str, FrozenSet[str]] = {}
+
+        def terms(text: Optional[str]) -> FrozenSet[str]:
+            if not text:
+                return self.EMPTY
+            if text not in interned:
+                interned[text] = self.tokenize(text)
+            return interned[text]
+
+        self.content_terms = [self.tokenize(chunk['content']) for chunk in chunks]
+        self.title_terms = [terms(chunk.get('post_title')) for chunk in chunks]
+        self.heading_terms = [terms(chunk.get('section_heading')) for chunk in chunks]
+
+    @staticmethod
+    def tokenize(text: str) -> FrozenSet[str]:
+        """Lowercased whitespace tokens, matching how queries are split."""
+        return frozenset(text.lower().split())
+
+
+class CrossEncoderReranker:
+    """
+    Rerank results with a cross-encoder (e.g. ms-marco-MiniLM-L-6-v2).
+
+    Only the fused shortlist is scored, in a single batched forward pass on
+    CPU. Scores are cached per (query, chunk_id), and the observed cost per
+    pair is tracked so a search with a latency budget can skip the model
+    when it would not finish in time.
+    """
+
+    def __init__(
+        self,
+        model_name: str = 'cross-encoder/ms-marco-MiniLM-L-6-v2',
+        max_length: int = 512,
+        cache_size: int = 4096
+    ):
+        """
+        Initialize the reranker.
+
+        Args:
+            model_name: Cross-encoder model to load
+            max_length: Maximum tokens per (query, passage) pair
+            cache_size: Number of (query, chunk_id) scores to keep
+        """
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ImportError("Please install sentence-transformers: pip install sentence-transformers")
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, max_length=max_length, device='cpu')
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Exponentially weighted cost of scoring one pair, from observed passes
+        self._per_pair_ms: Optional[float] = None
+
+    def estimate_ms(self, num_pairs: int) -> float:
+        """Estimate the cost of scoring num_pairs uncached pairs (0 before any measurement)."""
+        if self._per_pair_ms is None:
+            return 0.0
+        return self._per_pair_ms * num_pairs
+
+    def rerank(self, query: str, results: List, top_k: int,
+               budget_ms: Optional[float] = None) -> Optional[List]:
+        """
+        Rescore results with the cross-encoder.
+
+        Args:
+            query: Search query
+            results: SearchResult objects from fusion
+            top_k: Number of results to return
+            budget_ms: Skip the model if scoring is expected to take longer
+
+        Returns:
+            Reranked results, or None if reranking was skipped for the budget
+        """
+        normalized_query = ' '.join(query.lower().split())
+        scores = np.zeros(len(results), dtype=np.float32)
+        missing = []
+
+        with self._lock:
+            for i, result in enumerate(results):
+                cached = self._cache.get((normalized_query, result.chunk_id))
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end((normalized_query, result.chunk_id))
+                    scores[i] = cached
+
+        if budget_ms is not None and self.estimate_ms(len(missing)) > budget_ms:
+            return None
+
+        if missing:
+            pairs = [(query, self._passage(results[i])) for i in missing]
+
+            start = time.perf_counter()
+            # One batch covering the whole shortlist: a single forward pass
+            logits = self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+            self._record_timing((time.perf_counter() - start) * 1000, len(pairs))
+
+            # Sigmoid maps ms-marco logits to 0-1 like the other scores
+            probabilities = 1.0 / (1.0 + np.exp(-np.asarray(logits, dtype=np.float32)))
+
+            with self._lock:
+                for i, probability in zip(missing, probabilities):
+                    scores[i] = probability
+                    self._cache[(normalized_query, results[i].chunk_id)] = float(probability)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        for result, score in zip(results, scores):
+            result.score = float(score)
+
+        return sorted(results, key=lambda x: x.score, reverse=True)[:top_k]
+
+    @staticmethod
+    def _passage(result) -> str:
+        """Text scored against the query for a result."""
+        if result.section_heading:
+            return f"{result.section_heading}\n{result.content}"
+        return result.content
+
+    def _record_timing(self, elapsed_ms: float, num_pairs: int, decay: float = 0.2):
+        """Fold one measured forward pass into the per-pair cost estimate."""
+        per_pair = elapsed_ms / num_pairs
+        if self._per_pair_ms is None:
+            self._per_pair_ms = per_pair
+        else:
+            self._per_pair_ms = (1 - decay) * self._per_pair_ms + decay * per_pair
@@ -0,0 +1,115 @@
+"""
+Per-query routing between dense and sparse retrieval.
+
+Short identifier-like queries ("bm25", "pydantic-ai") are answered well by
+BM25 alone, and dense retrieval costs an embedding call (a network round
+trip for hosted providers). The router inspects the query against the BM25
+vocabulary and decides which retrievers to run and how to weight them.
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from .bm25 import BM25
+
+
+@dataclass
+class RouteDecision:
+    """Which retrievers to run for a query, and the dense weight for fusion."""
+    use_dense: bool
+    use_sparse: bool
+    alpha: float
+    reason: str
+
+    @property
+    def route(self) -> str:
+        if self.use_dense and self.use_sparse:
+            return 'hybrid'
+        return 'dense' if self.use_dense else 'sparse'
+
+
+class QueryRouter:
+    """Rule-based query classifier using the BM25 vocabulary."""
+
+    QUESTION_WORDS = {
+        'what', 'why', 'how', 'when', 'where', 'which', 'who', 'can', 'should',
+        'does', 'do', 'is', 'are', 'explain', 'compare', 'describe'
+    }
+
+    def __init__(
+        self,
+        bm25_model: BM25,
+        alpha: float = 0.7,
+        keyword_max_words: int = 2,
+        question_alpha: float = 0.85,
+        question_min_words: int = 6
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            bm25_model: Fitted BM25 model whose vocabulary decides keyword matches
+            alpha: Dense weight for ordinary hybrid queries
+            keyword_max_words: Longest query that may be routed to BM25 alone
+            question_alpha: Dense weight for natural-language questions
+            question_min_words: Queries at least this long count as natural language
+        """
+        self.bm25_model = bm25_model
+        self.alpha = alpha
+        self.keyword_max_words = keyword_max_words
+        self.question_alpha = question_alpha
+        self.question_min_words = question_min_words
+
+        self._lock = threading.Lock()
+        self.routes: Counter = Counter()
+        self.embeddings_avoided = 0
+        self.fallbacks = 0
+
+    def route(self, query: str) -> RouteDecision:
+        """Decide how to retrieve for a query and record the decision."""
+        decision = self._classify(query)
+
+        with self._lock:
+            self.routes[decision.route] += 1
+            if not decision.use_dense:
+                self.embeddings_avoided += 1
+
+        return decision
+
+    def record_fallback(self):
+        """Record that a sparse-only route returned too little and dense retrieval ran anyway."""
+        with self._lock:
+            self.fallbacks += 1
+            self.embeddings_avoided -= 1
+
+    def _classify(self, query: str) -> RouteDecision:
+        words = query.split()
+        vocabulary = self.bm25_model.idf
+        word_terms = [self.bm25_model.tokenize(word) for word in words]
+        known_terms = [term for terms in word_terms for term in terms if term in vocabulary]
+
+        if not known_terms:
+            # BM25 would return nothing
+            return RouteDecision(True, False, 1.0, 'no-keyword-match')
+
+        is_question = query.rstrip().endswith('?') or words[0].lower() in self.QUESTION_WORDS
+        if is_question or len(words) >= self.question_min_words:
+            return RouteDecision(True, True, self.question_alpha, 'natural-language')
+
+        # Every word is a term the corpus contains: a keyword lookup
+        if len(words) <= self.keyword_max_words and all(
+            terms and all(term in vocabulary for term in terms) for terms in word_terms
+        ):
+            return RouteDecision(False, True, 0.0, 'keyword')
+
+        return RouteDecision(True, True, self.alpha, 'default')
+
+    def stats(self) -> Dict[str, Any]:
+        """Return route counts and embedding calls avoided."""
+        return {
+            'routes': dict(self.routes),
+            'embeddings_avoided': self.embeddings_avoided,
+            'fallbacks': self.fallbacks
+        }
@@ -1,14 +1,26 @@
 """
 Hybrid search implementation combining dense and sparse retrieval.
-Uses Reciprocal Rank Fusion (RRF) to merge results.
+Merges results with a pluggable fusion strategy (Reciprocal Rank Fusion by
+default, see rag.fusion).
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Tuple
 import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 from .embeddings import EmbeddingStore, EmbeddingService
 from .bm25 import BM25
+from .cache import SearchCache
+from .fusion import fuse, FusionResult, RankedList
+from .reranker import LexicalFeatures
+from .pipeline import PipelineConfig, SearchTrace, SearchPlan, Deadline, LatencyTracker, traced
+from .diversity import mmr_select
+from .router import QueryRouter, RouteDecision
+
+# Candidates of a retriever that was not run
+EMPTY_RANKED_LIST: RankedList = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
 
 
 @dataclass
@@ -23,6 +35,7 @@ class SearchResult:
     tags: List[str]
     url: str
     source_type: str  # 'dense', 'sparse', or 'hybrid'
+    position: int = 0  # Chunk position within its post
 
 
 class HybridSearch:
@@ -30,13 +43,26 @@ class HybridSearch:
     Hybrid search combining semantic (dense) and keyword (sparse) search.
     """
 
+    # Under a deadline, skip dense retrieval if embedding alone typically takes this share of the budget
+    EMBED_BUDGET_SHARE = 0.8
+
     def __init__(
         self,
         embedding_store: EmbeddingStore,
         embedding_service: EmbeddingService,
         bm25_model: BM25,
         chunks: List[Dict],
-        alpha: float = 0.7
+        alpha: float = 0.7,
+        max_workers: int = 4,
+        embed_workers: int = 4,
+        cache: Optional[SearchCache] = None,
+        index_version: Optional[str] = None,
+        fusion: str = 'rrf',
+        rrf_k: float = 60,
+        reranker=None,
+        rerank_budget_ms: Optional[float] = None,
+        pipeline: Optional[PipelineConfig] = None,
+        router: Optional[QueryRouter] = None
     ):
         """
         Initialize hybrid search.
@@ -47,22 +73,73 @@ class HybridSearch:
             bm25_model: BM25 model for sparse retrieval
             chunks: List of chunk dictionaries with content and metadata
             alpha: Weight for dense retrieval (0-1, where 1 = only dense)
+            max_workers: Threads available to ``asearch`` for retrieval,
+                fusion and reranking
+            embed_workers: Threads available for query embedding calls
+            cache: Optional result cache shared across searches
+            index_version: Identifier of the loaded index; a cache holding
+                results for a different version is flushed
+            fusion: Default fusion strategy ('rrf', 'minmax', 'zscore' or 'dbsf')
+            rrf_k: Rank constant for RRF fusion
+            reranker: Optional CrossEncoderReranker; without one, reranking
+                uses the lexical heuristic
+            rerank_budget_ms: Default time allowed for cross-encoder reranking;
+                over budget, the lexical heuristic is used instead
+            pipeline: Candidate depths per stage (defaults to PipelineConfig())
+            router: Optional QueryRouter choosing retrievers and alpha per
+                query; without one every query runs both with ``alpha``
         """
         self.embedding_store = embedding_store
         self.embedding_service = embedding_service
         self.bm25_model = bm25_model
         self.chunks = chunks
         self.alpha = alpha
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.reranker = reranker
+        self.rerank_budget_ms = rerank_budget_ms
+        self.pipeline = pipeline or PipelineConfig()
+        self.router = router
+
+        # Typical stage durations, used to plan searches that have a deadline
+        self.latency = LatencyTracker()
+
+        # Bounded so a burst of requests queues here instead of spawning threads
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hybrid-search')
+        # Embedding calls get their own pool: an abandoned call to a slow
+        # provider keeps its thread, and must not hold up the BM25 fallback
+        self._embed_executor = ThreadPoolExecutor(max_workers=embed_workers, thread_name_prefix='hybrid-search-embed')
+
+        self.cache = cache
+        if self.cache is not None:
+            self.cache.set_version(index_version)
 
         # Create chunk ID to index mapping
         self.chunk_id_to_idx = {chunk['chunk_id']: i for i, chunk in enumerate(chunks)}
 
+        # Token sets for heuristic reranking, computed once per index load
+        self.lexical_features = LexicalFeatures(chunks)
+
+        # Embedding store rows may not line up with chunk rows; translate once
+        self._store_row_to_chunk_row = np.array(
+            [self.chunk_id_to_idx.get(chunk_id, -1) for chunk_id in embedding_store.chunk_ids],
+            dtype=np.int64
+        )
+        self._chunk_row_to_store_row = np.full(len(chunks), -1, dtype=np.int64)
+        known = self._store_row_to_chunk_row >= 0
+        self._chunk_row_to_store_row[self._store_row_to_chunk_row[known]] = np.flatnonzero(known)
+
     def search(
         self,
         query: str,
         top_k: int = 10,
         filter_tags: Optional[List[str]] = None,
-        rerank: bool = True
+        rerank: bool = True,
+        query_embedding: Optional[np.ndarray] = None,
+        fusion: Optional[str] = None,
+        rerank_budget_ms: Optional[float] = None,
+        trace: Optional[SearchTrace] = None,
+        deadline: Optional[Deadline] = None
     ) -> List[SearchResult]:
         """
         Perform hybrid search.
@@ -72,161 +149,507 @@ class HybridSearch:
             top_k: Number of results to return
             filter_tags: Optional tag filter
             rerank: Whether to apply reranking
+            query_embedding: Precomputed query vector (skips the embedding call)
+            fusion: Fusion strategy for this search (defaults to the instance's)
+            rerank_budget_ms: Cross-encoder time budget for this search
+            trace: Records per-stage candidate counts and timings when given;
+                a traced search always runs the pipeline instead of reading
+                the cache
+            deadline: Latency budget; the search degrades to meet it and
+                lists what it gave up in ``deadline.degradations``
 
         Returns:
             List of SearchResult objects
         """
+        fusion = fusion or self.fusion
+        if rerank_budget_ms is None:
+            rerank_budget_ms = self.rerank_budget_ms
+        cache_key, cached = self._cache_lookup(
+            query, top_k, filter_tags, rerank, query_embedding, trace,
+            fusion=fusion, rerank_budget_ms=rerank_budget_ms
+        )
+        if cached is not None:
+            return cached
+
+        plan = self._plan(query, top_k, rerank, query_embedding, fusion, rerank_budget_ms, trace, deadline)
+
         # Get dense retrieval results
-        dense_results = self._dense_search(query, top_k * 2, filter_tags)
+        dense_results = self._dense_search(
+            query, plan.dense_depth, filter_tags, query_embedding, trace
+        ) if plan.route.use_dense else EMPTY_RANKED_LIST
 
         # Get sparse retrieval results
-        sparse_results = self._sparse_search(query, top_k * 2, filter_tags)
+        sparse_results = self._sparse_search(
+            query, plan.sparse_depth, filter_tags, trace
+        ) if plan.route.use_sparse else EMPTY_RANKED_LIST
+
+        if self._keyword_route_underfilled(plan, sparse_results):
+            plan.route = RouteDecision(True, True, self.alpha, 'keyword-fallback')
+            dense_results = self._dense_search(query, plan.dense_depth, filter_tags, query_embedding, trace)
+
+        results = self._merge_results(query, dense_results, sparse_results, plan)
+        if not plan.degraded:
+            self._cache_store(cache_key, results)
+        return results
 
-        # Merge results using RRF
-        merged_results = self._reciprocal_rank_fusion(
-            dense_results, sparse_results, top_k
+    async def asearch(
+        self,
+        query: str,
+        top_k: int = 10,
+        filter_tags: Optional[List[str]] = None,
+        rerank: bool = True,
+        query_embedding: Optional[np.ndarray] = None,
+        fusion: Optional[str] = None,
+        rerank_budget_ms: Optional[float] = None,
+        trace: Optional[SearchTrace] = None,
+        deadline: Optional[Deadline] = None
+    ) -> List[SearchResult]:
+        """
+        Perform hybrid search without blocking the event loop.
+
+        Dense and sparse retrieval run concurrently on the search executor, so
+        latency is the slower of the two rather than their sum. The query is
+        embedded on a separate executor. With a deadline, dense results that
+        arrive too late are abandoned in favour of sparse-only results.
+        Arguments are the same as ``search``.
+        """
+        fusion = fusion or self.fusion
+        if rerank_budget_ms is None:
+            rerank_budget_ms = self.rerank_budget_ms
+        cache_key, cached = self._cache_lookup(
+            query, top_k, filter_tags, rerank, query_embedding, trace,
+            fusion=fusion, rerank_budget_ms=rerank_budget_ms
         )
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        plan = self._plan(query, top_k, rerank, query_embedding, fusion, rerank_budget_ms, trace, deadline)
+
+        dense_future = asyncio.ensure_future(
+            self._adense_search(query, plan.dense_depth, filter_tags, query_embedding, trace)
+        ) if plan.route.use_dense else None
+        sparse_future = loop.run_in_executor(
+            self._executor, self._sparse_search, query, plan.sparse_depth, filter_tags, trace
+        ) if plan.route.use_sparse else None
+
+        sparse_results = await self._await_sparse(sparse_future, plan)
+        dense_results = await self._await_dense(dense_future, plan)
+
+        if self._keyword_route_underfilled(plan, sparse_results):
+            plan.route = RouteDecision(True, True, self.alpha, 'keyword-fallback')
+            dense_results = await self._await_dense(asyncio.ensure_future(
+                self._adense_search(query, plan.dense_depth, filter_tags, query_embedding, trace)
+            ), plan)
+
+        # Reranking may run a model; keep it off the event loop too
+        results = await loop.run_in_executor(
+            self._executor, self._merge_results, query, dense_results, sparse_results, plan
+        )
+        if not plan.degraded:
+            self._cache_store(cache_key, results)
+        return results
+
+    def diversify(
+        self,
+        results: List[SearchResult],
+        k: int,
+        lambda_mult: float = 0.7
+    ) -> List[SearchResult]:
+        """
+        Pick k results that are relevant but not redundant, using MMR.
+
+        Args:
+            results: Search results, best first
+            k: Number of results to keep
+            lambda_mult: Relevance/diversity trade-off (1 = relevance only)
+
+        Returns:
+            Selected results, in selection order
+        """
+        if len(results) <= k:
+            return results
+
+        store_rows = self._chunk_row_to_store_row[[self.chunk_id_to_idx[r.chunk_id] for r in results]]
+        if (store_rows < 0).any():
+            # Without vectors for every candidate there is nothing to compare
+            return results[:k]
+
+        scores = np.array([r.score for r in results], dtype=np.float64)
+        relevance = scores / scores.max() if scores.max() > 0 else np.ones_like(scores)
+
+        selected = mmr_select(self.embedding_store.normalized_rows(store_rows), relevance, k, lambda_mult)
+        return [results[i] for i in selected]
+
+    async def aembed_query(self, query: str, trace: Optional[SearchTrace] = None) -> np.ndarray:
+        """Embed a query on the embedding executor, e.g. to reuse it across calls."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._embed_executor, self._embed_query, query, trace)
+
+    def close(self):
+        """Release the search executors."""
+        self._executor.shutdown(wait=False)
+        self._embed_executor.shutdown(wait=False)
+
+    def _plan(
+        self,
+        query: str,
+        top_k: int,
+        rerank: bool,
+        query_embedding: Optional[np.ndarray],
+        fusion: str,
+        rerank_budget_ms: Optional[float],
+        trace: Optional[SearchTrace],
+        deadline: Optional[Deadline]
+    ) -> SearchPlan:
+        """Route the query and, under a deadline, cut whatever is not expected to fit."""
+        plan = SearchPlan(
+            top_k=top_k,
+            rerank=rerank,
+            fusion=fusion,
+            rerank_budget_ms=rerank_budget_ms,
+            route=self._route(query, query_embedding, trace),
+            pipeline=self.pipeline,
+            trace=trace,
+            deadline=deadline
+        )
+        if deadline is not None:
+            self._fit_deadline(plan, query_embedding)
+        if trace is not None:
+            # Explain output reports the depths this search actually used
+            trace.pipeline = plan.pipeline
+        return plan
+
+    def _fit_deadline(self, plan: SearchPlan, query_embedding: Optional[np.ndarray]):
+        """Drop dense retrieval or shrink depths when the plan is not expected to meet its deadline."""
+        deadline = plan.deadline
+        estimate = self.latency.estimate
+        remaining = deadline.remaining_ms()
+
+        # A slow embedding provider would eat the budget: retrieve with BM25 only
+        embedding_too_slow = (
+            query_embedding is None and estimate('embed') > remaining * self.EMBED_BUDGET_SHARE
+        )
+        if plan.route.use_dense and plan.route.use_sparse and (
+            embedding_too_slow or deadline.degraded('sparse-only')
+        ):
+            deadline.degrade('sparse-only')
+            plan.route = RouteDecision(False, True, 0.0, 'deadline')
+
+        expected_ms = max(
+            self._dense_estimate(query_embedding) if plan.route.use_dense else 0.0,
+            estimate('sparse') if plan.route.use_sparse else 0.0
+        ) + estimate('fusion') + (estimate('rerank') if plan.rerank else 0.0)
+        if expected_ms > remaining:
+            deadline.degrade('shrunk-depth')
+            plan.pipeline = replace(self.pipeline, dense_depth=1.0, sparse_depth=1.0, rerank_depth=1.0)
+
+    def _dense_estimate(self, query_embedding: Optional[np.ndarray]) -> float:
+        """Typical dense retrieval time, including the embedding call when there is one."""
+        embed_ms = self.latency.estimate('embed') if query_embedding is None else 0.0
+        return embed_ms + self.latency.estimate('dense')
+
+    async def _await_sparse(self, sparse_future, plan: SearchPlan) -> RankedList:
+        """Wait for sparse results, giving up on them if they would break the deadline."""
+        if sparse_future is None:
+            return EMPTY_RANKED_LIST
+
+        deadline = plan.deadline
+        if deadline is None:
+            return await sparse_future
+
+        try:
+            return await asyncio.wait_for(sparse_future, timeout=max(deadline.remaining_ms(), 0.0) / 1000)
+        except asyncio.TimeoutError:
+            deadline.degrade('sparse-timeout')
+            return EMPTY_RANKED_LIST
+
+    async def _await_dense(self, dense_future, plan: SearchPlan) -> RankedList:
+        """Wait for dense results, giving up on them if they would break the deadline."""
+        if dense_future is None:
+            return EMPTY_RANKED_LIST
+
+        deadline = plan.deadline
+        if deadline is None or not plan.route.use_sparse:
+            # Without sparse results to fall back on, dense results are needed regardless
+            return await dense_future
+
+        # Leave time to fuse and rerank whatever arrives
+        reserve_ms = self.latency.estimate('fusion') + (self.latency.estimate('rerank') if plan.rerank else 0.0)
+        timeout = max(deadline.remaining_ms() - reserve_ms, 0.0) / 1000
+        try:
+            return await asyncio.wait_for(dense_future, timeout=timeout)
+        except asyncio.TimeoutError:
+            # An embedding call in flight finishes in the background on the
+            # embedding executor; its result is dropped
+            deadline.degrade('dense-timeout')
+            plan.route = RouteDecision(False, True, 0.0, 'deadline')
+            return EMPTY_RANKED_LIST
+
+    def _route(
+        self,
+        query: str,
+        query_embedding: Optional[np.ndarray],
+        trace: Optional[SearchTrace] = None
+    ) -> RouteDecision:
+        """Choose retrievers for a query; with a precomputed embedding, dense retrieval is free."""
+        if self.router is None or query_embedding is not None:
+            return RouteDecision(True, True, self.alpha, 'fixed')
+
+        with traced(trace, 'route') as stage:
+            route = self.router.route(query)
+            stage.detail.update(route=route.route, reason=route.reason, alpha=route.alpha)
+        return route
+
+    def _keyword_route_underfilled(self, plan: SearchPlan, sparse_results: RankedList) -> bool:
+        """Whether a sparse-only keyword route found fewer than top_k hits and needs dense retrieval after all."""
+        if plan.route.reason != 'keyword' or len(sparse_results[0]) >= plan.top_k:
+            return False
+        if plan.deadline is not None and self._dense_estimate(None) > plan.deadline.remaining_ms():
+            return False
+        self.router.record_fallback()
+        return True
+
+    def _cache_lookup(
+        self,
+        query: str,
+        top_k: int,
+        filter_tags: Optional[List[str]],
+        rerank: bool,
+        query_embedding: Optional[np.ndarray],
+        trace: Optional[SearchTrace] = None,
+        **options
+    ) -> Tuple[Optional[Tuple], Optional[List[SearchResult]]]:
+        """Return the cache key for a search and any cached results for it."""
+        if self.cache is None:
+            return None, None
+
+        key = self.cache.make_key(query, top_k, filter_tags, rerank, query_embedding, **options)
+        if trace is not None:
+            # A traced search is for measuring the pipeline, so run it
+            return key, None
+        return key, self.cache.get(key)
+
+    def _cache_store(self, key: Optional[Tuple], results: List[SearchResult]):
+        """Cache results under key when caching is enabled."""
+        if key is not None:
+            self.cache.put(key, results)
+
+    def _merge_results(
+        self,
+        query: str,
+        dense_results: RankedList,
+        sparse_results: RankedList,
+        plan: SearchPlan
+    ) -> List[SearchResult]:
+        """Fuse dense and sparse candidates, optionally rerank them, and cut to top_k."""
+        trace, deadline = plan.trace, plan.deadline
+        alpha = plan.route.alpha
+
+        with traced(trace, 'fusion', self.latency, strategy=plan.fusion) as stage:
+            fused = fuse(
+                [dense_results, sparse_results],
+                weights=[alpha, 1 - alpha],
+                top_k=plan.fusion_depth,
+                strategy=plan.fusion,
+                rrf_k=self.rrf_k
+            )
+            merged_results = self._build_results(fused)
+            stage.candidates = len(merged_results)
 
         # Optional reranking
-        if rerank and len(merged_results) > 0:
-            merged_results = self._rerank_results(query, merged_results, top_k)
+        if plan.rerank and len(merged_results) > 0:
+            rerank_budget_ms = plan.rerank_budget_ms
+            if deadline is not None:
+                remaining = deadline.remaining_ms()
+                rerank_budget_ms = remaining if rerank_budget_ms is None else min(rerank_budget_ms, remaining)
+
+            if deadline is not None and self.latency.estimate('rerank') > deadline.remaining_ms():
+                deadline.degrade('skipped-rerank')
+            else:
+                with traced(trace, 'rerank', self.latency) as stage:
+                    merged_results, method = self._rerank_results(
+                        query, merged_results, plan.top_k, rerank_budget_ms
+                    )
+                    stage.detail['method'] = method
+                    stage.candidates = len(merged_results)
+                if deadline is not None and self.reranker is not None and method == 'heuristic':
+                    deadline.degrade('heuristic-rerank')
+
+        with traced(trace, 'truncate') as stage:
+            merged_results = merged_results[:plan.top_k]
+            stage.candidates = len(merged_results)
 
         return merged_results
 
+    def _embed_query(self, query: str, trace: Optional[SearchTrace] = None) -> np.ndarray:
+        """Embed a query, timing the call."""
+        with traced(trace, 'embed', self.latency):
+            return self.embedding_service.embed_query(query)
+
+    async def _adense_search(
+        self,
+        query: str,
+        top_k: int,
+        filter_tags: Optional[List[str]],
+        query_embedding: Optional[np.ndarray] = None,
+        trace: Optional[SearchTrace] = None
+    ) -> RankedList:
+        """Dense retrieval for ``asearch``: embed on the embedding executor, then search on the search executor."""
+        if query_embedding is None:
+            query_embedding = await self.aembed_query(query, trace)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._dense_search, query, top_k, filter_tags, query_embedding, trace
+        )
+
     def _dense_search(
         self,
         query: str,
         top_k: int,
-        filter_tags: Optional[List[str]]
-    ) -> List[Tuple[str, float]]:
+        filter_tags: Optional[List[str]],
+        query_embedding: Optional[np.ndarray] = None,
+        trace: Optional[SearchTrace] = None
+    ) -> RankedList:
         """
         Perform dense retrieval using embeddings.
 
         Returns:
-            List of (chunk_id, score) tuples
+            (chunk rows, scores) arrays, best first
         """
-        # Generate query embedding
-        query_embedding = self.embedding_service.embed_query(query)
-
-        # Search in embedding store
-        results = self.embedding_store.search(
-            query_embedding,
-            top_k=top_k,
-            filter_tags=filter_tags
-        )
+        # Generate query embedding unless the caller already has one
+        if query_embedding is None:
+            query_embedding = self._embed_query(query, trace)
+
+        num_posts = self.pipeline.dense_posts
+        with traced(trace, 'dense', self.latency, depth=top_k, posts=num_posts) as stage:
+            # Search in embedding store, optionally only within the closest posts
+            if num_posts > 0:
+                store_rows, scores = self.embedding_store.search_hierarchical(
+                    query_embedding,
+                    top_k=top_k,
+                    num_posts=num_posts,
+                    filter_tags=filter_tags
+                )
+            else:
+                store_rows, scores = self.embedding_store.search_indices(
+                    query_embedding,
+                    top_k=top_k,
+                    filter_tags=filter_tags
+                )
 
-        return [(r['chunk_id'], r['score']) for r in results]
+            rows = self._store_row_to_chunk_row[store_rows]
+            known = rows >= 0
+            stage.candidates = int(known.sum())
+            return rows[known], scores[known]
 
     def _sparse_search(
         self,
         query: str,
         top_k: int,
-        filter_tags: Optional[List[str]]
-    ) -> List[Tuple[str, float]]:
+        filter_tags: Optional[List[str]],
+        trace: Optional[SearchTrace] = None
+    ) -> RankedList:
         """
         Perform sparse retrieval using BM25.
 
         Returns:
-            List of (chunk_id, score) tuples
+            (chunk rows, scores) arrays, best first
         """
-        # Search with BM25
-        bm25_results = self.bm25_model.search(query, top_k=top_k * 2)
+        # Scan past top_k only when the tag filter may discard hits
+        scan_depth = self.pipeline.depth(self.pipeline.sparse_filter_overscan, top_k) if filter_tags else top_k
+
+        with traced(trace, 'sparse', self.latency, depth=top_k, scanned=scan_depth) as stage:
+            # Search with BM25
+            bm25_results = self.bm25_model.search(query, top_k=scan_depth)
 
-        # Apply tag filter if specified
-        filtered_results = []
-        for doc_idx, score in bm25_results:
-            chunk = self.chunks[doc_idx]
+            # Apply tag filter if specified
+            rows = []
+            scores = []
+            for doc_idx, score in bm25_results:
+                if filter_tags:
+                    chunk_tags = self.chunks[doc_idx].get('tags', [])
+                    if not any(tag in chunk_tags for tag in filter_tags):
+                        continue
 
-            if filter_tags:
-                if not any(tag in chunk.get('tags', []) for tag in filter_tags):
-                    continue
+                rows.append(doc_idx)
+                scores.append(score)
 
-            filtered_results.append((chunk['chunk_id'], score))
+                if len(rows) >= top_k:
+                    break
 
-            if len(filtered_results) >= top_k:
-                break
+            stage.candidates = len(rows)
+            return np.array(rows, dtype=np.int64), np.array(scores, dtype=np.float64)
+
+    def _build_results(self, fused: FusionResult) -> List[SearchResult]:
+        """Create SearchResult objects for fused chunk rows."""
+        results = []
+        for row, score, in_dense, in_sparse in zip(
+            fused.rows, fused.scores, fused.membership[0], fused.membership[1]
+        ):
+            chunk = self.chunks[row]
+
+            # Determine source type
+            if in_dense and in_sparse:
+                source_type = 'hybrid'
+            elif in_dense:
+                source_type = 'dense'
+            else:
+                source_type = 'sparse'
+
+            results.append(SearchResult(
+                chunk_id=chunk['chunk_id'],
+                content=chunk['content'],
+                score=float(score),
+                post_slug=chunk['post_slug'],
+                post_title=chunk['post_title'],
+                section_heading=chunk.get('section_heading'),
+                tags=chunk.get('tags', []),
+                url=f"/{chunk['post_slug']}{chunk.get('url_fragment', '')}",
+                source_type=source_type,
+                position=chunk.get('position', 0)
+            ))
 
-        return filtered_results
+        return results
 
-    def _reciprocal_rank_fusion(
+    def _rerank_results(
         self,
-        dense_results: List[Tuple[str, float]],
-        sparse_results: List[Tuple[str, float]],
-        top_k: int
-    ) -> List[SearchResult]:
+        query: str,
+        results: List[SearchResult],
+        top_k: int,
+        budget_ms: Optional[float] = None
+    ) -> Tuple[List[SearchResult], str]:
         """
-        Merge results using Reciprocal Rank Fusion.
+        Rerank results with the cross-encoder when one is configured.
+
+        Falls back to the lexical heuristic when there is no cross-encoder or
+        when it would not fit in the latency budget.
 
-        RRF score = Σ(1 / (k + rank_i))
-        where k is a constant (typically 60) and rank_i is the rank in list i
+        Returns:
+            Reranked results and the method used ('cross-encoder' or 'heuristic')
         """
-        k = 60  # RRF constant
-        scores = {}
-
-        # Calculate RRF scores for dense results
-        for rank, (chunk_id, _) in enumerate(dense_results):
-            if chunk_id not in scores:
-                scores[chunk_id] = {'dense': 0, 'sparse': 0, 'rrf': 0}
-            scores[chunk_id]['dense'] = self.alpha / (k + rank + 1)
-
-        # Calculate RRF scores for sparse results
-        for rank, (chunk_id, _) in enumerate(sparse_results):
-            if chunk_id not in scores:
-                scores[chunk_id] = {'dense': 0, 'sparse': 0, 'rrf': 0}
-            scores[chunk_id]['sparse'] = (1 - self.alpha) / (k + rank + 1)
-
-        # Combine scores
-        for chunk_id in scores:
-            scores[chunk_id]['rrf'] = scores[chunk_id]['dense'] + scores[chunk_id]['sparse']
-
-        # Sort by RRF score
-        sorted_chunks = sorted(
-            scores.items(),
-            key=lambda x: x[1]['rrf'],
-            reverse=True
-        )[:top_k]
-
-        # Create SearchResult objects
-        results = []
-        for chunk_id, score_dict in sorted_chunks:
-            if chunk_id in self.chunk_id_to_idx:
-                chunk = self.chunks[self.chunk_id_to_idx[chunk_id]]
-
-                # Determine source type
-                if score_dict['dense'] > 0 and score_dict['sparse'] > 0:
-                    source_type = 'hybrid'
-                elif score_dict['dense'] > 0:
-                    source_type = 'dense'
-                else:
-                    source_type = 'sparse'
-
-                result = SearchResult(
-                    chunk_id=chunk_id,
-                    content=chunk['content'],
-                    score=score_dict['rrf'],
-                    post_slug=chunk['post_slug'],
-                    post_title=chunk['post_title'],
-                    section_heading=chunk.get('section_heading'),
-                    tags=chunk.get('tags', []),
-                    url=f"/{chunk['post_slug']}{chunk.get('url_fragment', '')}",
-                    source_type=source_type
-                )
-                results.append(result)
+        if self.reranker is not None:
+            reranked = self.reranker.rerank(query, results, top_k, budget_ms=budget_ms)
+            if reranked is not None:
+                return reranked, 'cross-encoder'
 
-        return results
+        return self._heuristic_rerank(query, results, top_k), 'heuristic'
 
-    def _rerank_results(
+    def _heuristic_rerank(
         self,
         query: str,
         results: List[SearchResult],
         top_k: int
     ) -> List[SearchResult]:
         """
-        Rerank results using a cross-encoder model (simplified version).
-        In production, you would use a proper cross-encoder model.
+        Rerank results with a cheap term-overlap heuristic.
         """
-        # For now, we'll use a simple heuristic-based reranking
-        # In production, use a cross-encoder like ms-marco-MiniLM-L-6-v2
+        query_terms = LexicalFeatures.tokenize(query)
+        if not query_terms:
+            return results[:top_k]
+
+        features = self.lexical_features
+        num_terms = len(query_terms)
 
         reranked = []
         for result in results:
@@ -234,20 +657,14 @@ class HybridSearch:
             # 1. Query terms in content
             # 2. Query terms in title
             # 3. Section heading match
-
-            query_terms = set(query.lower().split())
-            content_terms = set(result.content.lower().split())
-            title_terms = set(result.post_title.lower().split())
+            row = self.chunk_id_to_idx[result.chunk_id]
 
             # Term overlap scores
-            content_overlap = len(query_terms & content_terms) / len(query_terms)
-            title_overlap = len(query_terms & title_terms) / len(query_terms)
+            content_overlap = len(query_terms & features.content_terms[row]) / num_terms
+            title_overlap = len(query_terms & features.title_terms[row]) / num_terms
 
             # Section heading bonus
-            section_bonus = 0
-            if result.section_heading:
-                section_terms = set(result.section_heading.lower().split())
-                section_bonus = len(query_terms & section_terms) / len(query_terms) * 0.5
+            section_bonus = len(query_terms & features.heading_terms[row]) / num_terms * 0.5
 
             # Combined rerank score
             rerank_score = (
@@ -262,4 +679,4 @@ class HybridSearch:
 
         # Sort by new score
         reranked.sort(key=lambda x: x.score, reverse=True)
-        return reranked[:top_k]
\ No newline at end of file
+        return reranked[:top_k]
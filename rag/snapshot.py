@@ -0,0 +1,259 @@
+"""
+Versioned index snapshots.
+
+Each index build is written to its own directory, ``snapshots/<version>/``,
+under the data directory and never modified afterwards. Once every
+artifact is in place, a checksum manifest (snapshot.json) listing each
+file's size and SHA-256 is written, and then the pointer file ``CURRENT``
+is atomically replaced with the new version. A reader that resolves the
+pointer therefore sees either the previous index or the new one, never a
+mix. Verifying the checksums also catches a snapshot that was copied or
+synced only partially.
+
+Data directories written before snapshots have the artifacts directly in
+them and no pointer; ``resolve_index_dir`` returns the directory itself
+for those.
+
+The same layout works for S3: upload the snapshot's files under
+``snapshots/<version>/`` and then upload ``CURRENT``, which replaces the
+pointer in a single PUT.
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import secrets
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+POINTER_FILE = 'CURRENT'
+SNAPSHOTS_DIR = 'snapshots'
+SNAPSHOT_MANIFEST = 'snapshot.json'
+FORMAT_VERSION = 1
+
+# Complete snapshots kept, including the current one, so a reader still
+# loading a just-replaced snapshot doesn't have it deleted underneath it
+KEEP_SNAPSHOTS = 3
+
+
+class SnapshotError(Exception):
+    """The snapshot the pointer names is missing, incomplete or fails its checksums."""
+
+
+def file_checksum(path: Path) -> Dict[str, Any]:
+    """Size and SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return {'size': os.path.getsize(path), 'sha256': digest.hexdigest()}
+
+
+def read_pointer(data_dir: Path) -> Optional[str]:
+    """Version named by the data directory's pointer file, or None for the flat layout."""
+    pointer = Path(data_dir) / POINTER_FILE
+    if not pointer.exists():
+        return None
+    version = pointer.read_text().strip()
+    if not version:
+        raise SnapshotError(f"Empty pointer file: {pointer}")
+    return version
+
+
+def snapshot_prefix(version: str) -> str:
+    """Path of a snapshot relative to the data directory (or S3 bucket), with a trailing slash."""
+    return f"{SNAPSHOTS_DIR}/{version}/"
+
+
+def check_file(name: str, path: Path, expected: Dict[str, Any]):
+    """
+    Check a snapshot file against its checksum manifest entry.
+
+    Raises:
+        SnapshotError: If the file is missing or its size or hash differ
+    """
+    if not path.exists():
+        raise SnapshotError(f"Snapshot file missing: {name}")
+    if os.path.getsize(path) != expected['size']:
+        raise SnapshotError(f"Snapshot file {name} is {os.path.getsize(path)} bytes, expected {expected['size']}")
+    if file_checksum(path)['sha256'] != expected['sha256']:
+        raise SnapshotError(f"Snapshot file {name} fails its checksum")
+
+
+def load_snapshot_manifest(path: Path) -> Dict[str, Any]:
+    """Parse a snapshot.json file."""
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Unreadable snapshot manifest {path}: {e}")
+    if manifest.get('format') != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format: {manifest.get('format')}")
+    return manifest
+
+
+def verify_snapshot(snapshot_dir: Path) -> Dict[str, Any]:
+    """
+    Check every file of a snapshot against its checksum manifest.
+
+    Returns:
+        The snapshot manifest
+
+    Raises:
+        SnapshotError: If the manifest or any file is missing or differs
+    """
+    snapshot_dir = Path(snapshot_dir)
+    manifest = load_snapshot_manifest(snapshot_dir / SNAPSHOT_MANIFEST)
+    for name, expected in manifest['files'].items():
+        check_file(name, snapshot_dir / name, expected)
+    return manifest
+
+
+def resolve_index_dir(data_dir: Path, verify: bool = True) -> Path:
+    """
+    Directory holding the current index artifacts.
+
+    Args:
+        data_dir: Data directory of the index
+        verify: Check the snapshot's files against its checksum manifest
+
+    Returns:
+        The snapshot directory the pointer names, or data_dir itself when
+        there is no pointer (indexes written before snapshots)
+
+    Raises:
+        SnapshotError: If the named snapshot is missing or fails verification
+    """
+    data_dir = Path(data_dir)
+    version = read_pointer(data_dir)
+    if version is None:
+        return data_dir
+
+    snapshot_dir = data_dir / SNAPSHOTS_DIR / version
+    if not snapshot_dir.is_dir():
+        raise SnapshotError(f"Pointer names snapshot {version}, which does not exist")
+    if verify:
+        verify_snapshot(snapshot_dir)
+    return snapshot_dir
+
+
+def _fsync(path: Path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SnapshotWriter:
+    """Stages a new snapshot and publishes it by replacing the pointer."""
+
+    def __init__(self, data_dir: Path):
+        """
+        Create the staging directory for a new snapshot.
+
+        Args:
+            data_dir: Data directory of the index
+        """
+        self.data_dir = Path(data_dir)
+        # Microsecond timestamps so names sort in creation order, which prune relies on
+        self.version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ') + '-' + secrets.token_hex(3)
+        self.snapshots_dir = self.data_dir / SNAPSHOTS_DIR
+        # Staged under a temporary name; readers never look there
+        self.path = self.snapshots_dir / f"{self.version}.tmp"
+        self.path.mkdir(parents=True)
+
+    def carry_over(self, source_dir: Path, names: List[str]):
+        """
+        Add unchanged files from an earlier snapshot.
+
+        Files are hard-linked where possible (snapshots are never modified
+        in place) and copied otherwise.
+        """
+        for name in names:
+            source = Path(source_dir) / name
+            if not source.exists():
+                continue
+            try:
+                os.link(source, self.path / name)
+            except OSError:
+                shutil.copy2(source, self.path / name)
+
+    def commit(self) -> Path:
+        """
+        Publish the staged snapshot.
+
+        Checksums every file, writes snapshot.json, moves the directory to
+        its final name and then replaces the pointer. Older snapshots beyond
+        ``KEEP_SNAPSHOTS`` are removed afterwards.
+
+        Returns:
+            Directory of the published snapshot
+        """
+        files = {}
+        for path in sorted(self.path.iterdir()):
+            if path.is_file() and path.name != SNAPSHOT_MANIFEST:
+                _fsync(path)
+                files[path.name] = file_checksum(path)
+
+        manifest_path = self.path / SNAPSHOT_MANIFEST
+        with open(manifest_path, 'w') as f:
+            json.dump({
+                'format': FORMAT_VERSION,
+                'version': self.version,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'files': files
+            }, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+        final_path = self.snapshots_dir / self.version
+        os.replace(self.path, final_path)
+        self.path = final_path
+
+        pointer = self.data_dir / POINTER_FILE
+        staged_pointer = self.data_dir / f"{POINTER_FILE}.tmp"
+        with open(staged_pointer, 'w') as f:
+            f.write(self.version + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staged_pointer, pointer)
+        print(f"Published snapshot {self.version} ({len(files)} files)")
+
+        self.prune()
+        return final_path
+
+    def abort(self):
+        """Remove the staged snapshot; the pointer still names the previous one."""
+        if self.path.name.endswith('.tmp'):
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def prune(self, keep: int = KEEP_SNAPSHOTS):
+        """Remove all but the newest ``keep`` complete snapshots, never the current one."""
+        current = read_pointer(self.data_dir)
+        complete = sorted(
+            path for path in self.snapshots_dir.iterdir()
+            if path.is_dir() and not path.name.endswith('.tmp') and (path / SNAPSHOT_MANIFEST).exists()
+        )
+        for path in complete[:-keep] if keep > 0 else complete:
+            if path.name != current:
+                shutil.rmtree(path, ignore_errors=True)
+                print(f"Removed old snapshot {path.name}")
+
+
+def main():
+    """Print the verified index directory of a data directory (default: data), for shell scripts."""
+    data_dir = Path(sys.argv[1] if len(sys.argv) > 1 else 'data')
+    try:
+        print(resolve_index_dir(data_dir))
+    except SnapshotError as e:
+        print(f"Invalid index snapshot in {data_dir}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
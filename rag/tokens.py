@@ -0,0 +1,94 @@
+"""
+Token counting for chunk sizing.
+
+Chunks have to fit the embedding model's input window, measured in the
+model's own tokens. ``load_token_counter`` loads the Hugging Face tokenizer
+for a model once per process; models without a published tokenizer (or
+environments without the ``tokenizers`` package) fall back to the
+4-characters-per-token estimate.
+"""
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+
+
+class TokenCounter:
+    """Estimates token counts as one token per 4 characters."""
+
+    name = 'estimate'
+    # Token counts of pieces split at whitespace add up to the count of the whole
+    additive = True
+
+    def count(self, text: str) -> int:
+        return len(text) // 4
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [self.count(text) for text in texts]
+
+    def prefix_length(self, text: str, max_tokens: int) -> int:
+        """Number of leading characters of text that fit in max_tokens."""
+        return min(len(text), max_tokens * 4)
+
+    def __call__(self, text: str) -> int:
+        return self.count(text)
+
+
+class TokenizerCounter(TokenCounter):
+    """Counts tokens with a Hugging Face ``tokenizers`` tokenizer."""
+
+    # Subword merges across a join point can make the whole differ slightly from its parts
+    additive = False
+
+    def __init__(self, tokenizer, name: str):
+        self.tokenizer = tokenizer
+        self.name = name
+
+    def count(self, text: str) -> int:
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        return [len(encoding.ids) for encoding in self.tokenizer.encode_batch(texts, add_special_tokens=False)]
+
+    def prefix_length(self, text: str, max_tokens: int) -> int:
+        offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+        if len(offsets) <= max_tokens:
+            return len(text)
+        return offsets[max_tokens - 1][1]
+
+
+@lru_cache(maxsize=None)
+def load_token_counter(tokenizer_name: Optional[str]) -> TokenCounter:
+    """
+    Load the token counter for a tokenizer, once per process.
+
+    Args:
+        tokenizer_name: Hugging Face repo id or local directory containing
+            tokenizer.json; None for the character estimate
+
+    Returns:
+        TokenCounter, falling back to the estimate if the tokenizer can't be loaded
+    """
+    if not tokenizer_name:
+        return TokenCounter()
+
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        print("Warning: tokenizers not installed, estimating token counts (pip install tokenizers)")
+        return TokenCounter()
+
+    try:
+        if os.path.isdir(tokenizer_name):
+            tokenizer = Tokenizer.from_file(str(Path(tokenizer_name) / 'tokenizer.json'))
+        else:
+            tokenizer = Tokenizer.from_pretrained(tokenizer_name)
+    except Exception as e:
+        print(f"Warning: could not load tokenizer {tokenizer_name} ({e}), estimating token counts")
+        return TokenCounter()
+
+    # Chunk sizing needs the full count, not the model's truncated input
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return TokenizerCounter(tokenizer, tokenizer_name)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass MarkdownChunker against the regex-based chunker it
+replaced.
+
+Posts are concatenated into synthetic large documents (``--repeat`` copies
+each) to show how both scale with document size, plus one section holding
+many code blocks. Reports per-document time for each implementation and
+checks that both produce the same chunks, ignoring whitespace (the regex
+chunker joined sentences with single spaces; the scanner slices the
+original text).
+
+Usage:
+    python scripts/benchmark_chunker.py --posts-dir content/posts --repeat 1 10 50
+"""
+
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import frontmatter
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from rag.chunker import Chunk, MarkdownChunker
+
+
+class RegexChunker(MarkdownChunker):
+    """The previous implementation: nested re.split passes and placeholder substitution."""
+
+    def chunk_document(self, content: str, metadata: Dict[str, Any], post_slug: str) -> List[Chunk]:
+        chunks = []
+        h2_sections = re.split(r'^## (.+)$', content, flags=re.MULTILINE)
+
+        if h2_sections[0].strip():
+            chunks.extend(self._section_chunks(h2_sections[0], metadata, post_slug, None, 0))
+
+        position = len(chunks)
+        for i in range(1, len(h2_sections), 2):
+            h2_heading = h2_sections[i]
+            h2_content = h2_sections[i + 1] if i + 1 < len(h2_sections) else ""
+            h3_sections = re.split(r'^### (.+)$', h2_content, flags=re.MULTILINE)
+
+            if h3_sections[0].strip():
+                section_chunks = self._section_chunks(h3_sections[0], metadata, post_slug, h2_heading, position)
+                chunks.extend(section_chunks)
+                position += len(section_chunks)
+
+            for j in range(1, len(h3_sections), 2):
+                h3_content = h3_sections[j + 1] if j + 1 < len(h3_sections) else ""
+                if h3_content.strip():
+                    section_chunks = self._section_chunks(
+                        h3_content, metadata, post_slug, f"{h2_heading} > {h3_sections[j]}", position
+                    )
+                    chunks.extend(section_chunks)
+                    position += len(section_chunks)
+
+        return chunks
+
+    def _section_chunks(
+        self,
+        content: str,
+        metadata: Dict[str, Any],
+        post_slug: str,
+        section_heading: Optional[str],
+        position: int
+    ) -> List[Chunk]:
+        content = content.strip()
+        if not content:
+            return []
+        if len(content) // 4 <= self.max_tokens:
+            return [self._create_chunk(content, metadata, post_slug, section_heading, position)]
+
+        chunks = []
+        current_chunk = []
+        current_tokens = 0
+        for sentence in self._split_into_sentences(content):
+            sentence_tokens = len(sentence) // 4
+            if current_tokens + sentence_tokens <= self.max_tokens:
+                current_chunk.append(sentence)
+                current_tokens += sentence_tokens
+                continue
+
+            if current_chunk:
+                chunks.append(self._create_chunk(
+                    " ".join(current_chunk), metadata, post_slug, section_heading, position + len(chunks)
+                ))
+
+            overlap_sentences = []
+            overlap_tokens = 0
+            if self.overlap_tokens > 0:
+                for sent in reversed(current_chunk):
+                    if overlap_tokens + len(sent) // 4 > self.overlap_tokens:
+                        break
+                    overlap_sentences.insert(0, sent)
+                    overlap_tokens += len(sent) // 4
+            current_chunk = overlap_sentences + [sentence]
+            current_tokens = overlap_tokens + sentence_tokens
+
+        if current_chunk:
+            chunks.append(self._create_chunk(
+                " ".join(current_chunk), metadata, post_slug, section_heading, position + len(chunks)
+            ))
+        return chunks
+
+    def _split_into_sentences(self, text: str) -> List[str]:
+        code_blocks = re.findall(r'```[\s\S]*?```', text)
+        for i, block in enumerate(code_blocks):
+            text = text.replace(block, f"__CODE_BLOCK_{i}__")
+
+        sentences = re.split(r'(?<=[.!?])\s+', text)
+
+        for i, block in enumerate(code_blocks):
+            sentences = [s.replace(f"__CODE_BLOCK_{i}__", block) for s in sentences]
+        return sentences
+
+
+def normalized(chunks: List[Chunk]) -> List[tuple]:
+    return [(c.section_heading, c.position, " ".join(c.content.split())) for c in chunks]
+
+
+def time_chunker(chunker: MarkdownChunker, documents: List[Dict[str, Any]], iterations: int) -> float:
+    """Mean milliseconds to chunk one document."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for document in documents:
+            chunker.chunk_document(document['content'], document['metadata'], document['slug'])
+    return (time.perf_counter() - start) * 1000 / (iterations * len(documents))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the markdown chunker')
+    parser.add_argument('--posts-dir', default='content/posts')
+    parser.add_argument('--repeat', type=int, nargs='+', default=[1, 10, 50],
+                        help='Copies of each post concatenated into one document')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--code-blocks', type=int, default=1000,
+                        help='Code blocks in the synthetic code-heavy section')
+    parser.add_argument('--max-tokens', type=int, default=512)
+    parser.add_argument('--overlap-tokens', type=int, default=50)
+    args = parser.parse_args()
+
+    posts = []
+    for filepath in sorted(Path(args.posts_dir).glob('*.md')):
+        post = frontmatter.load(filepath)
+        posts.append({'slug': filepath.stem, 'content': post.content, 'metadata': dict(post.metadata)})
+    if not posts:
+        print(f"No posts found in {args.posts_dir}")
+        return 1
+
+    scanner = MarkdownChunker(max_tokens=args.max_tokens, overlap_tokens=args.overlap_tokens)
+    regex = RegexChunker(max_tokens=args.max_tokens, overlap_tokens=args.overlap_tokens)
+
+    mismatches = 0
+    for post in posts:
+        if normalized(scanner.chunk_document(post['content'], post['metadata'], post['slug'])) != \
+                normalized(regex.chunk_document(post['content'], post['metadata'], post['slug'])):
+            print(f"✗ chunks differ for {post['slug']}")
+            mismatches += 1
+    print(f"Chunk output matches on {len(posts) - mismatches}/{len(posts)} posts\n")
+
+    print(f"{'repeat':>8}{'doc KB':>10}{'regex ms':>12}{'scanner ms':>12}{'speedup':>10}")
+    for repeat in args.repeat:
+        documents = [
+            {**post, 'content': "\n\n".join([post['content']] * repeat)}
+            for post in posts
+        ]
+        size_kb = sum(len(d['content']) for d in documents) / len(documents) / 1024
+        regex_ms = time_chunker(regex, documents, args.iterations)
+        scanner_ms = time_chunker(scanner, documents, args.iterations)
+        print(f"{repeat:>8}{size_kb:>10.1f}{regex_ms:>12.2f}{scanner_ms:>12.2f}{regex_ms / scanner_ms:>9.1f}x")
+
+    # One long section full of code blocks: the placeholder substitution's worst case
+    code_heavy = [{'slug': 'code-heavy', 'metadata': {}, 'content': "## Examples\n" + "".join(
+        f"Example {i} sets a value. It is shown below!\n```python\nvalue = {i}\n```\n"
+        for i in range(args.code_blocks)
+    )}]
+    size_kb = len(code_heavy[0]['content']) / 1024
+    regex_ms = time_chunker(regex, code_heavy, 1)
+    scanner_ms = time_chunker(scanner, code_heavy, 1)
+    print(f"{'code':>8}{size_kb:>10.1f}{regex_ms:>12.2f}{scanner_ms:>12.2f}{regex_ms / scanner_ms:>9.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
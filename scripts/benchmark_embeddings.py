@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark local embedding providers against each other.
+
+Each provider runs in a fresh subprocess so import time and resident memory
+are measured in isolation. Reports import/initialization time, peak RSS and
+per-query latency, plus cosine similarity of every provider's vectors against
+the first provider (the reference, normally the PyTorch 'local' path).
+
+Usage:
+    python scripts/benchmark_embeddings.py --providers local onnx onnx-int8
+"""
+
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+SAMPLE_QUERIES = [
+    "How does hybrid search combine BM25 and embeddings?",
+    "agentic SRE incident response",
+    "pydantic-ai",
+    "What is reciprocal rank fusion and why use k=60?",
+    "Evaluating LLM performance on specialized financial tasks",
+    "context engineering for retrieval augmented generation",
+    "bm25",
+    "How do multi-agent orchestrators recover from tool failures?",
+]
+
+
+def run_worker(provider: str, model: str, iterations: int, output_path: str):
+    """Measure a single provider; executed inside a subprocess."""
+    start = time.perf_counter()
+    from rag.embeddings import EmbeddingConfig, EmbeddingService
+    import_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    service = EmbeddingService(EmbeddingConfig(provider=provider, model_name=model, dimension=384))
+    init_seconds = time.perf_counter() - start
+
+    # Warm up once so lazy allocations don't skew latency
+    service.embed_query(SAMPLE_QUERIES[0])
+
+    latencies = []
+    for _ in range(iterations):
+        for query in SAMPLE_QUERIES:
+            start = time.perf_counter()
+            service.embed_query(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    np.save(output_path, service.embed_texts(SAMPLE_QUERIES))
+
+    # ru_maxrss is reported in kilobytes on Linux
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({
+        'provider': provider,
+        'import_s': import_seconds,
+        'init_s': init_seconds,
+        'rss_mb': rss_mb,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark local embedding providers')
+    parser.add_argument('--providers', nargs='+', default=['local', 'onnx', 'onnx-int8'])
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.model, args.iterations, args.output)
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for provider in args.providers:
+            print(f"Benchmarking {provider}...")
+            output_path = str(Path(tmp_dir) / f"{provider}.npy")
+            proc = subprocess.run(
+                [sys.executable, __file__, '--worker', provider, '--model', args.model,
+                 '--iterations', str(args.iterations), '--output', output_path],
+                capture_output=True, text=True
+            )
+            if proc.returncode != 0:
+                print(f"✗ {provider} failed:\n{proc.stderr.strip()}")
+                continue
+
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result['vectors'] = np.load(output_path)
+            results.append(result)
+
+    if not results:
+        return 1
+
+    reference = results[0]['vectors']
+    print()
+    print(f"{'provider':<12}{'import s':>10}{'init s':>10}{'RSS MB':>10}{'p50 ms':>10}{'p95 ms':>10}{'min cos':>10}")
+    for result in results:
+        vectors = result['vectors']
+        cosines = np.sum(reference * vectors, axis=1) / (
+            np.linalg.norm(reference, axis=1) * np.linalg.norm(vectors, axis=1)
+        )
+        print(
+            f"{result['provider']:<12}{result['import_s']:>10.2f}{result['init_s']:>10.2f}"
+            f"{result['rss_mb']:>10.0f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            f"{cosines.min():>10.4f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
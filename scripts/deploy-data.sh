@@ -29,6 +29,13 @@ if [ ! -d "data" ]; then
     exit 1
 fi
 
+# Resolve and verify the current index snapshot (data/ itself for the flat layout)
+INDEX_DIR=$(python -m rag.snapshot data) || {
+    echo "Error: index snapshot failed verification"
+    exit 1
+}
+echo "Index directory: $INDEX_DIR"
+
 # Check AWS CLI
 if ! command -v aws &> /dev/null; then
     echo "Error: AWS CLI not installed"
@@ -44,8 +51,8 @@ aws sts get-caller-identity --profile $AWS_PROFILE > /dev/null 2>&1 || {
 }
 
 # Validate embedding model in index
-if [ -f "data/index_summary.json" ]; then
-    ACTUAL_MODEL=$(python -c "import json; print(json.load(open('data/index_summary.json'))['embedding_model'])" 2>/dev/null || echo "unknown")
+if [ -f "$INDEX_DIR/index_summary.json" ]; then
+    ACTUAL_MODEL=$(python -c "import json; print(json.load(open('$INDEX_DIR/index_summary.json'))['embedding_model'])" 2>/dev/null || echo "unknown")
     echo "Index embedding model: $ACTUAL_MODEL"
 
     if [ "$ACTUAL_MODEL" != "$EXPECTED_MODEL" ]; then
@@ -93,19 +100,37 @@ echo "Uploading RAG indexes to S3..."
 echo "Bucket: s3://$S3_BUCKET"
 echo ""
 
-# Upload each file with progress
-for file in chunks.json embeddings.npy bm25_index.pkl metadata.json index_summary.json; do
-    if [ -f "data/$file" ]; then
-        echo "Uploading $file..."
-        aws s3 cp "data/$file" "s3://$S3_BUCKET/$file" \
-            --profile $AWS_PROFILE \
-            --region $AWS_REGION \
-            --metadata "uploaded=$(date -u +%Y-%m-%dT%H:%M:%SZ)"
-        echo "✓ $file uploaded"
-    else
-        echo "⚠ Warning: data/$file not found, skipping"
-    fi
-done
+if [ -f "data/CURRENT" ]; then
+    # Upload the snapshot under its own prefix, then move the pointer; the
+    # backend never sees a partially uploaded index
+    VERSION=$(cat data/CURRENT)
+    echo "Uploading snapshot $VERSION..."
+    aws s3 cp "$INDEX_DIR" "s3://$S3_BUCKET/snapshots/$VERSION/" \
+        --recursive \
+        --profile $AWS_PROFILE \
+        --region $AWS_REGION \
+        --metadata "uploaded=$(date -u +%Y-%m-%dT%H:%M:%SZ)"
+    echo "✓ Snapshot uploaded"
+
+    aws s3 cp "data/CURRENT" "s3://$S3_BUCKET/CURRENT" \
+        --profile $AWS_PROFILE \
+        --region $AWS_REGION
+    echo "✓ CURRENT now points to $VERSION"
+else
+    # Upload each file with progress
+    for file in chunks.json embeddings.npy bm25_index.pkl metadata.json index_summary.json; do
+        if [ -f "data/$file" ]; then
+            echo "Uploading $file..."
+            aws s3 cp "data/$file" "s3://$S3_BUCKET/$file" \
+                --profile $AWS_PROFILE \
+                --region $AWS_REGION \
+                --metadata "uploaded=$(date -u +%Y-%m-%dT%H:%M:%SZ)"
+            echo "✓ $file uploaded"
+        else
+            echo "⚠ Warning: data/$file not found, skipping"
+        fi
+    done
+fi
 
 # Verify uploads
 echo ""
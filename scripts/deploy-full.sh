@@ -60,7 +60,7 @@ check_status() {
 echo ""
 echo "Step 1: Building RAG indexes..."
 echo "--------------------------------"
-if [ ! -f "data/embeddings.npy" ] || [ "$REBUILD_INDEX" == "true" ]; then
+if { [ ! -f "data/CURRENT" ] && [ ! -f "data/embeddings.npy" ]; } || [ "$REBUILD_INDEX" == "true" ]; then
     ./scripts/index-local.sh
     check_status "Index building"
 else
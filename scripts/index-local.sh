@@ -38,7 +38,10 @@ python -m rag.indexer
 # Verify the output
 echo ""
 echo "Verifying generated files..."
-for file in data/chunks.json data/embeddings.npy data/bm25_index.pkl data/metadata.json data/index_summary.json; do
+INDEX_DIR=$(python -m rag.snapshot data) || exit 1
+echo "Snapshot: $INDEX_DIR"
+for name in chunks.json embeddings.npy bm25_index.pkl metadata.json index_summary.json; do
+    file="$INDEX_DIR/$name"
     if [ -f "$file" ]; then
         size=$(du -h "$file" | cut -f1)
         echo "✓ $file ($size)"
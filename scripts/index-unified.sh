@@ -113,15 +113,16 @@ if [ "$EMBEDDING_PROVIDER" = "bedrock" ]; then
     fi
 fi
 
-# Check if index already exists
-if [ -d "${DATA_DIR:-data}" ] && [ -f "${DATA_DIR:-data}/embeddings.npy" ] && [ "$FORCE_REBUILD" != "true" ]; then
+# Check if index already exists (the current snapshot, or the flat layout)
+INDEX_DIR=$(python -m rag.snapshot "${DATA_DIR:-data}" 2>/dev/null)
+if [ -n "$INDEX_DIR" ] && [ -f "$INDEX_DIR/embeddings.npy" ] && [ "$FORCE_REBUILD" != "true" ]; then
     echo ""
     echo -e "${YELLOW}Index already exists in ${DATA_DIR:-data}/${NC}"
     echo -e "${YELLOW}Use --force to rebuild the index${NC}"
 
     # Check if existing index matches current configuration
-    if [ -f "${DATA_DIR:-data}/index_summary.json" ]; then
-        EXISTING_MODEL=$(python -c "import json; print(json.load(open('${DATA_DIR:-data}/index_summary.json'))['embedding_model'])" 2>/dev/null || echo "unknown")
+    if [ -f "$INDEX_DIR/index_summary.json" ]; then
+        EXISTING_MODEL=$(python -c "import json; print(json.load(open('$INDEX_DIR/index_summary.json'))['embedding_model'])" 2>/dev/null || echo "unknown")
         if [ "$EXISTING_MODEL" != "$EMBEDDING_MODEL" ]; then
             echo -e "${RED}Warning: Existing index uses different model: $EXISTING_MODEL${NC}"
             echo -e "${RED}Current configuration expects: $EMBEDDING_MODEL${NC}"
@@ -157,12 +158,13 @@ if [ $? -eq 0 ]; then
     echo -e "${GREEN}======================================${NC}"
 
     # Display summary
-    if [ -f "${DATA_DIR:-data}/index_summary.json" ]; then
+    INDEX_DIR=$(python -m rag.snapshot "${DATA_DIR:-data}" 2>/dev/null)
+    if [ -n "$INDEX_DIR" ] && [ -f "$INDEX_DIR/index_summary.json" ]; then
         echo ""
         echo -e "${BLUE}Index Summary:${NC}"
         python -c "
 import json
-summary = json.load(open('${DATA_DIR:-data}/index_summary.json'))
+summary = json.load(open('$INDEX_DIR/index_summary.json'))
 print(f\"  Created: {summary['created_at']}\")
 print(f\"  Model: {summary['embedding_model']}\")
 print(f\"  Dimensions: {summary.get('embedding_dimension', 'N/A')}\")
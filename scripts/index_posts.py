@@ -6,6 +6,7 @@ This processes all blog posts and creates the search index.
 
 import sys
 import os
+import argparse
 from pathlib import Path
 
 # Add parent directory to path
@@ -16,6 +17,11 @@ from rag.indexer import BlogIndexer
 
 def main():
     """Run the indexing pipeline."""
+    parser = argparse.ArgumentParser(description='Index blog posts for RAG')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only reprocess posts added, changed or deleted since the last index')
+    args = parser.parse_args()
+
     print("=" * 60)
     print("RAG Indexing Pipeline for Blog Posts")
     print("=" * 60)
@@ -28,7 +34,10 @@ def main():
 
     # Create indexer and run
     indexer = BlogIndexer()
-    indexer.run()
+    if args.incremental:
+        indexer.run_incremental()
+    else:
+        indexer.run()
 
     print("\n" + "=" * 60)
     print("Indexing complete! You can now start the API server.")
@@ -4,11 +4,18 @@ Simple re-indexing script using Bedrock Titan V2 embeddings.
 Uses existing chunks and regenerates embeddings only.
 """
 
+import sys
 import json
 import boto3
 import numpy as np
 from pathlib import Path
 
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from rag.chunk_store import load_chunk_records
+from rag.snapshot import SnapshotWriter, resolve_index_dir
+
 def get_titan_embedding(text, bedrock_client):
     """Get embedding from Titan Text Embeddings V2."""
     body = json.dumps({
@@ -45,9 +52,10 @@ def main():
 
     # Load existing chunks
     data_dir = Path("data")
+    index_dir = resolve_index_dir(data_dir)
     print("\nLoading existing chunks...")
-    with open(data_dir / "chunks.json", "r") as f:
-        chunks = json.load(f)
+    with open(index_dir / "chunks.json", "r") as f:
+        chunks = load_chunk_records(json.load(f))
     print(f"Loaded {len(chunks)} chunks")
 
     # Generate new embeddings
@@ -64,15 +72,17 @@ def main():
         embedding = get_titan_embedding(chunk['content'], bedrock_runtime)
         embeddings.append(embedding)
         chunk_ids.append(chunk['chunk_id'])
-        metadata.append(chunk.get('metadata', {}))
+        metadata.append({'post_slug': chunk['post_slug'], 'tags': chunk['tags']})
 
     embeddings_array = np.array(embeddings)
     print(f"Generated embeddings shape: {embeddings_array.shape}")
 
-    # Save new embeddings
+    # Save new embeddings into a new snapshot; chunks and BM25 carry over unchanged
     print("\nSaving new embeddings...")
-    np.save(data_dir / "embeddings.npy", embeddings_array)
-    print(f"✓ Saved embeddings to {data_dir / 'embeddings.npy'}")
+    snapshot = SnapshotWriter(data_dir)
+    snapshot.carry_over(index_dir, ["chunks.json", "bm25_index.pkl"])
+    np.save(snapshot.path / "embeddings.npy", embeddings_array)
+    print(f"✓ Saved embeddings to {snapshot.path / 'embeddings.npy'}")
 
     # Update metadata with new dimensions
     metadata_dict = {
@@ -83,13 +93,13 @@ def main():
         "total_chunks": len(chunks)
     }
 
-    with open(data_dir / "metadata.json", "w") as f:
+    with open(snapshot.path / "metadata.json", "w") as f:
         json.dump(metadata_dict, f, indent=2)
-    print(f"✓ Updated metadata to {data_dir / 'metadata.json'}")
+    print(f"✓ Updated metadata to {snapshot.path / 'metadata.json'}")
 
     # Update index summary
     from datetime import datetime
-    with open(data_dir / "index_summary.json", "r") as f:
+    with open(index_dir / "index_summary.json", "r") as f:
         summary = json.load(f)
 
     summary.update({
@@ -98,10 +108,12 @@ def main():
         "embedding_dimensions": int(embeddings_array.shape[1])
     })
 
-    with open(data_dir / "index_summary.json", "w") as f:
+    with open(snapshot.path / "index_summary.json", "w") as f:
         json.dump(summary, f, indent=2)
     print(f"✓ Updated index summary")
 
+    snapshot.commit()
+
     print(f"\n✅ Re-indexing complete!")
     print(f"   Total chunks: {len(chunks)}")
     print(f"   Embedding dimensions: {embeddings_array.shape[1]}")
@@ -109,5 +121,4 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    import sys
     sys.exit(main())
\ No newline at end of file
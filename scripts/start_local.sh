@@ -31,7 +31,7 @@ fi
 mkdir -p data
 
 # Check if index exists
-if [ ! -f "data/chunks.json" ]; then
+if [ ! -f "data/CURRENT" ] && [ ! -f "data/chunks.json" ]; then
     echo "No index found. Running indexer..."
     python scripts/index_posts.py
 fi